@@ -0,0 +1,29 @@
+"""add address to locations
+
+Revision ID: 3f1c9a7d2b64
+Revises: ce864af0ef68
+Create Date: 2026-10-18 10:12:31.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = 'ce864af0ef68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reverse-geocoded address, filled in lazily the first time a location is played
+    op.add_column('locations', sa.Column('address', sa.TEXT(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('locations', 'address')
@@ -0,0 +1,44 @@
+"""add game hot path indexes
+
+Revision ID: 7b2e4c91d0a5
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 15:41:07.219354
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4c91d0a5'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    # update_user_round looks up the user_round of a round
+    ('ix_user_rounds_round_id', 'user_rounds', ['round_id']),
+    # Game totals aggregate a game's user_rounds
+    ('ix_user_rounds_game_id', 'user_rounds', ['game_id']),
+    # A user's games, newest first
+    ('ix_games_user_id_started_at', 'games', ['user_id', 'started_at']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so live tables stay writable; that can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""add user stats
+
+Revision ID: c4d81f2a6e37
+Revises: 7b2e4c91d0a5
+Create Date: 2026-10-18 17:05:52.640118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d81f2a6e37'
+down_revision: Union[str, None] = '7b2e4c91d0a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lifetime totals per user; fill it for existing games with `python -m app.backfill_user_stats`
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('total_score', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('best_score', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('total_distance', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('rounds_played', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('last_played_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('user_stats_user_id_fkey')),
+    sa.PrimaryKeyConstraint('user_id', name=op.f('user_stats_pkey'))
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
@@ -0,0 +1,37 @@
+"""add game mode
+
+Revision ID: e5a1b7c3d9f2
+Revises: c4d81f2a6e37
+Create Date: 2026-10-18 19:22:14.508316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1b7c3d9f2'
+down_revision: Union[str, None] = 'c4d81f2a6e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing games were all classic games
+    op.add_column('games', sa.Column('mode', sa.String(), nullable=False, server_default='classic'))
+    op.add_column('games', sa.Column('challenge_date', sa.Date(), nullable=True))
+    # One attempt per user at each daily challenge; built concurrently so games stays writable
+    with op.get_context().autocommit_block():
+        op.create_index('uq_games_user_id_challenge_date', 'games', ['user_id', 'challenge_date'], unique=True,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_games_user_id_challenge_date', table_name='games', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('games', 'challenge_date')
+    op.drop_column('games', 'mode')
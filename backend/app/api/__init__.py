@@ -7,6 +7,7 @@ It exports the main API router that combines all route modules.
 The API structure follows a modular design pattern with routes organized by feature:
 - auth: User authentication and account management
 - game: Game session creation and gameplay logic
+- leaderboard: Global, daily and weekly leaderboards
 
 Usage:
 - Import api_router to include all API endpoints in the main application
@@ -7,6 +7,7 @@ It organizes endpoints by feature area with appropriate prefixes and tags.
 Route Structure:
 - /game/*: Game-related endpoints (starting games, rounds, guessing)
 - /auth/*: Authentication endpoints (register, login, user profile)
+- /leaderboard/*: Global, daily and weekly leaderboards
 
 Dependencies:
 - FastAPI: For routing functionality
@@ -14,7 +15,7 @@ Dependencies:
 """
 
 from fastapi import APIRouter
-from app.api.routes import game, auth
+from app.api.routes import game, auth, leaderboard
 
 
 # Create main API router that will include all route modules
@@ -26,3 +27,5 @@ api_router.include_router(game.router, prefix="/game", tags=["game"])
 # Include authentication-related routes with /auth prefix and "auth" tag
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 
+# Include leaderboard routes with /leaderboard prefix and "leaderboard" tag
+api_router.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
@@ -8,6 +8,7 @@ Key Features:
 - User registration with validation
 - Secure login with JWT token generation
 - User session management via HTTP-only cookies
+- Lifetime game stats for the current user
 - Authentication verification middleware
 
 Dependencies:
@@ -22,13 +23,13 @@ from datetime import datetime, timedelta
 from sqlalchemy.sql.functions import user
 
 # Assuming redis_client is imported correctly from your services
-from app.services import create_access_token, redis_client
+from app.services import create_access_token, redis_client, delete_game_session, get_user_stats
 from pydantic import BaseModel
 from app.db import get_db
 from sqlalchemy.orm import Session
 
-from app.services.authentication import check_if_user_exists, create_user, verify_credentials, get_user_from_cookie, \
-    set_cookie
+from app.services.authentication import check_if_user_exists, create_user_async, verify_credentials_async, \
+    get_user_from_cookie, set_cookie, PasswordHashQueueFull
 
 router = APIRouter()
 
@@ -87,12 +88,16 @@ async def register_user(user: UserRegister, db: Session = Depends(get_db)):
 
     Raises:
         HTTPException: 400 if username or email already exists
+        HTTPException: 503 if the password hashing queue is full
     """
     user_in_db = check_if_user_exists(db, user.username, user.email)
     if user_in_db:
         raise HTTPException(status_code=400, detail="Username already registered")
     else:
-        new_user = create_user(db, user.username, user.password, user.email)
+        try:
+            new_user = await create_user_async(db, user.username, user.password, user.email)
+        except PasswordHashQueueFull:
+            raise HTTPException(status_code=503, detail="Server busy, please try again")
         # Assuming create_user returns a dict that matches UserResponse
         return new_user
 
@@ -124,8 +129,12 @@ async def login_user(request: UserLogin, response: Response, db: Session = Depen
 
     Raises:
         HTTPException: 401 if credentials are invalid
+        HTTPException: 503 if the password hashing queue is full
     """
-    user_data = verify_credentials(db, request.email, request.password)
+    try:
+        user_data = await verify_credentials_async(db, request.email, request.password)
+    except PasswordHashQueueFull:
+        raise HTTPException(status_code=503, detail="Server busy, please try again")
     if user_data:
         access_token = create_access_token(user_data['id'], user_data['username'], user_data['email'])
         set_cookie(response, access_token)
@@ -158,8 +167,7 @@ def logout_user(request: Request, response: Response):
 
     if user and redis_client:
         # If the user was successfully identified, clear their game session from the cache.
-        game_session_key = f'user:{user["user_id"]}:game_session'
-        redis_client.delete(game_session_key)
+        delete_game_session(user["user_id"])
 
     # Always delete the cookie, even if the user wasn't found.
     # This cleans up bad/expired cookies from the browser.
@@ -194,3 +202,27 @@ def get_user_details(request: Request):
         # but it's good practice to be explicit.
         raise HTTPException(status_code=401, detail="Invalid or missing token")
 
+
+@router.get('/me/stats')
+def get_user_stats_details(request: Request, db: Session = Depends(get_db)):
+    """
+    Retrieve the current user's lifetime game stats
+
+    Reads the user's precomputed user_stats row (a single primary key lookup),
+    which is kept up to date whenever one of their games is finished.
+
+    Args:
+        request (Request): HTTP request object containing cookies
+        db (Session): Database session dependency
+
+    Returns:
+        dict: Games played, total/best/average score, average distance and last played time
+
+    Raises:
+        HTTPException: 401 if no valid token is present
+    """
+    current_user = get_user_from_cookie(request)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="Invalid or missing token")
+
+    return get_user_stats(current_user["user_id"], db)
@@ -28,17 +28,37 @@ from app.services import (
     get_coords_from_pano_id,
     get_score,
     update_user_round,
-    get_total_score,
-    get_total_distance_off,
-    update_game,
-    limiter
+    finalize_game,
+    record_game_score,
+    limiter,
+    location_index,
+    sample_locations_async,
+    get_location_addresses_async,
+    pop_game_deck_async,
+    get_daily_challenge_async,
+    create_game_with_first_round_async,
+    create_round_with_user_round_async,
+    load_game_session,
+    record_guess,
+    acquire_guess_lock,
+    release_guess_lock,
+    get_round_result,
+    load_game_session_async,
+    save_game_session_async,
+    set_active_round_async,
+    delete_game_session_async
 )
 from app.models import Location
-from app.db import get_db
+from app.db import get_db, get_async_db
 from app.services.authentication import get_user_from_cookie
+from app.services.game import RoundAlreadyScored, is_duplicate_challenge_game
+from app.services.game_session import GUESS_RESULT_WAIT_SECONDS
+from app.services.location import remember_location_addresses
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import random
-from datetime import datetime
+from datetime import date, datetime
 
 
 
@@ -68,6 +88,8 @@ class GameRoundResponse(BaseModel):
     total_score: float
     all_round_distances: List[float]
     all_actual_string_locations: List[str]
+    mode: str = "classic"
+    challenge_date: Optional[date] = None
 
 
 
@@ -135,19 +157,26 @@ def get_game_stats(request: Request, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=401, detail="User is not logged in")
 
-    redis_response = redis_client.get(f'user:{user["user_id"]}:game_session')
-    if not redis_response:
+    game_data = load_game_session(user["user_id"])
+    if not game_data:
         raise HTTPException(status_code=401, detail="User is not logged in")
 
-    game_data = json.loads(redis_response)
-
     game_id = game_data['game_id']
 
-    total_score = get_total_score(game_id, db)
-    total_distance_off = get_total_distance_off(game_id, db)
+    # A game is only finalized (and its stats and leaderboard score recorded) once every round is played
+    if game_data["current_round"] <= len(game_data["all_pano_ids"]):
+        raise HTTPException(status_code=409, detail="The game is not finished yet")
 
+    # Sums the game's rounds and marks it completed in one statement
+    try:
+        game_stats = finalize_game(game_id, user['user_id'], db)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Game not found")
 
-    game_stats = update_game(user['user_id'], total_score, total_distance_off, db)
+    # Only the request that actually completed the (fully played) game feeds the leaderboards
+    if game_stats["finalized"]:
+        record_game_score(user['user_id'], user['username'], game_stats["total_score"], game_stats["completed_at"],
+                          challenge_date=game_stats["challenge_date"])
 
 
 
@@ -191,67 +220,89 @@ def get_round_results(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=401, detail="User is not logged in")
 
         # Get game session from Redis
-        lock_key = f'user:{user["user_id"]}:guess_lock'
-        redis_response = redis_client.get(f'user:{user["user_id"]}:game_session')
-        if not redis_response:
-            raise HTTPException(status_code=404, detail="Game session not found")
-
         try:
-            game_data = json.loads(redis_response)
-        except json.JSONDecodeError:
+            game_data = load_game_session(user["user_id"])
+        except ValueError:
             raise HTTPException(status_code=500, detail="Invalid game session data")
+        if not game_data:
+            raise HTTPException(status_code=404, detail="Game session not found")
 
-        # Extract game data with defaults
-        actual_location_string = game_data.get("current_string_location", "Unknown location")
-        round_lat = game_data.get("game_lats")[game_data.get("current_round") - 1]
-        round_lng = game_data.get("game_lngs")[game_data.get("current_round") - 1]
-
-        print(f'Current round lat {round_lat}')
-        print(f'Current round lng {round_lng}')
-
-        if round_lat is None or round_lng is None:
-            raise HTTPException(status_code=400, detail="Round coordinates not found")
-
-        # Calculate results
-        guess_location_string = get_address_from_coordinates(guess_lat, guess_lng)
-        distance_off = haversine_formula(guess_lat, guess_lng, round_lat, round_lng)
-        user_score = get_score(distance_off)
-        game_data["all_round_scores"].append(user_score)
-        game_data["all_round_distances"].append(distance_off)
-        # Update database
         user_id = user["user_id"]
-        round_id = game_data["round_id"]
-        updated_user_stats = update_user_round(round_id, guess_location_string, guess_lat, guess_lng, distance_off, user_score, db)
-
-        if not updated_user_stats:
-            raise HTTPException(status_code=500, detail="Failed to update user round data")
+        current_round = game_data.get("current_round")
+        round_number = game_data.get("round_number")
+
+        # A repeat submit for a round that was already scored gets the stored result back
+        if round_number < current_round:
+            previous_result = game_data["round_results"].get(round_number)
+            if previous_result is None:
+                raise HTTPException(status_code=409, detail="This round has already been submitted")
+            return previous_result
+        if current_round > len(game_data.get("game_lats")):
+            raise HTTPException(status_code=409, detail="All rounds have already been played")
+
+        # Only one request per user scores a guess. A concurrent submit (e.g. a double-click)
+        # waits briefly for that request's result instead of geocoding and scoring again
+        lock_token = acquire_guess_lock(user_id)
+        if lock_token is None:
+            previous_result = get_round_result(user_id, current_round, wait_seconds=GUESS_RESULT_WAIT_SECONDS)
+            if previous_result is None:
+                raise HTTPException(status_code=409, detail="A guess for this round is already being processed")
+            return previous_result
 
-        # Update Redis session
-        game_data["total_score"] = game_data.get("total_score", 0) + user_score
-        game_data["total_distance"] = game_data.get("total_distance", 0) + distance_off
-        game_data["current_round"] = game_data.get("current_round", 0) + 1
-
-
-
-        # Optional: Track round completion
-        game_data["rounds_completed"] = game_data.get("rounds_completed", 0) + 1
-
-        game_data_json = json.dumps(game_data)
-        redis_client.set(f'user:{user["user_id"]}:game_session', game_data_json)
-
-        return {
-            "success": True,
-            "round_lat": round_lat,
-            "round_lng": round_lng,
-            "user_guess_lat": guess_lat,
-            "user_guess_lng": guess_lng,
-            "distance_off": round(distance_off, 2),
-            "guess_location_string": guess_location_string,
-            "actual_location_string": actual_location_string,
-            "round_score": user_score,
-            "total_score": game_data["total_score"],
-            "total_distance": round(game_data["total_distance"], 2)
-        }
+        try:
+            # Extract game data with defaults
+            actual_location_string = game_data.get("current_string_location", "Unknown location")
+            round_lat = game_data.get("game_lats")[current_round - 1]
+            round_lng = game_data.get("game_lngs")[current_round - 1]
+
+            print(f'Current round lat {round_lat}')
+            print(f'Current round lng {round_lng}')
+
+            if round_lat is None or round_lng is None:
+                raise HTTPException(status_code=400, detail="Round coordinates not found")
+
+            # Calculate results
+            guess_location_string = get_address_from_coordinates(guess_lat, guess_lng)
+            distance_off = haversine_formula(guess_lat, guess_lng, round_lat, round_lng)
+            user_score = get_score(distance_off)
+
+            # Save the guess to the database first, so the session never holds a score the
+            # game totals won't include. The write only succeeds once per round
+            round_id = game_data["round_id"]
+            try:
+                update_user_round(round_id, guess_location_string, guess_lat, guess_lng, distance_off, user_score, db)
+            except RoundAlreadyScored as e:
+                # An earlier attempt saved its guess but didn't get to record it in the session
+                # (e.g. Redis failed in between): finish recording that saved guess
+                saved = e.user_round
+                guess_lat, guess_lng = saved.guess_lat, saved.guess_lng
+                guess_location_string = get_address_from_coordinates(guess_lat, guess_lng)
+                distance_off, user_score = saved.distance_off, saved.round_score
+            except ValueError:
+                raise HTTPException(status_code=500, detail="Failed to update user round data")
+
+            round_results = {
+                "success": True,
+                "round_lat": round_lat,
+                "round_lng": round_lng,
+                "user_guess_lat": guess_lat,
+                "user_guess_lng": guess_lng,
+                "distance_off": round(distance_off, 2),
+                "guess_location_string": guess_location_string,
+                "actual_location_string": actual_location_string,
+                "round_score": user_score,
+                "total_score": game_data.get("total_score", 0) + user_score,
+                "total_distance": round(game_data.get("total_distance", 0) + distance_off, 2)
+            }
+
+            # Record the guess (and its response, for repeat submits) and advance the Redis
+            # session in one atomic step. This is rejected if the round was already scored
+            if record_guess(user_id, current_round, user_score, distance_off, round_results) is None:
+                raise HTTPException(status_code=409, detail="This round has already been submitted")
+
+            return round_results
+        finally:
+            release_guess_lock(user_id, lock_token)
 
 
 
@@ -276,13 +327,11 @@ def get_current_game(request: Request, db: Session = Depends(get_db)):
             raise HTTPException(status_code=401, detail="User is not logged in")
 
         # Get game session from Redis
-        redis_response = redis_client.get(f'user:{user["user_id"]}:game_session')
-        if not redis_response:
-            return {"has_active_game": False}
-
         try:
-            game_data = json.loads(redis_response)
-        except json.JSONDecodeError:
+            game_data = load_game_session(user["user_id"])
+        except ValueError:
+            return {"has_active_game": False}
+        if not game_data:
             return {"has_active_game": False}
 
         # Check if game is still active
@@ -308,7 +357,9 @@ def get_current_game(request: Request, db: Session = Depends(get_db)):
                 current_round_index] if current_round_index < len(
                 game_data.get("all_actual_string_locations", [])) else "",
             "total_score": game_data.get("total_score", 0),
-            "total_distance": game_data.get("total_distance", 0)
+            "total_distance": game_data.get("total_distance", 0),
+            "mode": game_data.get("mode", "classic"),
+            "challenge_date": game_data.get("challenge_date")
         }
 
     except Exception as e:
@@ -317,20 +368,19 @@ def get_current_game(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post('/reset-game')
-async def reset_game(request: Request, db: Session = Depends(get_db)):
+async def reset_game(request: Request):
     user = get_user_from_cookie(request)
     if not user:
         raise HTTPException(status_code=401, detail="User is not logged in")
 
-    session_key = f'user:{user["user_id"]}:game_session'
-    if not session_key:
-        raise HTTPException(status_code=404, detail="Game session not found")
-
-    redis_client.delete(session_key)
+    await delete_game_session_async(user["user_id"])
     return {"success": True}
 
 @router.post('/start-game', response_model=GameRoundResponse)
-async def start_game(request: Request, db: Session = Depends(get_db)):
+async def start_game(request: Request,
+                     mode: str = Query("classic", pattern="^(classic|daily)$",
+                                       description="'classic' for random locations, 'daily' for today's shared challenge"),
+                     db: AsyncSession = Depends(get_async_db)):
     """
     Initialize a new game session for the authenticated user.
 
@@ -345,13 +395,15 @@ async def start_game(request: Request, db: Session = Depends(get_db)):
     1. Check if user is authenticated
     2. We will get the game state from Redis. If not, we will create a new game session.
     3. Create new game, round, and user_round records in database
-    4. Get pano ID
-    5. Get coordinates and address for the selected location
+    4. Daily mode: read the day's shared challenge deck (chosen and geocoded once per day)
+       Classic mode: pop a prebuilt game deck from Redis, or draw 5 distinct locations (pano ID + coordinates) in a single call
+    5. Get the address for each selected location (already in the deck when one was used)
     6. Return game data to frontend
 
     Args:
         request (Request): HTTP request object (contains cookies)
-        db (Session): Database session dependency
+        mode (str): 'classic' (default) or 'daily'; ignored when a game is already in progress
+        db (AsyncSession): Async database session dependency
 
     Returns:
         dict: Game initialization data including:
@@ -364,10 +416,10 @@ async def start_game(request: Request, db: Session = Depends(get_db)):
             - total_score: Initial score for the user (0 for new games)
 
     Raises:
-        HTTPException: 401 if user is not authenticated
+        HTTPException: 401 if user is not authenticated, 409 if the user already played today's daily challenge
 
     Redis Caching Strategy:
-        - 'user:{user_id}:game_session' is set to game data JSON string'
+        - 'user:{user_id}:game_session' is a hash holding the game data (see app.services.game_session)
     """
 
     # Authentication check
@@ -378,67 +430,88 @@ async def start_game(request: Request, db: Session = Depends(get_db)):
 
     # We first check to see if the user has an existing game session. If so, we return the game data from Redis.
     # If not, we create a new game session and return the game data.
-    session_key = f'user:{user["user_id"]}:game_session'
-    redis_response = redis_client.get(session_key)
-
-    if redis_response is None:
-        # Getting number of locations from database. This could easily be hardcoded
-        number_of_locations = db.query(Location).count()
-
-
-        # We will get 5 different pano ids
-        round_pano_ids = [get_random_pano_id(random.randint(1, number_of_locations), db) for _ in range(5)]
-
-
-        # We will get the corresponding coordinates and string location for the pano ids generated
-        all_lats = []
-        all_lngs = []
-        all_actual_string_locations = []
-        #This for loop will  iterate over all of the pano_ids in the round_pano_ids array
-        for pano_id in round_pano_ids:
-            # Getting coordinates from the pano id
-            coords = get_coords_from_pano_id(str(pano_id), db)
-            lat = coords['lat']
-            lng = coords['lng']
-            all_lats.append(lat)
-            all_lngs.append(lng)
-            all_actual_string_locations.append(get_address_from_coordinates(lat, lng))
+    existing_game_data = await load_game_session_async(user["user_id"])
+
+    if existing_game_data is None:
+        # Getting number of locations from the in-memory location index
+        await location_index.ensure_fresh_async(db)
+        number_of_locations = len(location_index)
+
+
+        # Daily challenge games all share one precomputed deck. Otherwise we take a prebuilt game deck
+        # from Redis, and if none are ready, we build one inline: 5 distinct locations in one go
+        # (pano id + coordinates), served from the location index
+        challenge_day = datetime.now().date() if mode == "daily" else None
+        if challenge_day:
+            deck = await get_daily_challenge_async(db, challenge_day)
+        else:
+            deck = await pop_game_deck_async()
+        if deck:
+            location_ids = deck["location_ids"]
+            round_pano_ids = deck["pano_ids"]
+            all_lats = deck["lats"]
+            all_lngs = deck["lngs"]
+            all_actual_string_locations = deck["addresses"]
+            # The deck may have been built by another worker: teach this worker's index its addresses
+            # so the session can store them by reference without a shared-hash lookup
+            remember_location_addresses(dict(zip(location_ids, all_actual_string_locations)))
+        else:
+            round_locations = await sample_locations_async(5, db)
+            location_ids = [location.id for location in round_locations]
+            round_pano_ids = [location.pano_id for location in round_locations]
+            all_lats = [location.lat for location in round_locations]
+            all_lngs = [location.lng for location in round_locations]
+
+            # We will get the corresponding string location for each drawn location (stored after first geocode)
+            # Missing addresses are geocoded concurrently, so this waits on the slowest lookup, not the sum
+            all_actual_string_locations = await get_location_addresses_async(round_locations, db)
 
 
         # Getting the user id
         user_id = user['user_id']
         string_location = all_actual_string_locations[0]
-        new_game = create_new_game(user_id, db)  # Creates games table record
-        new_round = create_round(new_game.id, 1, string_location, db)  # Creates rounds table record
-        user_round = create_user_round(new_round.id, user_id, new_game.id, db)  # Creates user_rounds table record
+        # Creates the games, rounds and user_rounds table records with a single commit
+        # A player gets one game per daily challenge: the unique (user_id, challenge_date) index rejects a replay
+        try:
+            created = await create_game_with_first_round_async(user_id, string_location, db,
+                                                               mode=mode, challenge_date=challenge_day)
+        except IntegrityError as e:
+            await db.rollback()
+            # Any other integrity failure is a real error, not a replay
+            if challenge_day and is_duplicate_challenge_game(e):
+                raise HTTPException(status_code=409, detail="You have already played today's daily challenge")
+            raise
 
 
         game_data = {
-            "game_id": new_game.id,
+            "game_id": created["game_id"],
             "game_lats": all_lats,
             "game_lngs": all_lngs,
-            "round_id": new_round.id,
+            "round_id": created["round_id"],
             "user_id": user["user_id"],
-            "current_round": new_round.round_number,
+            "current_round": created["round_number"],
+            "round_number": created["round_number"],
             "current_string_location": string_location,
             "all_pano_ids": round_pano_ids,
             "all_round_scores": [],
             "number_of_locations": number_of_locations,
-            "total_score": user_round.round_score,
+            "total_score": created["round_score"],
             "all_round_distances": [],
             "all_actual_string_locations": all_actual_string_locations,
+            "location_ids": location_ids,
+            "mode": mode,
+            "challenge_date": challenge_day.isoformat() if challenge_day else None,
         }
 
-        game_data_json = json.dumps(game_data)
-        redis_client.set(session_key, game_data_json)
+        await save_game_session_async(user["user_id"], game_data)
         return game_data
 
 
-    return json.loads(redis_response)
+    return existing_game_data
 
 
 @router.post('/next-round', response_model=GameRoundResponse)
-async def get_next_round(request: Request, db: Session = Depends(get_db)):
+async def get_next_round(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Advance to the next round of the current game.
 
@@ -460,21 +533,19 @@ async def get_next_round(request: Request, db: Session = Depends(get_db)):
 
 
     # We get the game session for the user
-    session_key = f'user:{user["user_id"]}:game_session'
-    redis_response = redis_client.get(session_key)
-
-
-    if redis_response is None:
+    game_data = await load_game_session_async(user["user_id"])
+    if game_data is None:
         raise HTTPException(status_code=404, detail="Game session not found")
 
-
-
-    # Convert redis cache to json
-    game_data = json.loads(redis_response)
-
     # Getting current round
     current_round = game_data['current_round']
 
+    # The round was already started (e.g. a repeated request); nothing to create
+    if game_data['round_number'] == current_round:
+        return game_data
+    if current_round > len(game_data['all_pano_ids']):
+        raise HTTPException(status_code=409, detail="All rounds have already been played")
+
     # Getting pano id with the current round
     # We have to subtract 1 from current round for proper indexing
     pano_id = game_data['all_pano_ids'][current_round - 1]
@@ -483,20 +554,19 @@ async def get_next_round(request: Request, db: Session = Depends(get_db)):
     game_id = game_data['game_id']
     user_id = user["user_id"]
 
-    # This is what displays the address on the frontend.
-    string_location = get_location_string(float(game_data['game_lats'][current_round - 1]), float(game_data['game_lngs'][current_round - 1]))
+    # This is what displays the address on the frontend. It was already resolved when the game started.
+    string_location = game_data['all_actual_string_locations'][current_round - 1]
+    game_data['current_string_location'] = string_location
 
     # Creating a new round and user stats for that specific round
 
     # We only create these two. We do not want to create a new game in this instance.
-    new_round = create_round(game_data['game_id'], current_round, string_location, db)
-    user_round = create_user_round(new_round.id, user_id,  game_id, db)
-
-    # Update the round id and the pano id in the redis cache
-    game_data['round_id'] = new_round.id
-    game_data_json = json.dumps(game_data)
-    redis_client.set(session_key, game_data_json)
-    print(game_data)
+    created = await create_round_with_user_round_async(game_id, current_round, string_location, user_id, db)
+
+    # Point the redis session at the new round
+    game_data['round_id'] = created['round_id']
+    game_data['round_number'] = current_round
+    await set_active_round_async(user["user_id"], created['round_id'], current_round)
 
     return game_data
 
@@ -0,0 +1,114 @@
+"""
+Leaderboard Routes Module
+
+This module exposes the global, daily, weekly and daily challenge leaderboards. All reads are
+served from Redis sorted sets (see app.services.leaderboard), so the cost of a
+request does not depend on how many games have been played.
+
+Endpoints:
+- GET /leaderboard/{period}: A page of the leaderboard, best score first
+- GET /leaderboard/{period}/me: The current player's rank and their neighbours
+
+Dependencies:
+- Redis: Stores the leaderboards
+- JWT cookie: Identifies the player for the /me endpoint
+"""
+
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+
+from app.services import get_leaderboard, get_user_rank, redis_client
+from app.services.authentication import get_user_from_cookie
+from app.services.leaderboard import LEADERBOARD_PERIODS
+from app.services.redis_client import REDIS_UNAVAILABLE_ERRORS
+
+router = APIRouter()
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: Optional[str]
+    score: float
+
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    board: str
+    total_players: int
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardRankResponse(LeaderboardResponse):
+    rank: Optional[int]
+    score: Optional[float]
+
+
+def _board_time(period: str, day: Optional[date]):
+    """Validate the period and turn the optional ?day= into a datetime inside the wanted board"""
+    if period not in LEADERBOARD_PERIODS:
+        raise HTTPException(status_code=404, detail=f"Unknown leaderboard '{period}'")
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Leaderboards are temporarily unavailable")
+    return datetime.combine(day, datetime.min.time()) if day else None
+
+
+@router.get('/{period}', response_model=LeaderboardResponse)
+def read_leaderboard(period: str,
+                     limit: int = Query(10, ge=1, le=100),
+                     offset: int = Query(0, ge=0),
+                     day: Optional[date] = Query(None, description="Any day of the wanted daily/weekly board, or the challenge date (default: today)")):
+    """
+    Return a page of the global, daily, weekly or challenge leaderboard
+
+    Args:
+        period (str): 'global', 'daily', 'weekly' or 'challenge'
+        limit (int): Number of entries (1-100)
+        offset (int): Number of entries to skip
+        day (date): Pick a past daily/weekly/challenge board (kept for a limited time)
+
+    Returns:
+        LeaderboardResponse: The requested page, best score first
+
+    Raises:
+        HTTPException: 404 for an unknown period, 503 if Redis is unavailable
+    """
+    when = _board_time(period, day)
+    try:
+        return get_leaderboard(period, limit, offset, when)
+    except REDIS_UNAVAILABLE_ERRORS:
+        raise HTTPException(status_code=503, detail="Leaderboards are temporarily unavailable")
+
+
+@router.get('/{period}/me', response_model=LeaderboardRankResponse)
+def read_my_rank(request: Request,
+                 period: str,
+                 radius: int = Query(5, ge=0, le=50),
+                 day: Optional[date] = Query(None, description="Any day of the wanted daily/weekly board, or the challenge date (default: today)")):
+    """
+    Return the current player's rank with the players around them
+
+    Args:
+        request (Request): HTTP request object containing cookies
+        period (str): 'global', 'daily', 'weekly' or 'challenge'
+        radius (int): Number of players to include above and below
+        day (date): Pick a past daily/weekly/challenge board (kept for a limited time)
+
+    Returns:
+        LeaderboardRankResponse: Rank and score (null if not ranked) and neighbouring entries
+
+    Raises:
+        HTTPException: 401 if not logged in, 404 for an unknown period, 503 if Redis is unavailable
+    """
+    user = get_user_from_cookie(request)
+    if not user:
+        raise HTTPException(status_code=401, detail="User is not logged in")
+
+    when = _board_time(period, day)
+    try:
+        return get_user_rank(period, user["user_id"], radius, when)
+    except REDIS_UNAVAILABLE_ERRORS:
+        raise HTTPException(status_code=503, detail="Leaderboards are temporarily unavailable")
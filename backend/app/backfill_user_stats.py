@@ -0,0 +1,36 @@
+"""
+User Stats Backfill Module
+
+This script rebuilds the user_stats table from the games and user_rounds
+already in the database. New games keep user_stats up to date on their own
+(see app.services.user_stats); this is only needed once after the table is
+created, or to repair the totals after a bug.
+
+Features:
+- Rebuilds every user's games played, total/best score, distance and last played time
+- Only completed games are counted
+- Safe to run multiple times (the table is replaced, not added to)
+
+Dependencies:
+- app.db: Database connection configuration
+- app.services.user_stats: The rebuild query
+
+Usage:
+- From the backend directory: python -m app.backfill_user_stats
+- Run after `alembic upgrade head` has created the user_stats table
+"""
+
+from sqlalchemy.orm import Session
+
+from app.db import engine
+from app.services.user_stats import backfill_user_stats
+
+
+def main():
+    with Session(engine) as db:
+        users = backfill_user_stats(db)
+    print(f"✅ Rebuilt stats for {users} users")
+
+
+if __name__ == "__main__":
+    main()
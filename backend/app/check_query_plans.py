@@ -0,0 +1,179 @@
+"""
+Query Plan Check Module
+
+This script is a regression check for the indexes behind the game hot-path
+queries. It seeds a local PostgreSQL database with a realistic amount of game
+data, runs EXPLAIN on the same queries the services issue, and fails if any of
+them stops using its index (e.g. after a model change or a dropped migration).
+
+Everything happens inside one transaction that is rolled back at the end, so
+the database is left exactly as it was.
+
+Checked queries:
+- user_rounds by round_id (update_user_round)
+- user_rounds aggregated by game_id (game totals)
+- locations by pano_id (get_coords_from_pano_id)
+- a user's games, newest first (games by user_id, started_at)
+
+Dependencies:
+- PostgreSQL: Needs a migrated local database (DB_URL); plans are PostgreSQL-specific
+- SQLAlchemy: Query construction and execution
+- app.db / app.models: Engine and the models the queries are built from
+
+Usage:
+- From the backend directory: python -m app.check_query_plans [--users N] [--games-per-user N]
+- Exits with status 1 if any query does not use the expected index
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.db import engine
+from app.models import Game, Location, UserRound
+
+# Seed data, all with a 'qp_' prefix so it is easy to recognise
+SEED_SQL = text("""
+WITH new_users AS (
+    INSERT INTO users (username, password, email)
+    SELECT 'qp_user_' || n, 'x', 'qp_user_' || n || '@example.invalid'
+    FROM generate_series(1, :users) AS n
+    RETURNING id
+), new_games AS (
+    INSERT INTO games (user_id, started_at, completed_at, total_score, total_distance)
+    SELECT new_users.id, now() - n * interval '1 hour', now() - n * interval '1 hour', 0, 0
+    FROM new_users, generate_series(1, :games_per_user) AS n
+    RETURNING id, user_id
+), new_rounds AS (
+    INSERT INTO rounds (round_number, game_id, location_string)
+    SELECT n, new_games.id, 'qp_location'
+    FROM new_games, generate_series(1, 5) AS n
+    RETURNING id, game_id
+)
+INSERT INTO user_rounds (round_id, user_id, game_id, guess_lat, guess_lng, distance_off, round_score, submitted_at)
+SELECT new_rounds.id, new_games.user_id, new_rounds.game_id, 47.5, -122.3, random() * 100, random() * 5000, now()
+FROM new_rounds JOIN new_games ON new_games.id = new_rounds.game_id
+""")
+
+SEED_LOCATIONS_SQL = text("""
+INSERT INTO locations (latitude, longitude, pano_id)
+SELECT 46 + random() * 3, -124 + random() * 7, 'qp_pano_' || n
+FROM generate_series(1, :locations) AS n
+""")
+
+# Every index on a table with its columns in index order
+TABLE_INDEXES_SQL = text("""
+SELECT index_class.relname, ARRAY(
+    SELECT pg_attribute.attname
+    FROM unnest(pg_index.indkey::int2[]) WITH ORDINALITY AS key(attnum, position)
+    JOIN pg_attribute ON pg_attribute.attrelid = pg_index.indrelid AND pg_attribute.attnum = key.attnum
+    ORDER BY key.position
+)
+FROM pg_index
+JOIN pg_class AS index_class ON index_class.oid = pg_index.indexrelid
+JOIN pg_class AS table_class ON table_class.oid = pg_index.indrelid
+WHERE table_class.relname = :table
+""")
+
+INDEX_NODE_TYPES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def _used_indexes(plan: dict):
+    """Collect the names of every index scanned anywhere in a plan tree"""
+    used = set()
+    if plan.get("Node Type") in INDEX_NODE_TYPES:
+        used.add(plan.get("Index Name"))
+    for child in plan.get("Plans", []):
+        used |= _used_indexes(child)
+    return used
+
+
+def _indexes_led_by(conn, table: str, columns: tuple) -> set:
+    """Names of the indexes on a table whose leading columns are exactly the given ones, in order"""
+    return {
+        name for name, index_columns in conn.execute(TABLE_INDEXES_SQL, {"table": table})
+        if tuple(index_columns[:len(columns)]) == columns
+    }
+
+
+def _explain(conn, statement) -> dict:
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    return conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()[0]["Plan"]
+
+
+def hot_path_queries(conn):
+    """
+    Build the checked queries against ids that exist in the seeded data
+
+    Returns:
+        list[tuple]: (description, statement, table, leading columns of the expected index)
+    """
+    round_id, game_id, user_id = conn.execute(text(
+        "SELECT round_id, game_id, user_id FROM user_rounds WHERE user_id IN "
+        "(SELECT id FROM users WHERE username LIKE 'qp_user_%') ORDER BY id DESC LIMIT 1"
+    )).one()
+
+    return [
+        ("user_rounds by round_id",
+         select(UserRound).where(UserRound.round_id == round_id).limit(1),
+         "user_rounds", ("round_id",)),
+        ("game totals by game_id",
+         select(func.sum(UserRound.round_score), func.sum(UserRound.distance_off)).where(UserRound.game_id == game_id),
+         "user_rounds", ("game_id",)),
+        ("location by pano_id",
+         select(Location.latitude, Location.longitude).where(Location.pano_id == "qp_pano_1"),
+         "locations", ("pano_id",)),
+        ("user's recent games",
+         select(Game).where(Game.user_id == user_id).order_by(Game.started_at.desc()).limit(10),
+         # Any index led by user_id filters, but only (user_id, started_at) serves the ordering
+         "games", ("user_id", "started_at")),
+    ]
+
+
+def run(users: int, games_per_user: int, locations: int) -> bool:
+    """
+    Seed, explain and check every hot-path query
+
+    Returns:
+        bool: True if every query used its index
+    """
+    if engine.dialect.name != "postgresql":
+        print(f"❌ Query plans can only be checked on PostgreSQL (DB_URL uses {engine.dialect.name})")
+        return False
+
+    ok = True
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            conn.execute(SEED_SQL, {"users": users, "games_per_user": games_per_user})
+            conn.execute(SEED_LOCATIONS_SQL, {"locations": locations})
+            conn.execute(text("ANALYZE users, games, rounds, user_rounds, locations"))
+
+            for description, statement, table, columns in hot_path_queries(conn):
+                expected = _indexes_led_by(conn, table, columns)
+                used = _used_indexes(_explain(conn, statement))
+                if expected & used:
+                    print(f"✅ {description}: {', '.join(sorted(expected & used))}")
+                else:
+                    ok = False
+                    print(f"❌ {description}: expected one of {sorted(expected) or 'no index exists'}, "
+                          f"plan used {sorted(used) or 'no index'}")
+        finally:
+            transaction.rollback()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the game hot-path queries use their indexes")
+    parser.add_argument("--users", type=int, default=2000, help="Users to seed")
+    parser.add_argument("--games-per-user", type=int, default=10, help="Games (of 5 rounds) to seed per user")
+    parser.add_argument("--locations", type=int, default=20000, help="Locations to seed")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.users, args.games_per_user, args.locations) else 1)
+
+
+if __name__ == "__main__":
+    main()
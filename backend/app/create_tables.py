@@ -25,7 +25,7 @@ from app.models import auth_models, game_models  # Import all models to register
 
 # Explicitly define creation order to ensure dependencies are created first
 from app.models.auth_models import User
-from app.models.game_models import Location, Game, Round, UserRound
+from app.models.game_models import Location, Game, Round, UserRound, UserStats
 
 # Create all tables defined in the models
 Base.metadata.create_all(bind=engine)  # Creates tables if they don't exist
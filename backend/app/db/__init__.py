@@ -6,14 +6,15 @@ It centralizes database access through SQLAlchemy ORM tools.
 
 Features:
 - Connection management through engine configuration
-- Session dependency for FastAPI dependency injection
+- Session dependencies (sync and async) for FastAPI dependency injection
 - Base class for declarative model definitions
+- Connection pool usage reporting
 
 The exported components (get_db, Base, engine) are used throughout the application
 to maintain a consistent database access pattern.
 """
 
-from app.db.db import get_db, Base, engine
+from app.db.db import get_db, get_async_db, Base, engine, async_engine, get_pool_status
 
 # Export essential database components
-__all__ = ["get_db", "Base", "engine"]
+__all__ = ["get_db", "get_async_db", "Base", "engine", "async_engine", "get_pool_status"]
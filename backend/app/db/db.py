@@ -6,20 +6,33 @@ It provides the SQLAlchemy engine, session, and base classes needed for database
 
 Features:
 - Environment-based configuration using dotenv
-- SQLAlchemy engine setup
+- SQLAlchemy engine setup with a configurable connection pool
+  (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT, DB_POOL_PRE_PING);
+  the sizing settings only apply to queue pools, so e.g. in-memory SQLite still works
+- Pool usage reporting per worker process
+- Async engine and session dependency (asyncpg, or aiosqlite for SQLite) for async route handlers
 - Session management with automatic cleanup
 - Base declarative class for ORM models
 
 Dependencies:
 - SQLAlchemy: ORM and database toolkit
+- asyncpg: Async PostgreSQL driver
+- aiosqlite: Async SQLite driver (optional, for SQLite dev databases)
 - python-dotenv: For loading environment variables
 """
 
+import logging
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
 
 # Create base class for declarative models
 Base = declarative_base()
@@ -30,13 +43,112 @@ load_dotenv()
 # Get database connection string from environment
 DB_URL = os.getenv('DB_URL')
 
-# Create SQLAlchemy engine with connection string
-engine = create_engine(DB_URL)
+# Connection pool settings (per worker process)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+
+
+def _pool_options(url):
+    """
+    Pool arguments for an engine on `url`
+
+    pool_size, max_overflow and pool_timeout only exist on queue pools; other
+    pools (SingletonThreadPool / StaticPool for in-memory SQLite) reject them.
+    """
+    options = {"pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": DB_POOL_PRE_PING}
+    url = make_url(url)
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+# Create SQLAlchemy engine with connection string and pool configuration
+engine = create_engine(DB_URL, **_pool_options(DB_URL))
 
 # Create session factory bound to the engine
 Session = sessionmaker(bind=engine)
 
 
+# Sync driver prefixes and the async driver each one maps to
+_ASYNC_DRIVERS = {
+    'postgresql+psycopg2://': 'postgresql+asyncpg://',
+    'postgresql://': 'postgresql+asyncpg://',
+    'postgres://': 'postgresql+asyncpg://',
+    'sqlite://': 'sqlite+aiosqlite://',
+}
+
+
+def _to_async_url(url: str):
+    """Point a connection string at the matching async driver (asyncpg, or aiosqlite for SQLite)"""
+    for prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if url and url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+# Async engine for async route handlers; defaults to DB_URL on the matching async driver
+ASYNC_DB_URL = os.getenv('ASYNC_DB_URL') or _to_async_url(DB_URL)
+
+# Scripts and the sync code paths must keep working when no async driver is installed
+# (e.g. a SQLite dev database without aiosqlite), so a missing driver only disables async sessions
+try:
+    async_engine = create_async_engine(ASYNC_DB_URL, **_pool_options(ASYNC_DB_URL))
+except (ImportError, InvalidRequestError) as e:
+    logger.warning("Async database engine disabled for %s: %s", ASYNC_DB_URL, e)
+    async_engine = None
+
+# Objects stay usable after commit, so async code never triggers an implicit refresh
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False) if async_engine is not None else None
+
+
+def get_pool_status():
+    """
+    Report connection pool usage for this worker process
+
+    Used to size the pool against measured load; every gunicorn worker has
+    its own pool, so the process id is included.
+
+    Returns:
+        dict: Pool configuration and current checked-out/idle connection counts,
+              with the async engine's pool reported under 'async' (None when disabled).
+              Counts are None for pools that aren't queue pools
+    """
+    pool = engine.pool
+    queued = isinstance(pool, QueuePool)
+    status = {
+        "pid": os.getpid(),
+        "pool_size": pool.size() if queued else None,
+        "max_overflow": DB_MAX_OVERFLOW if queued else None,
+        "checked_out": pool.checkedout() if queued else None,
+        "idle": pool.checkedin() if queued else None,
+        "overflow": pool.overflow() if queued else None,
+        "async": None,
+    }
+    if async_engine is not None:
+        async_pool = async_engine.pool
+        async_queued = isinstance(async_pool, QueuePool)
+        status["async"] = {
+            "checked_out": async_pool.checkedout() if async_queued else None,
+            "idle": async_pool.checkedin() if async_queued else None,
+            "overflow": async_pool.overflow() if async_queued else None,
+        }
+    return status
+
+
+def _log_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    # Building the status reads both pools, so skip it entirely unless it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("DB pool checkout: %s", get_pool_status())
+
+
+# Log pool usage on every checkout when debug logging is enabled for this module
+event.listen(engine, "checkout", _log_pool_checkout)
+
+
 def get_db():
     """
     Dependency function that provides a database session
@@ -54,3 +166,22 @@ def get_db():
     finally:
         # Ensure connection is closed even if an exception occurs
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency function that provides an async database session
+
+    Async counterpart of get_db for `async def` route handlers, so database
+    calls are awaited instead of blocking the event loop.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session object
+
+    Raises:
+        RuntimeError: If no async driver is available for ASYNC_DB_URL
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError(f"No async database driver available for {ASYNC_DB_URL}")
+    async with AsyncSessionLocal() as db:
+        yield db
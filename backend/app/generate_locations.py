@@ -1,82 +1,441 @@
+"""
+Location Generation Module
+
+This script fills the locations table from the OSM points in the bundled GeoJSON
+file: each point is looked up against the Street View metadata endpoint and, if
+a panorama exists nearby, stored as a playable location.
+
+Pipeline:
+1. Stream the points from the GeoJSON file (memory stays flat, lookups start
+   as soon as the first batch has been read)
+2. Thin the points to a minimum spacing and drop duplicates, so points that
+   would resolve to the same panorama cost a single lookup
+3. Look up Street View metadata for a batch of points concurrently, with a
+   token-bucket limit on the request rate
+4. Insert the batch in one INSERT ... ON CONFLICT (pano_id) DO NOTHING
+5. Record progress in a checkpoint file, so an interrupted run resumes after
+   the last committed batch. Points whose lookup failed after every retry are
+   listed in the checkpoint and looked up again by the next run
+
+Features:
+- Spatial thinning of candidate points before any network call
+- Bounded concurrency and rate limiting for the metadata requests
+- Batched, idempotent inserts (re-running never duplicates a panorama)
+- Resumable checkpoints that keep failed lookups for a retry
+- Pluggable metadata source: the live Google API, or a recorded fixture so the
+  pipeline can run offline (a live run can record one with --record)
+
+Dependencies:
+- requests: Street View metadata API calls
+- SQLAlchemy: Batched inserts
+- app.db: Database connection configuration
+- app.models: Location model
+- app.services.geojson_reader: Streaming GeoJSON parsing
+- app.services.point_thinning: Minimum-spacing filter
+
+Usage:
+- From the backend directory: python -m app.generate_locations [options]
+- python -m app.generate_locations --source recorded --fixture metadata.json
+  replays recorded responses instead of calling Google
+"""
+
+import argparse
+import itertools
 import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import os
 from dotenv import load_dotenv
-from sqlalchemy.exc import IntegrityError
+from requests.adapters import HTTPAdapter
+from sqlalchemy.dialects import postgresql, sqlite
 
-from db import get_db
-from models import Location  # your SQLAlchemy model
+from app.db import get_db
+from app.models import Location
+from app.services.geojson_reader import iter_geojson_points
+from app.services.point_thinning import thin_points
 
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-GEOJSON_PATH = "geoguessr-wa-locations.geojson"
-SLEEP_SECONDS = 0.2
+STREETVIEW_METADATA_URL = "https://maps.googleapis.com/maps/api/streetview/metadata"
+GEOJSON_PATH = os.path.join(os.path.dirname(__file__), "geoguessr-wa-locations.geojson")
+CHECKPOINT_PATH = "generate_locations.checkpoint.json"
 
+# Pipeline defaults (all overridable from the command line)
+WORKERS = 8
+REQUESTS_PER_SECOND = 20
+BATCH_SIZE = 200
+# The metadata lookup searches 50 m around a point, so points closer than ~100 m
+# usually resolve to the same panorama
+MIN_SPACING_METERS = 100
+REQUEST_TIMEOUT_SECONDS = 5
+REQUEST_RETRIES = 3
 
-def get_pano_id(lat, lng):
-    url = f"https://maps.googleapis.com/maps/api/streetview/metadata?location={lat},{lng}&radius=50&key={GOOGLE_API_KEY}"
-    try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        if data.get("status") == "OK":
-            return {
-                "lat": data["location"]["lat"],
-                "lng": data["location"]["lng"],
-                "pano_id": data["pano_id"]
-            }
-    except Exception as e:
-        print(f"⚠️ Error for ({lat}, {lng}): {e}")
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one, waiting if none are left.
+
+    Attributes:
+        rate (float): Tokens added per second
+        capacity (float): Maximum burst size
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, blocking until one is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# ============================================================================
+# METADATA SOURCES
+# ============================================================================
+
+def _coord_key(lat: float, lng: float) -> str:
+    """Key identifying a lookup in a recorded fixture"""
+    return f"{lat:.7f},{lng:.7f}"
+
+
+class MetadataLookupError(Exception):
+    """A metadata lookup failed after every retry (as opposed to finding no panorama)"""
+
+
+def _parse_metadata(data: dict):
+    """Turn a Street View metadata response into a location row (or None)"""
+    if data and data.get("status") == "OK":
+        return {
+            "lat": data["location"]["lat"],
+            "lng": data["location"]["lng"],
+            "pano_id": data["pano_id"]
+        }
     return None
 
 
+class GoogleStreetViewSource:
+    """
+    Street View metadata from the live Google API
+
+    Attributes:
+        api_key (str): Google Maps API key
+        rate_limiter (TokenBucket): Limits the request rate across all worker threads
+    """
+
+    def __init__(self, api_key: str, rate_limiter: TokenBucket, pool_size: int = WORKERS):
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def fetch(self, lat: float, lng: float):
+        """
+        Fetch the raw metadata response for a point
+
+        Retries transient failures (network errors, 5xx, rate limiting) with backoff.
+
+        Returns:
+            dict: Metadata response
+
+        Raises:
+            MetadataLookupError: If every attempt failed
+        """
+        params = {"location": f"{lat},{lng}", "radius": 50, "key": self.api_key}
+        for attempt in range(REQUEST_RETRIES):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(STREETVIEW_METADATA_URL, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise requests.HTTPError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == REQUEST_RETRIES - 1:
+                    print(f"⚠️ Error for ({lat}, {lng}): {e}")
+                    raise MetadataLookupError(f"({lat}, {lng}): {e}") from e
+                time.sleep(0.5 * 2 ** attempt)
+
+    def get_pano(self, lat: float, lng: float):
+        """
+        Look up the panorama nearest to a point
+
+        Returns:
+            dict: {'lat', 'lng', 'pano_id'} of the panorama, or None if there is none
+
+        Raises:
+            MetadataLookupError: If the lookup failed after every retry
+        """
+        return _parse_metadata(self.fetch(lat, lng))
+
+
+class RecordedMetadataSource:
+    """
+    Street View metadata replayed from a recorded fixture
+
+    The fixture is a JSON object mapping "lat,lng" (7 decimal places) to the
+    metadata response recorded for that point. Points missing from the fixture
+    have no panorama.
+    """
+
+    def __init__(self, fixture_path: str):
+        with open(fixture_path, "r", encoding="utf-8") as f:
+            self.responses = json.load(f)
+
+    def get_pano(self, lat: float, lng: float):
+        """Look up the recorded panorama for a point (see GoogleStreetViewSource.get_pano)"""
+        return _parse_metadata(self.responses.get(_coord_key(lat, lng)))
+
+
+class RecordingSource:
+    """
+    Wraps the live source and records every response to a fixture file
+
+    Call save() when done; the fixture can then be replayed with RecordedMetadataSource.
+    """
+
+    def __init__(self, source: GoogleStreetViewSource, fixture_path: str):
+        self.source = source
+        self.fixture_path = fixture_path
+        self.responses = {}
+        if os.path.exists(fixture_path):
+            with open(fixture_path, "r", encoding="utf-8") as f:
+                self.responses = json.load(f)
+        self._lock = threading.Lock()
+
+    def get_pano(self, lat: float, lng: float):
+        # Failed lookups raise before anything is recorded, so they are retried rather than replayed as "no panorama"
+        data = self.source.fetch(lat, lng)
+        with self._lock:
+            self.responses[_coord_key(lat, lng)] = data
+        return _parse_metadata(data)
+
+    def save(self):
+        """Write the recorded responses to the fixture file"""
+        with self._lock:
+            _write_json_atomically(self.fixture_path, self.responses)
+
+
+# ============================================================================
+# INPUT, CHECKPOINTS AND STORAGE
+# ============================================================================
+
 def extract_coords_from_geojson(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    """Lazily yield {'lat', 'lng'} for every point feature in the file"""
+    for lat, lng, _ in iter_geojson_points(filepath):
+        yield {"lat": lat, "lng": lng}
+
+
+def _write_json_atomically(path: str, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str, geojson_path: str, min_spacing_m: float):
+    """
+    Read how far a previous run got through the (thinned) input points
+
+    A checkpoint written for a different input file or spacing is ignored, since
+    its point numbering doesn't apply.
+
+    Returns:
+        tuple: (index of the first point not yet processed, sorted indices of
+            earlier points whose lookup failed and must be retried)
+    """
+    if not os.path.exists(path):
+        return 0, []
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("geojson") != os.path.abspath(geojson_path) or checkpoint.get("min_spacing_m") != min_spacing_m:
+        return 0, []
+    return checkpoint.get("next_index", 0), checkpoint.get("failed_indices", [])
+
+
+def save_checkpoint(path: str, geojson_path: str, min_spacing_m: float, next_index: int, failed_indices=()):
+    """Record that every (thinned) point before `next_index` has been processed and committed, except `failed_indices`"""
+    _write_json_atomically(path, {
+        "geojson": os.path.abspath(geojson_path),
+        "min_spacing_m": min_spacing_m,
+        "next_index": next_index,
+        "failed_indices": sorted(failed_indices),
+    })
+
+
+def insert_locations(db, rows):
+    """
+    Insert a batch of locations, skipping panoramas that are already stored
 
-    return [
-        {"lat": feature["geometry"]["coordinates"][1],
-         "lng": feature["geometry"]["coordinates"][0]}
-        for feature in data["features"]
-    ]
+    Args:
+        db (Session): Database session
+        rows (list[dict]): Rows with 'lat', 'lng' and 'pano_id'
 
+    Returns:
+        int: Number of rows actually inserted
+    """
+    # Several points can snap to the same panorama; keep the first
+    unique_rows = {}
+    for row in rows:
+        unique_rows.setdefault(row["pano_id"], row)
+    if not unique_rows:
+        return 0
 
-def insert_location(db, lat, lng, pano_id):
-    location = Location(latitude=lat, longitude=lng, pano_id=pano_id)
-    db.add(location)
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(Location).values([
+        {"latitude": row["lat"], "longitude": row["lng"], "pano_id": row["pano_id"]}
+        for row in unique_rows.values()
+    ]).on_conflict_do_nothing(index_elements=["pano_id"])
+
+    result = db.execute(statement)
+    db.commit()
+    return result.rowcount
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def _points_to_process(coords, start_index: int, retry_indices: set):
+    """Number the thinned points and keep those still to do: earlier failures first, then everything from start_index"""
+    for index, coord in enumerate(coords):
+        if index >= start_index or index in retry_indices:
+            yield index, coord
+
+
+def _lookup(source, coord):
+    """Look up one point; returns (row or None, whether the lookup failed)"""
     try:
-        db.commit()
-        print(f"✅ Inserted pano_id {pano_id} at ({lat}, {lng})")
-    except IntegrityError:
-        db.rollback()
-        print(f"⚠️ Duplicate pano_id {pano_id}, skipped")
+        return source.get_pano(coord["lat"], coord["lng"]), False
+    except MetadataLookupError:
+        return None, True
+
+
+def run(source, geojson_path: str = GEOJSON_PATH, checkpoint_path: str = CHECKPOINT_PATH,
+        workers: int = WORKERS, batch_size: int = BATCH_SIZE, min_spacing_m: float = MIN_SPACING_METERS):
+    """
+    Run the ingestion pipeline
+
+    Args:
+        source: Metadata source with a get_pano(lat, lng) method, raising
+            MetadataLookupError when a lookup fails
+        geojson_path (str): Input GeoJSON file
+        checkpoint_path (str): Checkpoint file used to resume interrupted runs
+        workers (int): Concurrent metadata lookups
+        batch_size (int): Points looked up and inserted per batch
+        min_spacing_m (float): Minimum distance between looked-up points, in meters
 
+    Returns:
+        dict: Counts of 'processed', 'found', 'inserted' and 'failed' points for this run
+    """
+    next_index, retry_indices = load_checkpoint(checkpoint_path, geojson_path, min_spacing_m)
+    failed_indices = set(retry_indices)
+    if next_index:
+        print(f"↩️ Resuming at point {next_index}, retrying {len(failed_indices)} failed lookups")
+    coords = thin_points(extract_coords_from_geojson(geojson_path), min_spacing_m)
+    points = _points_to_process(coords, next_index, failed_indices.copy())
 
-def run():
-    coords = extract_coords_from_geojson(GEOJSON_PATH)
+    stats = {"processed": 0, "found": 0, "inserted": 0, "failed": 0}
 
     # ✅ Extract the session from the generator
     db_gen = get_db()
     db = next(db_gen)
 
-    for coord in coords:
-        result = get_pano_id(coord["lat"], coord["lng"])
-        if result:
-            insert_location(db, result["lat"], result["lng"], result["pano_id"])
-        else:
-            print(f"❌ No pano for ({coord['lat']}, {coord['lng']})")
-        time.sleep(SLEEP_SECONDS)
-
-    # ✅ Close the session generator
     try:
-        db_gen.close()
-    except Exception:
-        pass
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = list(itertools.islice(points, batch_size))
+                if not batch:
+                    break
+                results = list(executor.map(lambda point: _lookup(source, point[1]), batch))
+                rows = [row for row, _ in results if row]
+
+                inserted = insert_locations(db, rows)
+                for (index, _), (_, failed) in zip(batch, results):
+                    if failed:
+                        failed_indices.add(index)
+                    else:
+                        failed_indices.discard(index)
+                next_index = max(next_index, batch[-1][0] + 1)
+                save_checkpoint(checkpoint_path, geojson_path, min_spacing_m, next_index, failed_indices)
+
+                batch_failed = sum(failed for _, failed in results)
+                stats["processed"] += len(batch)
+                stats["found"] += len(rows)
+                stats["inserted"] += inserted
+                stats["failed"] += batch_failed
+                print(f"✅ Points {batch[0][0]}-{batch[-1][0]}: "
+                      f"{len(rows)} panoramas, {inserted} new, {batch_failed} failed")
+    finally:
+        # ✅ Close the session generator
+        try:
+            db_gen.close()
+        except Exception:
+            pass
+
+    if failed_indices:
+        print(f"⚠️ {len(failed_indices)} lookups failed; run again to retry them")
+    print(f"✅ Done. {stats}")
+    return stats
+
 
-    print("✅ Done.")
+def main():
+    parser = argparse.ArgumentParser(description="Fill the locations table from Street View metadata")
+    parser.add_argument("--geojson", default=GEOJSON_PATH, help="Input GeoJSON file")
+    parser.add_argument("--source", choices=["google", "recorded"], default="google", help="Metadata source")
+    parser.add_argument("--fixture", help="Recorded metadata fixture (required with --source recorded)")
+    parser.add_argument("--record", help="Record live responses to this fixture file")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Checkpoint file")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Concurrent metadata lookups")
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="Maximum metadata requests per second")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Points per insert batch")
+    parser.add_argument("--min-spacing-m", type=float, default=MIN_SPACING_METERS,
+                        help="Minimum distance between looked-up points in meters (0 only drops duplicates)")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    if args.source == "recorded":
+        if not args.fixture:
+            parser.error("--fixture is required with --source recorded")
+        source = RecordedMetadataSource(args.fixture)
+    else:
+        if not GOOGLE_API_KEY:
+            parser.error("GOOGLE_API_KEY is not set")
+        source = GoogleStreetViewSource(GOOGLE_API_KEY, TokenBucket(args.rate), pool_size=args.workers)
+        if args.record:
+            source = RecordingSource(source, args.record)
+
+    try:
+        run(source, args.geojson, args.checkpoint, args.workers, args.batch_size, args.min_spacing_m)
+    finally:
+        if isinstance(source, RecordingSource):
+            source.save()
 
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -9,6 +9,9 @@ The module sets up:
 - CORS middleware configuration
 - API router inclusion
 - Base endpoint for health checks
+- Connection pool status endpoint (off unless DB_POOL_STATUS_ENABLED is set, and login required)
+- Startup loading of the in-memory location index and offline geocoder
+- Background game deck producer
 
 Dependencies:
 - FastAPI: Web framework for building APIs
@@ -18,7 +21,11 @@ Dependencies:
 - PostgreSQL: Database for persistent storage (via imported modules)
 """
 
-from fastapi import FastAPI, Body, Query, Request, Response
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Body, HTTPException, Query, Request, Response
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -28,15 +35,54 @@ from geopy.geocoders import Nominatim
 import random
 import requests
 from app.api import api_router
+from app.db import get_pool_status, async_engine
+from app.services.authentication import get_user_from_cookie
+from app.services.location_index import warm_location_index
+from app.services.location import GEOCODER_BACKEND
+from app.services.offline_geocoder import offline_geocoder
+from app.services.game_deck import run_game_deck_producer, GAME_DECK_DEPTH
+from app.services.redis_client import close_async_redis_clients
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import re
 
+logger = logging.getLogger(__name__)
+
 limiter = Limiter(key_func=get_remote_address)
 
+# Pool internals are for operators only; the endpoint is hidden unless explicitly enabled
+DB_POOL_STATUS_ENABLED = os.getenv("DB_POOL_STATUS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup/shutdown hook
+
+    Loads the in-memory location index (and the offline geocoder, when it is
+    the configured backend) before the first request is served, and runs the
+    game deck producer for the lifetime of the app.
+    """
+    warm_location_index()
+    if GEOCODER_BACKEND == "offline":
+        try:
+            offline_geocoder.ensure_loaded()
+        except Exception as e:
+            # Lookups will fall back to Nominatim
+            logger.warning("Could not load offline geocoder: %s", e)
+
+    # Keep prebuilt game decks topped up in the background
+    deck_producer = asyncio.create_task(run_game_deck_producer()) if GAME_DECK_DEPTH > 0 else None
+    yield
+    if deck_producer:
+        deck_producer.cancel()
+    if async_engine is not None:
+        await async_engine.dispose()
+    await close_async_redis_clients()
+
+
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -93,4 +139,27 @@ def root():
     Returns:
         dict: Simple message indicating the API is operational
     """
-    return {"message": "updated message"}
\ No newline at end of file
+    return {"message": "updated message"}
+
+
+@app.get("/health/db-pool")
+def db_pool_health(request: Request):
+    """
+    Read-only view of this worker's database connection pool
+
+    Only served when DB_POOL_STATUS_ENABLED is set, and only to logged-in users.
+
+    Args:
+        request (Request): HTTP request object (contains cookies)
+
+    Returns:
+        dict: Pool size plus checked-out, idle and overflow connection counts
+
+    Raises:
+        HTTPException: 404 if the endpoint is disabled, 401 if user is not authenticated
+    """
+    if not DB_POOL_STATUS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not get_user_from_cookie(request):
+        raise HTTPException(status_code=401, detail="User is not logged in")
+    return get_pool_status()
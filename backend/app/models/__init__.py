@@ -6,14 +6,14 @@ It provides the database schema structure through class-based models.
 
 Modules:
 - auth_models: User authentication related models
-- game_models: Game mechanics related models (locations, games, rounds, etc.)
+- game_models: Game mechanics related models (locations, games, rounds, player stats, etc.)
 
 The models defined here are used throughout the application for database operations
 and establish relationships between different data entities.
 """
 
-from app.models.game_models import Location, Round, Game, UserRound
+from app.models.game_models import Location, Round, Game, UserRound, UserStats
 from app.models.auth_models import User
 
 # Export all model classes for easy imports elsewhere in the application
-__all__ = ["Location", "Round", "Game", "User", "UserRound"]
+__all__ = ["Location", "Round", "Game", "User", "UserRound", "UserStats"]
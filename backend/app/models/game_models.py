@@ -9,13 +9,14 @@ Model Structure:
 - Game: Tracks overall game sessions
 - Round: Represents individual rounds within a game
 - UserRound: Records user guesses and scores for each round
+- UserStats: Lifetime totals per user, kept up to date as games finish
 
 Dependencies:
 - SQLAlchemy: For ORM model definitions
 - app.db.Base: Base declarative class from database module
 """
 
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, Date, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db import Base
@@ -32,6 +33,7 @@ class Location(Base):
         latitude (float): Geographical latitude
         longitude (float): Geographical longitude
         pano_id (str): Google Street View panorama ID
+        address (str): Reverse-geocoded address, computed once and reused
 
     Relationships:
         round: One-to-one relationship with Round model
@@ -42,6 +44,7 @@ class Location(Base):
     latitude = Column(Float)
     longitude = Column(Float)
     pano_id = Column(Text, unique=True, nullable=False)
+    address = Column(Text)
 
 
 class Game(Base):
@@ -59,12 +62,20 @@ class Game(Base):
         total_score (float): Cumulative score across all rounds
         total_distance (float): Cumulative distance off across all rounds
         locations (JSON): JSON data storing all locations used in this game
+        mode (str): 'classic' (random locations) or 'daily' (the shared daily challenge)
+        challenge_date (date): Day of the daily challenge played (null for classic games)
 
     Relationships:
         rounds: One-to-many relationship with Round model
         user: Many-to-one relationship with User model
     """
     __tablename__ = 'games'
+    __table_args__ = (
+        # A user's games, newest first
+        Index('ix_games_user_id_started_at', 'user_id', 'started_at'),
+        # One attempt per user at each daily challenge (NULLs, i.e. classic games, never collide)
+        Index('uq_games_user_id_challenge_date', 'user_id', 'challenge_date', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -73,6 +84,8 @@ class Game(Base):
     total_score = Column(Float)
     total_distance = Column(Float)
     locations = Column(JSON)
+    mode = Column(String, nullable=False, default='classic', server_default='classic')
+    challenge_date = Column(Date)
     user_round = relationship('UserRound', back_populates='game')
     round = relationship('Round', back_populates='game')
     user = relationship('User', back_populates='game')
@@ -131,9 +144,9 @@ class UserRound(Base):
     __tablename__ = 'user_rounds'
 
     id = Column(Integer, primary_key=True)
-    round_id = Column(Integer, ForeignKey('rounds.id'))
+    round_id = Column(Integer, ForeignKey('rounds.id'), index=True)
     user_id = Column(Integer, ForeignKey('users.id'))
-    game_id = Column(Integer, ForeignKey('games.id'))
+    game_id = Column(Integer, ForeignKey('games.id'), index=True)
     guess_lat = Column(Float)
     guess_lng = Column(Float)
     distance_off = Column(Float)
@@ -143,3 +156,30 @@ class UserRound(Base):
     round = relationship('Round', back_populates='user_round')
     game = relationship('Game', back_populates='user_round')
 
+
+class UserStats(Base):
+    """
+    Per-user lifetime statistics
+
+    Denormalized totals so a player's profile can be read with a single primary
+    key lookup instead of aggregating games and user_rounds. A row is created or
+    incremented when a game is finalized (see app.services.user_stats).
+
+    Attributes:
+        user_id (int): Primary key, the user these stats belong to
+        games_played (int): Number of finished games
+        total_score (float): Sum of the scores of all finished games
+        best_score (float): Highest score of a single game
+        total_distance (float): Sum of the distance off (km) of all scored rounds
+        rounds_played (int): Number of scored rounds
+        last_played_at (datetime): When the most recent game was finished
+    """
+    __tablename__ = 'user_stats'
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0)
+    total_score = Column(Float, nullable=False, default=0)
+    best_score = Column(Float, nullable=False, default=0)
+    total_distance = Column(Float, nullable=False, default=0)
+    rounds_played = Column(Integer, nullable=False, default=0)
+    last_played_at = Column(DateTime)
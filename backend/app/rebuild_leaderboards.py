@@ -0,0 +1,43 @@
+"""
+Leaderboard Rebuild Module
+
+This script recreates the Redis leaderboards from the completed games in
+PostgreSQL. The leaderboards are normally kept up to date as games finish
+(see app.services.leaderboard); this is the recovery path after Redis has lost
+its data or missed updates while it was unavailable.
+
+Features:
+- Rebuilds the global board and every daily/weekly/challenge board still within retention
+- Each board is swapped in atomically, so the API keeps serving while it runs
+- Safe to run multiple times
+
+Dependencies:
+- app.db: Database connection configuration
+- Redis: Must be reachable (REDIS_URL)
+- app.services.leaderboard: The rebuild logic
+
+Usage:
+- From the backend directory: python -m app.rebuild_leaderboards
+"""
+
+import sys
+
+from sqlalchemy.orm import Session
+
+from app.db import engine
+from app.services.leaderboard import rebuild_leaderboards
+from app.services.redis_client import redis_client
+
+
+def main():
+    if redis_client is None:
+        print("❌ Redis is not configured, nothing to rebuild")
+        sys.exit(1)
+
+    with Session(engine) as db:
+        rebuilt = rebuild_leaderboards(db)
+    print(f"✅ Rebuilt {rebuilt['global']} global, {rebuilt['daily']} daily, {rebuilt['weekly']} weekly and {rebuilt['challenge']} challenge leaderboards")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,30 +7,83 @@ It provides reusable functions that implement the core functionality of the appl
 Modules:
 - authentication: User authentication and account management
 - game: Game session and round management
+- game_deck: Prebuilt game decks kept ready in Redis
+- daily_challenge: Shared, precomputed location set of the daily challenge
+- game_session: Redis storage of in-progress game sessions
+- session_codec: Compact, versioned game session encoding
 - location: Geographic calculations and location data handling
-- redis_client: Redis caching client configuration
+- location_index: In-memory index of playable locations
+- offline_geocoder: Local reverse geocoder over bundled OSM data
+- geojson_reader: Streaming reader for large GeoJSON files
+- point_thinning: Minimum-spacing filter for candidate points
+- redis_client: Redis client configuration (sync and asyncio)
+- scoring: Vectorized distance and score computation for batches of guesses, and single-guess versions
+- user_stats: Incrementally maintained lifetime stats per player
+- leaderboard: Global, daily and weekly leaderboards in Redis sorted sets
 
 These services are used by the API routes to implement the application's functionality
 while keeping the route handlers clean and focused on HTTP concerns.
 """
 
 # Import all service functions for easy access from the services package
-from app.services.location import get_address_from_coordinates, get_random_pano_id, haversine_formula, get_coords_from_pano_id
-from app.services.authentication import hash_password, verify_password, create_access_token, verify_token, create_user, get_user_from_cookie
-from app.services.redis_client import redis_client
-from app.services.game import create_new_game, create_round, create_user_round, get_score, update_user_round, get_total_score, get_total_distance_off, update_game
+from app.services.location import get_address_from_coordinates, get_random_pano_id, haversine_formula, get_coords_from_pano_id, sample_locations, get_location_addresses, \
+    get_location_addresses_async, get_address_from_coordinates_async, get_addresses_from_coordinates_async, \
+    sample_locations_async
+from app.services.location_index import location_index
+from app.services.authentication import hash_password, verify_password, create_access_token, verify_token, create_user, get_user_from_cookie, \
+    hash_password_async, verify_password_async
+from app.services.redis_client import redis_client, redis_binary_client, async_redis_client, async_redis_binary_client
+from app.services.game import create_new_game, create_round, create_user_round, get_score, update_user_round, get_total_score, get_total_distance_off, finalize_game, \
+    create_game_with_first_round, create_round_with_user_round, create_new_game_async, create_game_with_first_round_async, \
+    create_round_with_user_round_async, create_round_async, create_user_round_async, update_user_round_async, \
+    get_total_score_async, get_total_distance_off_async
+from app.services.game_deck import build_game_deck, pop_game_deck, pop_game_deck_async, top_up_game_decks
+from app.services.daily_challenge import daily_challenge_key, build_daily_challenge_async, get_daily_challenge_async
+from app.services.game_session import game_session_key, load_game_session, save_game_session, delete_game_session, \
+    record_guess, set_active_round, acquire_guess_lock, release_guess_lock, get_round_result, \
+    load_game_session_async, save_game_session_async, set_active_round_async, delete_game_session_async
+from app.services.scoring import haversine_distances, score_distances, score_guesses, haversine_distance, score_distance
+from app.services.geojson_reader import iter_geojson_features, iter_geojson_points
+from app.services.point_thinning import thin_points
+from app.services.user_stats import record_finished_game, get_user_stats, backfill_user_stats
+from app.services.leaderboard import leaderboard_key, record_game_score, get_leaderboard, get_user_rank, rebuild_leaderboards
 from app.services.limiter import limiter
 # Export all service functions for easy imports elsewhere in the application
 __all__ = [
     # Location services
-    "get_address_from_coordinates", "get_random_pano_id", "haversine_formula", "get_coords_from_pano_id",
+    "get_address_from_coordinates", "get_random_pano_id", "haversine_formula", "get_coords_from_pano_id", "sample_locations",
+    "get_location_addresses", "get_location_addresses_async", "get_address_from_coordinates_async",
+    "get_addresses_from_coordinates_async", "sample_locations_async",
+    "location_index",
     # Authentication services
     "create_access_token", "verify_token", "verify_password", "hash_password", "create_user", "get_user_from_cookie",
+    "hash_password_async", "verify_password_async",
     # Redis client
-    "redis_client",
+    "redis_client", "redis_binary_client", "async_redis_client", "async_redis_binary_client",
     # Game services
     "create_new_game", "create_round", "create_user_round", "get_score", "update_user_round", "get_total_score",
-    "get_total_distance_off", "update_game",
+    "get_total_distance_off", "finalize_game", "create_game_with_first_round", "create_round_with_user_round",
+    "create_new_game_async", "create_game_with_first_round_async", "create_round_with_user_round_async",
+    "create_round_async", "create_user_round_async", "update_user_round_async", "get_total_score_async",
+    "get_total_distance_off_async",
+    # Game sessions
+    "game_session_key", "load_game_session", "save_game_session", "delete_game_session",
+    "record_guess", "set_active_round", "acquire_guess_lock", "release_guess_lock", "get_round_result",
+    "load_game_session_async", "save_game_session_async", "set_active_round_async", "delete_game_session_async",
+    # Game decks
+    "build_game_deck", "pop_game_deck", "pop_game_deck_async", "top_up_game_decks",
+    # Daily challenge
+    "daily_challenge_key", "build_daily_challenge_async", "get_daily_challenge_async",
+    # Scoring
+    "haversine_distances", "score_distances", "score_guesses", "haversine_distance", "score_distance",
+    # GeoJSON streaming
+    "iter_geojson_features", "iter_geojson_points",
+    # Point thinning
+    "thin_points",
+    # User stats
+    "record_finished_game", "get_user_stats", "backfill_user_stats",
+    # Leaderboards
+    "leaderboard_key", "record_game_score", "get_leaderboard", "get_user_rank", "rebuild_leaderboards",
     
     #Limiter 
     "limiter"
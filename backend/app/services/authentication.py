@@ -5,8 +5,9 @@ This module provides authentication-related services for the GeoGuessr-WA applic
 It handles token generation, password hashing, and user management functions.
 
 Features:
-- JWT token creation and verification
-- Secure password hashing with PBKDF2
+- JWT token creation and verification, with an LRU/TTL cache of verified tokens
+- Secure password hashing with PBKDF2, offloaded to a bounded worker pool
+- Transparent rehashing when the PBKDF2 work factor changes
 - User authentication via cookies
 - User registration and credential verification
 
@@ -18,17 +19,46 @@ Dependencies:
 """
 
 from jose import jwt, JWTError
+import asyncio
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from passlib.hash import pbkdf2_sha256
 from app.db import get_db
 from app.models import User
+from app.services.cache import TTLCache
 from fastapi import HTTPException, Depends, Request
 from datetime import datetime, timedelta, timezone
 
+logger = logging.getLogger(__name__)
+
 # Load secret key from environment variables
 SECRET_KEY = str(os.getenv("SECRET_KEY"))
 
+# Cache of verified token -> payload, so repeat requests skip signature verification
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+# PBKDF2 work factor; stored hashes made with a different value are rehashed on login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Threads dedicated to hashing (hashlib's PBKDF2 releases the GIL, so they run in parallel)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# Jobs allowed to wait for a hashing thread before new requests are turned away
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+password_hasher = pbkdf2_sha256.using(rounds=PASSWORD_HASH_ROUNDS)
+password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE)
+
+
+class PasswordHashQueueFull(Exception):
+    """Raised when the password hashing pool has no room for another job"""
+
 def create_access_token(user_id: int, username: str, email: str):
     """
     Generate a JWT access token for user authentication
@@ -54,6 +84,9 @@ def verify_token(token):
     Verify and decode a JWT token
 
     Validates the signature of a JWT token and extracts the payload data.
+    Verified payloads are kept in a bounded LRU/TTL cache keyed on the token,
+    so the 4-6 calls a user makes per round only pay for verification once.
+    A cached token is never served past its `exp` claim.
 
     Args:
         token (str): JWT token string to verify
@@ -64,14 +97,29 @@ def verify_token(token):
     Raises:
         Exception: If token is invalid or tampered with
     """
+    cached_payload = token_cache.get(token)
+    if cached_payload is not None:
+        expires_at = cached_payload.get('exp')
+        if expires_at is None or expires_at > time.time():
+            # Copy so callers can't mutate the cached payload
+            return dict(cached_payload)
+        token_cache.pop(token)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        print("payload", payload)
-        return payload
-
     except JWTError:
+        logger.info("Rejected invalid access token")
         raise Exception('Invalid token')
 
+    ttl = TOKEN_CACHE_TTL_SECONDS
+    if payload.get('exp') is not None:
+        ttl = min(ttl, payload['exp'] - time.time())
+    if ttl > 0:
+        token_cache.set(token, payload, ttl=ttl)
+
+    logger.debug("Verified token for user_id=%s", payload.get('user_id'))
+    return dict(payload)
+
 
 def set_cookie(response, access_token, expiry_days: int = 1):
     expires = datetime.now(timezone.utc) + timedelta(days=expiry_days)
@@ -103,19 +151,14 @@ def get_user_from_cookie(request):
     Raises:
         HTTPException: 401 if token is missing or invalid
     """
-    print("All cookies received:", dict(request.cookies))
-    print("Cookie keys:", list(request.cookies.keys()))
     token = request.cookies.get("access_token")
-    print("Access token cookie:", token)
 
     if not token:
-        print("No access_token cookie found!")
+        logger.debug("No access_token cookie found (cookies present: %s)", list(request.cookies.keys()))
         raise HTTPException(status_code=401, detail="No access token cookie")
 
     try:
-        payload = verify_token(token)
-        print("Payload:", payload)
-        return payload
+        return verify_token(token)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
@@ -134,7 +177,7 @@ def hash_password(password):
     Returns:
         str: Hashed password string with embedded salt
     """
-    hashed_password = pbkdf2_sha256.hash(password)
+    hashed_password = password_hasher.hash(password)
     return hashed_password
 
 
@@ -157,6 +200,75 @@ def verify_password(plain_password, hashed_password):
     return False
 
 
+def password_needs_rehash(hashed_password):
+    """
+    Check whether a stored hash was made with outdated settings
+
+    Delegates to passlib, which compares the work factor, salt size and scheme
+    against the current password_hasher configuration.
+
+    Args:
+        hashed_password (str): Stored password hash
+
+    Returns:
+        bool: True if the hash should be recomputed with password_hasher
+    """
+    try:
+        return password_hasher.needs_update(hashed_password)
+    except ValueError:
+        # Not a pbkdf2_sha256 hash at all
+        return True
+
+
+async def _run_in_password_pool(func, *args):
+    """
+    Run a hashing function on the password hashing thread pool
+
+    Raises:
+        PasswordHashQueueFull: If the pool already has its maximum number of queued jobs
+    """
+    if not _password_hash_slots.acquire(blocking=False):
+        raise PasswordHashQueueFull("Password hashing queue is full")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_hash_executor, func, *args)
+    finally:
+        _password_hash_slots.release()
+
+
+async def hash_password_async(password):
+    """
+    Hash a password on the password hashing pool instead of the event loop
+
+    Args:
+        password (str): Plain-text password to hash
+
+    Returns:
+        str: Hashed password string with embedded salt
+
+    Raises:
+        PasswordHashQueueFull: If too many hashing jobs are already queued
+    """
+    return await _run_in_password_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    """
+    Verify a password on the password hashing pool instead of the event loop
+
+    Args:
+        plain_password (str): Plain-text password to verify
+        hashed_password (str): Previously hashed password to check against
+
+    Returns:
+        bool: True if password matches, False otherwise
+
+    Raises:
+        PasswordHashQueueFull: If too many hashing jobs are already queued
+    """
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
 def check_if_user_exists(db, username: str, email: str):
     """
     Check if a user with given username or email already exists
@@ -174,6 +286,28 @@ def check_if_user_exists(db, username: str, email: str):
     return db.query(User).filter((username==User.username) | (email == User.email)).first()
 
 
+def _add_user(db, username: str, hashed_password: str, email: str):
+    """Insert a user row with an already-hashed password"""
+    new_user = User(
+        username=username,
+        email=email,
+        password=hashed_password,
+        created_at=datetime.now(),
+    )
+    db.add(new_user)
+    db.commit()
+    return {"id": new_user.id, "username": new_user.username, "email": new_user.email, "created_at": new_user.created_at}
+
+
+def _user_info(user):
+    return {
+        'id': user.id,
+        "username": user.username,
+        "email": user.email,
+        "created_at": user.created_at,
+    }
+
+
 def create_user(db, username: str, password: str, email: str):
     """
     Create a new user account
@@ -189,17 +323,27 @@ def create_user(db, username: str, password: str, email: str):
     Returns:
         dict: Created user information (excluding password)
     """
-    hashed_password = hash_password(password)
+    return _add_user(db, username, hash_password(password), email)
 
-    new_user = User(
-        username=username,
-        email=email,
-        password=hashed_password,
-        created_at=datetime.now(),
-    )
-    db.add(new_user)
-    db.commit()
-    return {"id": new_user.id, "username": new_user.username, "email": new_user.email, "created_at": new_user.created_at}
+
+async def create_user_async(db, username: str, password: str, email: str):
+    """
+    Create a new user account, hashing the password on the hashing pool
+
+    Args:
+        db (Session): Database session
+        username (str): Username for the new account
+        password (str): Password for the new account (will be hashed)
+        email (str): Email for the new account
+
+    Returns:
+        dict: Created user information (excluding password)
+
+    Raises:
+        PasswordHashQueueFull: If too many hashing jobs are already queued
+    """
+    hashed_password = await hash_password_async(password)
+    return _add_user(db, username, hashed_password, email)
 
 
 def verify_credentials(db, email: str, password: str):
@@ -207,7 +351,9 @@ def verify_credentials(db, email: str, password: str):
     Verify user login credentials
 
     Checks if the provided email and password match a user record.
-    Used during the login process.
+    Used during the login process. If the stored hash was made with a
+    different work factor than PASSWORD_HASH_ROUNDS, it is transparently
+    replaced with a fresh hash.
 
     Args:
         db (Session): Database session
@@ -218,19 +364,35 @@ def verify_credentials(db, email: str, password: str):
         dict: User information if credentials are valid, None otherwise
     """
     user = db.query(User).filter(User.email == email).first()
-    print(user.email)
-    print(verify_password(password, user.password))
     if user and verify_password(password, user.password):
-        user_info_to_return = {
-            'id': user.id,
-            "username": user.username,
-            "email": user.email,
-            "created_at": user.created_at,
-        }
-
-        return user_info_to_return
+        if password_needs_rehash(user.password):
+            user.password = hash_password(password)
+            db.commit()
+        return _user_info(user)
     return None
 
 
+async def verify_credentials_async(db, email: str, password: str):
+    """
+    Verify user login credentials, running the hash work on the hashing pool
 
+    Same behaviour as verify_credentials, including the transparent rehash.
 
+    Args:
+        db (Session): Database session
+        email (str): Email address to verify
+        password (str): Password to verify
+
+    Returns:
+        dict: User information if credentials are valid, None otherwise
+
+    Raises:
+        PasswordHashQueueFull: If too many hashing jobs are already queued
+    """
+    user = db.query(User).filter(User.email == email).first()
+    if user and await verify_password_async(password, user.password):
+        if password_needs_rehash(user.password):
+            user.password = await hash_password_async(password)
+            db.commit()
+        return _user_info(user)
+    return None
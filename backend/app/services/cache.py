@@ -0,0 +1,91 @@
+"""
+Cache Utilities Module
+
+This module provides a small in-process cache used by the services to avoid
+repeating expensive work (geocoding, token verification, ...).
+
+Features:
+- Least-recently-used eviction once the cache reaches its size limit
+- Per-entry time-to-live expiry
+- Thread-safe, so it can be shared by sync route handlers running in the threadpool
+
+Dependencies:
+- Standard library only
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinel distinguishing "not cached" from a cached None
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a time-to-live per entry
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept before evicting the least recently used
+        ttl (float): Seconds an entry stays valid after being stored
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Look up a cached value
+
+        Args:
+            key: Cache key
+            default: Value returned when the key is missing or expired
+
+        Returns:
+            The cached value, or `default`
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        """
+        Store a value, evicting the least recently used entry if full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl (float): Optional per-entry TTL overriding the cache default
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value (or `default`)"""
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
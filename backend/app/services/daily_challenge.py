@@ -0,0 +1,215 @@
+"""
+Daily Challenge Service Module
+
+This module provides the daily challenge: one set of locations per day that
+every player gets. The set is chosen and geocoded once, then shared, so
+starting a daily challenge game only costs the database rows for the game.
+
+The locations of a day are drawn from the location index with a generator
+seeded from the date, so every worker picks the same set. The finished deck
+(ids, pano ids, coordinates and addresses, in the game deck format) is stored
+in Redis with SET NX: the first worker to finish wins, and anyone who raced it
+reads the stored deck instead, so all players see the same set even if the
+location pool changed in between. Each process also keeps the current deck in
+memory, so after the first game of the day no Redis round trip is needed.
+
+A deck is only shared once every address is resolved. If geocoding fails for
+some of its locations, the process keeps the deck to itself and tries those
+addresses again (at most every DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS) before
+sharing it, so a geocoder outage can't pin placeholder addresses on the whole
+day's challenge.
+
+Features:
+- Deterministic, date-seeded location selection
+- Redis-shared deck (SET NX) with expiry, plus an in-process copy
+- Works without Redis (each process then builds the same deck from the seed)
+
+Configuration (environment variables):
+- DAILY_CHALLENGE_SALT: Mixed into the seed so the daily sets can't be predicted from the date alone
+- DAILY_CHALLENGE_TTL_SECONDS: How long a day's deck stays in Redis (default 2 days)
+- DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS: Wait between attempts to resolve a deck's missing addresses (default 60)
+
+Dependencies:
+- Redis: Shares the deck between workers
+- app.services.location: Location index and address resolution
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from datetime import date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.game_deck import ROUNDS_PER_GAME
+from app.services.location import UNKNOWN_ADDRESS, get_location_addresses_async
+from app.services.location_index import IndexedLocation, location_index
+from app.services.redis_client import async_redis_client, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+DAILY_CHALLENGE_SALT = os.getenv("DAILY_CHALLENGE_SALT", "geoguessr-wa")
+DAILY_CHALLENGE_TTL_SECONDS = int(os.getenv("DAILY_CHALLENGE_TTL_SECONDS", str(2 * 24 * 3600)))
+DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS = float(os.getenv("DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS", "60"))
+
+# Decks already resolved by this process, by date; only the latest few are kept
+_local_challenges = {}
+_LOCAL_CHALLENGE_DAYS = 2
+# Monotonic time before which a local deck's missing addresses aren't retried, by date
+_address_retry_at = {}
+_build_lock = asyncio.Lock()
+
+
+def daily_challenge_key(day: date) -> str:
+    """Redis key of the deck for `day`"""
+    return f"daily_challenge:{day.isoformat()}"
+
+
+def _daily_rng(day: date) -> random.Random:
+    """Generator seeded from the date, identical in every process"""
+    seed = hashlib.sha256(f"{DAILY_CHALLENGE_SALT}:{day.isoformat()}".encode()).digest()
+    return random.Random(int.from_bytes(seed[:8], "big"))
+
+
+def _remember(day: date, deck: dict):
+    _local_challenges[day] = deck
+    for old_day in sorted(_local_challenges)[:-_LOCAL_CHALLENGE_DAYS]:
+        del _local_challenges[old_day]
+        _address_retry_at.pop(old_day, None)
+
+
+def _unresolved_rounds(deck: dict):
+    """Positions in the deck whose address couldn't be resolved"""
+    return [position for position, address in enumerate(deck["addresses"]) if not address or address == UNKNOWN_ADDRESS]
+
+
+def _is_servable(day: date, deck: dict) -> bool:
+    """A local deck is served as is when complete, or while its missing addresses wait for a retry"""
+    return deck is not None and (not _unresolved_rounds(deck) or time.monotonic() < _address_retry_at.get(day, 0))
+
+
+async def _read_shared(day: date):
+    """Deck stored in Redis for `day`, or None if there is none (or Redis is unavailable)"""
+    if async_redis_client is None:
+        return None
+    try:
+        deck_json = await redis_breaker.call_async(async_redis_client.get, daily_challenge_key(day))
+    except Exception as e:
+        logger.warning("Could not read daily challenge: %s", e)
+        return None
+    return json.loads(deck_json) if deck_json else None
+
+
+async def _share(day: date, deck: dict):
+    """Store a complete deck for `day` with SET NX; returns the deck everyone plays"""
+    if async_redis_client is None:
+        return deck
+    try:
+        stored = await redis_breaker.call_async(
+            async_redis_client.set, daily_challenge_key(day), json.dumps(deck),
+            nx=True, ex=DAILY_CHALLENGE_TTL_SECONDS
+        )
+        if not stored:
+            # Another worker got there first; everyone plays its deck
+            return await _read_shared(day) or deck
+    except Exception as e:
+        logger.warning("Could not share daily challenge: %s", e)
+    return deck
+
+
+async def _resolve_addresses(deck: dict, db: AsyncSession):
+    """
+    Fill in the deck's missing addresses
+
+    Addresses stored since (e.g. by another worker) are read back; the rest are geocoded again.
+
+    Returns:
+        dict: The deck with every address that could be resolved filled in
+    """
+    missing = _unresolved_rounds(deck)
+    locations = [
+        IndexedLocation(deck["location_ids"][position], deck["pano_ids"][position],
+                        deck["lats"][position], deck["lngs"][position])
+        for position in missing
+    ]
+    addresses = list(deck["addresses"])
+    for position, address in zip(missing, await get_location_addresses_async(locations, db)):
+        addresses[position] = address
+    return {**deck, "addresses": addresses}
+
+
+async def build_daily_challenge_async(day: date, db: AsyncSession, rounds: int = ROUNDS_PER_GAME):
+    """
+    Build the deck for `day` from the date-seeded draw
+
+    Args:
+        day (date): The challenge date
+        db (AsyncSession): Async database session
+        rounds (int): Number of locations in the deck
+
+    Returns:
+        dict: Deck with 'location_ids', 'pano_ids', 'lats', 'lngs' and 'addresses' lists
+
+    Raises:
+        ValueError: If the location index holds fewer than `rounds` locations
+    """
+    await location_index.ensure_fresh_async(db)
+    locations = location_index.sample(rounds, rng=_daily_rng(day))
+    return {
+        "location_ids": [location.id for location in locations],
+        "pano_ids": [location.pano_id for location in locations],
+        "lats": [location.lat for location in locations],
+        "lngs": [location.lng for location in locations],
+        "addresses": await get_location_addresses_async(locations, db),
+    }
+
+
+async def get_daily_challenge_async(db: AsyncSession, day: date = None):
+    """
+    Get the shared deck of the day's challenge, building it on first use
+
+    A deck with unresolved addresses is kept in this process (not shared) and
+    its addresses are retried on a later call.
+
+    Args:
+        db (AsyncSession): Async database session (only used to build the deck)
+        day (date): The challenge date (default: today)
+
+    Returns:
+        dict: Deck with 'location_ids', 'pano_ids', 'lats', 'lngs' and 'addresses' lists
+    """
+    day = day or datetime.now().date()
+
+    deck = _local_challenges.get(day)
+    if _is_servable(day, deck):
+        return deck
+
+    # One build per process at a time; requests that waited usually find the deck ready
+    async with _build_lock:
+        deck = _local_challenges.get(day)
+        if _is_servable(day, deck):
+            return deck
+
+        shared = await _read_shared(day)
+        deck = shared or deck
+        if deck is None:
+            deck = await build_daily_challenge_async(day, db)
+        elif _unresolved_rounds(deck):
+            deck = await _resolve_addresses(deck, db)
+
+        unresolved = _unresolved_rounds(deck)
+        if unresolved:
+            # Keep placeholder addresses out of the shared deck; retry them later
+            _address_retry_at[day] = time.monotonic() + DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS
+            logger.warning("Daily challenge %s has %d unresolved addresses, not sharing it yet", day, len(unresolved))
+        else:
+            _address_retry_at.pop(day, None)
+            if shared is None:
+                deck = await _share(day, deck)
+
+        _remember(day, deck)
+        return deck
@@ -8,6 +8,9 @@ Features:
 - Game session creation and management
 - Round creation and tracking
 - User round participation recording
+- Single-transaction creation of a game/round and its user_round
+- Async versions of the above for use with AsyncSession
+- Game finalization that also maintains the player's lifetime stats
 
 Dependencies:
 - SQLAlchemy: For database operations
@@ -16,12 +19,16 @@ Dependencies:
 """
 
 import math
-from datetime import datetime
-from app.db import get_db
+from datetime import date, datetime
+from app.db import get_db, get_async_db
 from app.models import Game, Round, UserRound
+from app.services.scoring import score_distance
+from app.services.user_stats import record_finished_game
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
-from sqlalchemy import func
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
 
 
 # All game table related functions
@@ -50,33 +57,192 @@ def create_new_game(user_id: int, db: Session = Depends(get_db)):
 
     return new_game
 
-def update_game(user_id: int, total_score: int, total_distance: float, db: Session = Depends(get_db)):
-    max_id = db.query(func.max(Game.id)).scalar()
 
-    game = db.query(Game).filter(Game.id == max_id).first()
-    if game:
-        game.completed_at = datetime.now()
-        game.total_score = total_score
-        game.total_distance = total_distance
-        db.commit()
-        return {
+def _new_game_with_first_round(user_id: int, location: str, mode: str = "classic", challenge_date: date = None):
+    """Build (unsaved) game, round 1 and user_round objects linked through their relationships"""
+    new_game = Game(
+        user_id = user_id,
+        started_at = datetime.now(),
+        mode = mode,
+        challenge_date = challenge_date
+    )
+    new_round = Round(
+        game = new_game,
+        round_number = 1,
+        location_string = location
+    )
+    new_user_round = UserRound(
+        round = new_round,
+        game = new_game,
+        user_id = user_id,
+        round_score = 0,
+    )
+    return new_game, new_round, new_user_round
+
+
+def _new_round_with_user_round(game_id: int, round_number: int, location: str, user_id: int):
+    """Build (unsaved) round and user_round objects linked through their relationship"""
+    new_round = Round(
+        game_id = game_id,
+        round_number = round_number,
+        location_string = location
+    )
+    new_user_round = UserRound(
+        round = new_round,
+        game_id = game_id,
+        user_id = user_id,
+        round_score = 0,
+    )
+    return new_round, new_user_round
+
+
+def create_game_with_first_round(user_id: int, location: str, db: Session = Depends(get_db),
+                                 mode: str = "classic", challenge_date: date = None):
+    """
+    Create a game, its first round and the user's round record in one transaction
+
+    Unit-of-work version of calling create_new_game, create_round and
+    create_user_round in a row. The three rows are linked through their
+    relationships and written with a single flush (each INSERT uses RETURNING
+    for its id) and a single commit, with no refresh SELECTs afterwards.
+
+    Args:
+        user_id (int): ID of the user starting the game
+        location (str): Human-readable location string for round 1
+        db (Session): Database session dependency
+        mode (str): 'classic' or 'daily'
+        challenge_date (date): Day of the daily challenge (daily games only)
+
+    Returns:
+        dict: 'game_id', 'round_id', 'user_round_id', 'round_number' and 'round_score'
+
+    Raises:
+        sqlalchemy.exc.IntegrityError: If the user already has a game for this challenge_date
+    """
+    new_game, new_round, new_user_round = _new_game_with_first_round(user_id, location, mode, challenge_date)
+
+    db.add(new_game)
+    db.flush()
+
+    # Read everything we need before commit() expires the objects
+    created = {
+        "game_id": new_game.id,
+        "round_id": new_round.id,
+        "user_round_id": new_user_round.id,
+        "round_number": new_round.round_number,
+        "round_score": new_user_round.round_score,
+    }
+    db.commit()
+    return created
+
+
+def create_round_with_user_round(game_id: int, round_number: int, location: str, user_id: int, db: Session = Depends(get_db)):
+    """
+    Create a round and the user's round record in one transaction
+
+    Unit-of-work version of calling create_round and create_user_round in a
+    row: one flush, one commit, no refresh SELECTs.
+
+    Args:
+        game_id (int): ID of the parent game session
+        round_number (int): Sequence number of this round (1-based)
+        location (str): Human-readable location string
+        user_id (int): ID of the participating user
+        db (Session): Database session dependency
+
+    Returns:
+        dict: 'round_id', 'user_round_id', 'round_number' and 'round_score'
+    """
+    new_round, new_user_round = _new_round_with_user_round(game_id, round_number, location, user_id)
 
-            "game_id": int(max_id),
-            "total_score": float(game.total_score),
-            "total_distance": float(game.total_distance),
-            "average_distance": round(game.total_distance / 5, 2) if game.total_distance else 0
+    db.add(new_round)
+    db.flush()
+
+    created = {
+        "round_id": new_round.id,
+        "user_round_id": new_user_round.id,
+        "round_number": new_round.round_number,
+        "round_score": new_user_round.round_score,
+    }
+    db.commit()
+    return created
 
 
+def finalize_game(game_id: int, user_id: int, db: Session = Depends(get_db)):
+    """
+    Mark a game as completed and store its totals, in a single statement
 
-        }
-    else:
-        raise ValueError("game not found")
+    The totals are summed from the game's user_rounds and written with one
+    UPDATE ... FROM (SELECT ... GROUP BY) ... RETURNING, so finishing a game is
+    one indexed round trip. Only games that aren't completed yet are updated;
+    finalizing the same game again returns the totals stored the first time.
+    The player's user_stats row is updated in the same transaction, once per game.
+
+    Args:
+        game_id (int): ID of the game (from the player's game session)
+        user_id (int): ID of the user who owns the game
+        db (Session): Database session dependency
+
+    Returns:
+        dict: 'game_id', 'total_score', 'total_distance', 'average_distance',
+            'mode', 'challenge_date' (daily challenge games only), 'finalized'
+            (True only for the call that completed the game) and 'completed_at'
+            (set when 'finalized' is True)
+
+    Raises:
+        ValueError: If the user has no game with this id
+    """
+    totals = (
+        select(
+            UserRound.game_id,
+            func.coalesce(func.sum(UserRound.round_score), 0).label("total_score"),
+            func.coalesce(func.sum(UserRound.distance_off), 0).label("total_distance"),
+        )
+        .where(UserRound.game_id == game_id)
+        .group_by(UserRound.game_id)
+        .subquery()
+    )
+    finished_at = datetime.now()
+    finalize = (
+        update(Game)
+        .where(Game.id == totals.c.game_id, Game.user_id == user_id, Game.completed_at.is_(None))
+        .values(completed_at=finished_at, total_score=totals.c.total_score, total_distance=totals.c.total_distance)
+        .returning(Game.id, Game.total_score, Game.total_distance, Game.mode, Game.challenge_date)
+    )
+    row = db.execute(finalize).first()
+    finalized = row is not None
+    if finalized:
+        # First finalization of this game: fold it into the player's lifetime stats in the same transaction
+        record_finished_game(user_id, game_id, finished_at, db)
+    db.commit()
+
+    if not finalized:
+        # Already finalized (or nothing scored yet): report what is stored
+        row = db.execute(
+            select(Game.id, Game.total_score, Game.total_distance, Game.mode, Game.challenge_date)
+            .where(Game.id == game_id, Game.user_id == user_id)
+        ).first()
+        if row is None:
+            raise ValueError("game not found")
+
+    total_score = float(row.total_score or 0)
+    total_distance = float(row.total_distance or 0)
+    return {
+        "game_id": int(row.id),
+        "total_score": total_score,
+        "total_distance": total_distance,
+        "average_distance": round(total_distance / 5, 2) if total_distance else 0,
+        "mode": row.mode,
+        "challenge_date": row.challenge_date,
+        "finalized": finalized,
+        "completed_at": finished_at if finalized else None
+    }
 
 
 
 def get_game_results(user_id: int, game_id, db: Session = Depends(get_db)):
-    total_score = get_total_score(user_id, db)
-    total_distance_off = get_total_distance_off(user_id, db)
+    total_score = get_total_score(game_id, db)
+    total_distance_off = get_total_distance_off(game_id, db)
     rounds = db.query(Round).filter(Round.game_id == game_id).all()
     round_ids = [round_object.id for round_object in rounds]
     user_round_stats = db.query(UserRound).filter(UserRound.round_id.in_(round_ids)).all()
@@ -86,8 +252,8 @@ def get_game_results(user_id: int, game_id, db: Session = Depends(get_db)):
 
 
 def get_score(distance_km: float, max_score:int =5000, max_distance: int = 500) -> int:
-    score = max(0, max_score * (1 - distance_km / max_distance))
-    return round(score)
+    # Plain-math twin of the batch scoring engine's score_distances
+    return score_distance(distance_km, max_score, max_distance)
 
 
 
@@ -151,33 +317,271 @@ def create_user_round(round_id: int, user_id: int, game_id: int, db: Session = D
 
 
 
+class RoundAlreadyScored(ValueError):
+    """Raised when a guess is saved for a user_round that already holds one"""
+
+    def __init__(self, user_round):
+        super().__init__("game round already scored")
+        self.user_round = user_round
+
+
+def _score_user_round(round_id, guess_lat: float, guess_lng: float, distance_off: float, round_score: float):
+    """UPDATE that saves a guess only if the round has none yet (distance_off is set exactly once)"""
+    return (
+        update(UserRound)
+        .where(UserRound.round_id == round_id, UserRound.distance_off.is_(None))
+        .values(guess_lat=guess_lat, guess_lng=guess_lng, distance_off=distance_off, round_score=round_score)
+        .execution_options(synchronize_session=False)
+    )
+
+
 def update_user_round(round_id, guess_location_string: str,  guess_lat: float, guess_lng: float, distance_off: float, round_score: float, db: Session = Depends(get_db)):
+    """
+    Save the user's guess for a round
+
+    The guess is written with a conditional UPDATE, so a round can only be
+    scored once even if two requests race past the guess lock. The guess
+    address is not stored (user_rounds has no column for it).
+
+    Returns:
+        bool: True once the guess is saved
+
+    Raises:
+        RoundAlreadyScored: If the round already has a guess (carries the saved user_round)
+        ValueError: If no user_round exists for the round
+    """
+    updated = db.execute(_score_user_round(round_id, guess_lat, guess_lng, distance_off, round_score))
+    db.commit()
+    if updated.rowcount:
+        return True
+
     game_round = db.query(UserRound).filter(UserRound.round_id == round_id).first()
-    print("game_round", game_round)
     if game_round:
-        game_round.guess_lat = guess_lat
-        game_round.guess_lng = guess_lng
-        game_round.guess_location_string = guess_location_string
-        game_round.distance_off = distance_off
-        game_round.round_score = round_score
-    else:
-        raise ValueError("game round not found")
-    db.commit()
-    return game_round
+        raise RoundAlreadyScored(game_round)
+    raise ValueError("game round not found")
 
 
 
 def get_total_score(game_id: int, db: Session = Depends(get_db)):
     total_score = db.query(func.sum(UserRound.round_score)).filter(
         UserRound.game_id == game_id
-    ).scalar_subquery()
+    ).scalar()
 
-    return total_score
+    return float(total_score or 0)
 
 
 def get_total_distance_off(game_id: int, db: Session = Depends(get_db)):
     total_distance_off = db.query(func.sum(UserRound.distance_off)).filter(
         UserRound.game_id == game_id
-    ).scalar_subquery()
+    ).scalar()
+
+    return float(total_distance_off or 0)
+
+
+
+# ============================================================================
+# ASYNC VERSIONS (for async route handlers using get_async_db)
+# ============================================================================
+
+async def create_new_game_async(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of create_new_game
+
+    Args:
+        user_id (int): ID of the user starting the game
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        Game: Created game object with generated ID
+    """
+    new_game = Game(
+        user_id = user_id,
+        started_at = datetime.now()
+    )
+
+    db.add(new_game)
+    await db.commit()
+    await db.refresh(new_game)
+    return new_game
 
-    return total_distance_off
\ No newline at end of file
+
+async def create_game_with_first_round_async(user_id: int, location: str, db: AsyncSession = Depends(get_async_db),
+                                            mode: str = "classic", challenge_date: date = None):
+    """
+    Async version of create_game_with_first_round
+
+    Args:
+        user_id (int): ID of the user starting the game
+        location (str): Human-readable location string for round 1
+        db (AsyncSession): Async database session dependency
+        mode (str): 'classic' or 'daily'
+        challenge_date (date): Day of the daily challenge (daily games only)
+
+    Returns:
+        dict: 'game_id', 'round_id', 'user_round_id', 'round_number' and 'round_score'
+
+    Raises:
+        sqlalchemy.exc.IntegrityError: If the user already has a game for this challenge_date
+    """
+    new_game, new_round, new_user_round = _new_game_with_first_round(user_id, location, mode, challenge_date)
+
+    db.add(new_game)
+    await db.flush()
+
+    created = {
+        "game_id": new_game.id,
+        "round_id": new_round.id,
+        "user_round_id": new_user_round.id,
+        "round_number": new_round.round_number,
+        "round_score": new_user_round.round_score,
+    }
+    await db.commit()
+    return created
+
+
+# Unique index allowing one game per user per daily challenge
+CHALLENGE_GAME_CONSTRAINT = "uq_games_user_id_challenge_date"
+
+
+def is_duplicate_challenge_game(error: IntegrityError) -> bool:
+    """
+    Check whether an IntegrityError is the one-game-per-daily-challenge index rejecting a replay
+
+    PostgreSQL (psycopg2 and asyncpg) names the violated constraint in the
+    message; SQLite lists the unique index's columns instead.
+    """
+    message = str(error.orig)
+    return CHALLENGE_GAME_CONSTRAINT in message or "games.user_id, games.challenge_date" in message
+
+
+async def create_round_with_user_round_async(game_id: int, round_number: int, location: str, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of create_round_with_user_round
+
+    Args:
+        game_id (int): ID of the parent game session
+        round_number (int): Sequence number of this round (1-based)
+        location (str): Human-readable location string
+        user_id (int): ID of the participating user
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        dict: 'round_id', 'user_round_id', 'round_number' and 'round_score'
+    """
+    new_round, new_user_round = _new_round_with_user_round(game_id, round_number, location, user_id)
+
+    db.add(new_round)
+    await db.flush()
+
+    created = {
+        "round_id": new_round.id,
+        "user_round_id": new_user_round.id,
+        "round_number": new_round.round_number,
+        "round_score": new_user_round.round_score,
+    }
+    await db.commit()
+    return created
+
+
+async def create_round_async(game_id: int, round_number: int, location: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of create_round
+
+    Args:
+        game_id (int): ID of the parent game session
+        round_number (int): Sequence number of this round (1-based)
+        location (str): Human-readable location string
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        Round: Created round object with generated ID
+    """
+    new_round = Round(
+        game_id = game_id,
+        round_number = round_number,
+        location_string = location
+    )
+
+    db.add(new_round)
+    await db.commit()
+    await db.refresh(new_round)
+    return new_round
+
+
+async def create_user_round_async(round_id: int, user_id: int, game_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of create_user_round
+
+    Args:
+        round_id (int): ID of the round
+        user_id (int): ID of the participating user
+        game_id (int): ID of the parent game session
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        UserRound: Created user_round object with generated ID
+    """
+    new_user_round = UserRound(
+        round_id = round_id,
+        user_id = user_id,
+        game_id = game_id,
+        round_score = 0,
+    )
+
+    db.add(new_user_round)
+    await db.commit()
+    await db.refresh(new_user_round)
+    return new_user_round
+
+
+async def update_user_round_async(round_id, guess_location_string: str, guess_lat: float, guess_lng: float, distance_off: float, round_score: float, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of update_user_round
+
+    Returns:
+        bool: True once the guess is saved
+
+    Raises:
+        RoundAlreadyScored: If the round already has a guess (carries the saved user_round)
+        ValueError: If no user_round exists for the round
+    """
+    updated = await db.execute(_score_user_round(round_id, guess_lat, guess_lng, distance_off, round_score))
+    await db.commit()
+    if updated.rowcount:
+        return True
+
+    result = await db.execute(select(UserRound).where(UserRound.round_id == round_id).limit(1))
+    game_round = result.scalars().first()
+    if game_round:
+        raise RoundAlreadyScored(game_round)
+    raise ValueError("game round not found")
+
+
+async def get_total_score_async(game_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Sum of round scores for a game
+
+    Args:
+        game_id (int): ID of the game
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        float: Total score (0 if no rounds are scored yet)
+    """
+    total_score = await db.scalar(select(func.sum(UserRound.round_score)).where(UserRound.game_id == game_id))
+    return float(total_score or 0)
+
+
+async def get_total_distance_off_async(game_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Sum of guess distances for a game
+
+    Args:
+        game_id (int): ID of the game
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        float: Total distance off in kilometers (0 if no rounds are scored yet)
+    """
+    total_distance_off = await db.scalar(select(func.sum(UserRound.distance_off)).where(UserRound.game_id == game_id))
+    return float(total_distance_off or 0)
@@ -0,0 +1,171 @@
+"""
+Game Deck Service Module
+
+This module keeps a Redis list of ready-made games ("decks") so that starting a
+game does not have to sample locations or geocode addresses on the request path.
+
+Each deck holds everything a new game needs about its locations: ids, pano ids,
+coordinates and address strings. A background producer tops the list up to a
+configurable depth, and `start_game` simply pops one.
+
+Features:
+- Deck building from the location index and stored addresses
+- Redis-backed FIFO of prebuilt decks (RPUSH / LPOP)
+- Background producer with a tokened Redis lock, so only one worker refills at a time
+
+Configuration (environment variables):
+- GAME_DECK_DEPTH: Number of decks to keep ready (default 50, 0 disables the producer)
+- GAME_DECK_REFILL_SECONDS: Seconds between producer top-up passes (default 5)
+
+Dependencies:
+- Redis: Stores the deck list and producer lock
+- app.services.location: Location sampling and address resolution
+"""
+
+import asyncio
+import json
+import logging
+import os
+
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.services.location import sample_locations, get_location_addresses
+from app.services.redis_client import redis_client, async_redis_client, redis_breaker, acquire_redis_lock, \
+    release_redis_lock
+
+logger = logging.getLogger(__name__)
+
+GAME_DECK_KEY = "game_decks"
+GAME_DECK_LOCK_KEY = "game_decks:producer_lock"
+GAME_DECK_DEPTH = int(os.getenv("GAME_DECK_DEPTH", "50"))
+GAME_DECK_REFILL_SECONDS = float(os.getenv("GAME_DECK_REFILL_SECONDS", "5"))
+
+# Number of rounds (locations) in a game
+ROUNDS_PER_GAME = 5
+
+
+def build_game_deck(db: Session, rounds: int = ROUNDS_PER_GAME):
+    """
+    Build one ready-to-play game deck
+
+    Args:
+        db (Session): Database session
+        rounds (int): Number of locations in the deck
+
+    Returns:
+        dict: Deck with 'location_ids', 'pano_ids', 'lats', 'lngs' and 'addresses' lists
+    """
+    locations = sample_locations(rounds, db)
+    return {
+        "location_ids": [location.id for location in locations],
+        "pano_ids": [location.pano_id for location in locations],
+        "lats": [location.lat for location in locations],
+        "lngs": [location.lng for location in locations],
+        "addresses": get_location_addresses(locations, db),
+    }
+
+
+def pop_game_deck():
+    """
+    Take the next prebuilt deck off the Redis list
+
+    Returns:
+        dict: A deck as built by build_game_deck, or None if none are ready
+    """
+    if redis_client is None:
+        return None
+
+    try:
+        deck_json = redis_breaker.call(redis_client.lpop, GAME_DECK_KEY)
+    except Exception as e:
+        logger.warning("Could not pop game deck: %s", e)
+        return None
+
+    return json.loads(deck_json) if deck_json else None
+
+
+async def pop_game_deck_async():
+    """
+    Async version of pop_game_deck, for async route handlers
+
+    Returns:
+        dict: A deck as built by build_game_deck, or None if none are ready
+    """
+    if async_redis_client is None:
+        return None
+
+    try:
+        deck_json = await redis_breaker.call_async(async_redis_client.lpop, GAME_DECK_KEY)
+    except Exception as e:
+        logger.warning("Could not pop game deck: %s", e)
+        return None
+
+    return json.loads(deck_json) if deck_json else None
+
+
+def top_up_game_decks(db: Session, depth: int = GAME_DECK_DEPTH):
+    """
+    Refill the deck list up to `depth` entries
+
+    A short-lived Redis lock makes sure only one worker process builds decks
+    at a time; the others skip the pass.
+
+    Args:
+        db (Session): Database session
+        depth (int): Target number of ready decks
+
+    Returns:
+        int: Number of decks added
+    """
+    if redis_client is None or depth <= 0:
+        return 0
+
+    lock_ttl = max(int(GAME_DECK_REFILL_SECONDS * 6), 30)
+    lock_token = acquire_redis_lock(GAME_DECK_LOCK_KEY, lock_ttl)
+    if lock_token is None:
+        return 0
+
+    try:
+        missing = depth - redis_breaker.call(redis_client.llen, GAME_DECK_KEY)
+        if missing <= 0:
+            return 0
+
+        for added in range(missing):
+            deck = build_game_deck(db)
+            # A slow build may have outlived the lock; stop rather than overfill alongside its new holder
+            if redis_breaker.call(redis_client.get, GAME_DECK_LOCK_KEY) != lock_token:
+                return added
+            # Push each deck as soon as it's built so a slow geocode doesn't hold back the rest
+            redis_breaker.call(redis_client.rpush, GAME_DECK_KEY, json.dumps(deck))
+            redis_breaker.call(redis_client.expire, GAME_DECK_LOCK_KEY, lock_ttl)
+        return missing
+    finally:
+        release_redis_lock(GAME_DECK_LOCK_KEY, lock_token)
+
+
+def _top_up_once():
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        return top_up_game_decks(db)
+    finally:
+        db_gen.close()
+
+
+async def run_game_deck_producer():
+    """
+    Keep the deck list topped up until cancelled
+
+    Runs as a background task for the lifetime of the application. The
+    blocking refill work is pushed onto a thread so it never stalls the
+    event loop.
+    """
+    while True:
+        try:
+            added = await asyncio.to_thread(_top_up_once)
+            if added:
+                logger.info("Added %d game decks", added)
+        except Exception:
+            logger.exception("Game deck producer pass failed")
+        await asyncio.sleep(GAME_DECK_REFILL_SECONDS)
@@ -0,0 +1,139 @@
+"""
+Streaming GeoJSON Reader Module
+
+This module reads the features of a GeoJSON FeatureCollection one at a time,
+without loading the whole document into memory. Memory use stays flat however
+large the file is, and callers can start working on the first features right
+away instead of waiting for the whole file to be parsed.
+
+Only the top level of the document is walked by hand; each feature is decoded
+with the standard JSON decoder as soon as it has been read in full.
+
+Features:
+- Lazy iteration over the features of a FeatureCollection
+- Lazy iteration over point coordinates
+- Fixed-size read buffer
+
+Dependencies:
+- Standard library only
+"""
+
+import json
+
+# Bytes read from the file at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class _StreamingDecoder:
+    """Decodes consecutive JSON values from a text file, refilling a buffer as needed"""
+
+    def __init__(self, file, chunk_size: int):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read another chunk, dropping what has been consumed. Returns False at end of file"""
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character (without consuming it), or '' at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        """Consume `char`, which must be the next non-whitespace character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid GeoJSON: expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Most likely the value continues past the end of the buffer
+                if not self._fill():
+                    raise ValueError(f"Invalid GeoJSON: {e}") from e
+                continue
+            # A number at the very end of the buffer may be cut short
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_geojson_features(path: str, chunk_size: int = READ_CHUNK_SIZE):
+    """
+    Iterate over the features of a GeoJSON FeatureCollection lazily
+
+    Args:
+        path (str): Path to the GeoJSON file
+        chunk_size (int): Characters read from the file at a time
+
+    Yields:
+        dict: One feature at a time, in file order
+
+    Raises:
+        ValueError: If the file is not a valid FeatureCollection
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _StreamingDecoder(f, chunk_size)
+        stream.expect("{")
+        while stream.peek() != "}":
+            key = stream.value()
+            stream.expect(":")
+            if key != "features":
+                # Small top-level members (type, generator, ...) are decoded and skipped
+                stream.value()
+            else:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.pos += 1
+                stream.expect("]")
+                # Nothing after the feature list matters to callers
+                return
+            if stream.peek() == ",":
+                stream.pos += 1
+
+
+def iter_geojson_points(path: str, chunk_size: int = READ_CHUNK_SIZE):
+    """
+    Iterate over the point features of a GeoJSON file lazily
+
+    Args:
+        path (str): Path to the GeoJSON file
+        chunk_size (int): Characters read from the file at a time
+
+    Yields:
+        tuple: (lat, lng, properties) for each Point feature
+    """
+    for feature in iter_geojson_features(path, chunk_size):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") != "Point":
+            continue
+        lng, lat = geometry["coordinates"][:2]
+        yield lat, lng, feature.get("properties") or {}
@@ -0,0 +1,304 @@
+"""
+Leaderboard Service Module
+
+This module keeps the game leaderboards in Redis sorted sets, so reading a
+page of the leaderboard or a player's rank never touches the games table.
+
+Each leaderboard is one sorted set of user_id -> best single-game score. A
+finished game is added with ZADD GT, which only ever raises a player's score,
+so recording is one O(log n) write per board and is safe to repeat.
+
+Boards:
+- global: Best classic game ever, never expires
+- daily: Best classic game of the day, key per date, expires LEADERBOARD_DAILY_KEEP_DAYS after the day ends
+- weekly: Best classic game of the ISO week, key per week, expires LEADERBOARD_WEEKLY_KEEP_WEEKS after the week ends
+- challenge: Daily challenge scores, key per challenge date, kept like the daily board.
+  Each player has one attempt per challenge, so this is a like-for-like ranking
+
+Usernames are kept next to the boards in a Redis hash, so a page of results is
+served from Redis alone. If Redis loses the data, `rebuild_leaderboards`
+(python -m app.rebuild_leaderboards) recreates every board still within its
+retention window from the completed games in PostgreSQL.
+
+Configuration (environment variables):
+- LEADERBOARD_DAILY_KEEP_DAYS: Days a finished daily board stays readable (default 7)
+- LEADERBOARD_WEEKLY_KEEP_WEEKS: Weeks a finished weekly board stays readable (default 4)
+
+Dependencies:
+- Redis: Sorted sets (ZADD GT, ZREVRANGE, ZREVRANK) and the username hash
+- SQLAlchemy: Reading completed games for a rebuild
+"""
+
+import logging
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Game, User
+from app.services.redis_client import redis_client, redis_breaker
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_DAILY_KEEP_DAYS = int(os.getenv("LEADERBOARD_DAILY_KEEP_DAYS", "7"))
+LEADERBOARD_WEEKLY_KEEP_WEEKS = int(os.getenv("LEADERBOARD_WEEKLY_KEEP_WEEKS", "4"))
+
+LEADERBOARD_PERIODS = ("global", "daily", "weekly", "challenge")
+# Boards fed by classic games; daily challenge games only go to the challenge board
+CLASSIC_PERIODS = ("global", "daily", "weekly")
+LEADERBOARD_USERNAMES_KEY = "leaderboard:usernames"
+
+# Members written per ZADD during a rebuild
+REBUILD_BATCH_SIZE = 1000
+
+
+def _bucket(period: str, when: datetime) -> str:
+    """Name of the time bucket `when` falls in, e.g. '2026-10-18' or '2026-W42'"""
+    if period in ("daily", "challenge"):
+        return when.date().isoformat()
+    year, week, _ = when.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _bucket_expiry(period: str, when: datetime):
+    """When the board `when` belongs to should disappear from Redis (None for the global board)"""
+    if period in ("daily", "challenge"):
+        day_end = datetime.combine(when.date() + timedelta(days=1), datetime.min.time())
+        return day_end + timedelta(days=LEADERBOARD_DAILY_KEEP_DAYS)
+    if period == "weekly":
+        week_end = datetime.combine(when.date() + timedelta(days=7 - when.weekday()), datetime.min.time())
+        return week_end + timedelta(weeks=LEADERBOARD_WEEKLY_KEEP_WEEKS)
+    return None
+
+
+def leaderboard_key(period: str, when: datetime = None) -> str:
+    """
+    Redis key of a leaderboard
+
+    Args:
+        period (str): 'global', 'daily', 'weekly' or 'challenge'
+        when (datetime): Any time inside the wanted day/week, or the challenge date (default: now)
+
+    Returns:
+        str: The sorted set key, e.g. 'leaderboard:daily:2026-10-18'
+    """
+    if period not in LEADERBOARD_PERIODS:
+        raise ValueError(f"Unknown leaderboard period: {period}")
+    if period == "global":
+        return "leaderboard:global"
+    return f"leaderboard:{period}:{_bucket(period, when or datetime.now())}"
+
+
+def _boards_for_game(finished_at: datetime, challenge_date: date = None):
+    """(period, time) of every board a finished game counts towards"""
+    if challenge_date is not None:
+        # Filed under the challenge's day, even if the game was finished after midnight
+        return [("challenge", datetime.combine(challenge_date, datetime.min.time()))]
+    return [(period, finished_at) for period in CLASSIC_PERIODS]
+
+
+def record_game_score(user_id: int, username: str, score: float, finished_at: datetime,
+                      challenge_date: date = None) -> bool:
+    """
+    Add a finished game to the leaderboards it counts towards
+
+    Classic games go to the global, daily and weekly boards; daily challenge
+    games only to the board of their challenge. Must only be called once the
+    game is actually finalized; repeated calls are harmless though, since
+    ZADD GT never lowers a score.
+
+    Args:
+        user_id (int): ID of the player
+        username (str): Display name of the player
+        score (float): Total score of the game
+        finished_at (datetime): When the game was finalized (picks the daily/weekly boards)
+        challenge_date (date): Day of the daily challenge, for daily challenge games
+
+    Returns:
+        bool: True if the leaderboards were updated, False if Redis is unavailable
+    """
+    if redis_client is None:
+        return False
+
+    pipe = redis_client.pipeline(transaction=False)
+    for period, when in _boards_for_game(finished_at, challenge_date):
+        key = leaderboard_key(period, when)
+        pipe.zadd(key, {str(user_id): score}, gt=True)
+        expiry = _bucket_expiry(period, when)
+        if expiry is not None:
+            pipe.expireat(key, expiry)
+    pipe.hset(LEADERBOARD_USERNAMES_KEY, str(user_id), username)
+
+    try:
+        redis_breaker.call(pipe.execute)
+        return True
+    except Exception as e:
+        # The game itself is already saved; a rebuild can restore the leaderboards later
+        logger.warning("Could not update leaderboards for user %s: %s", user_id, e)
+        return False
+
+
+def _entries(members_with_scores, first_rank: int):
+    """Turn ZREVRANGE output into ranked entries with usernames"""
+    if not members_with_scores:
+        return []
+    user_ids = [member for member, _ in members_with_scores]
+    usernames = redis_breaker.call(redis_client.hmget, LEADERBOARD_USERNAMES_KEY, user_ids)
+    return [
+        {"rank": first_rank + i, "user_id": int(member), "username": username, "score": score}
+        for i, ((member, score), username) in enumerate(zip(members_with_scores, usernames))
+    ]
+
+
+def get_leaderboard(period: str, limit: int = 10, offset: int = 0, when: datetime = None):
+    """
+    Read a page of a leaderboard, best score first
+
+    Args:
+        period (str): 'global', 'daily', 'weekly' or 'challenge'
+        limit (int): Number of entries to return
+        offset (int): Number of entries to skip (0 starts at rank 1)
+        when (datetime): Any time inside the wanted day/week (default: now)
+
+    Returns:
+        dict: 'period', 'board' (the day/week, or 'all-time'), 'total_players' and
+            'entries' (each with 'rank', 'user_id', 'username' and 'score')
+
+    Raises:
+        redis.exceptions.ConnectionError: If Redis is unavailable
+    """
+    key = leaderboard_key(period, when)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    pipe.zcard(key)
+    page, total = redis_breaker.call(pipe.execute)
+
+    return {
+        "period": period,
+        "board": key.rsplit(":", 1)[-1] if period != "global" else "all-time",
+        "total_players": total,
+        "entries": _entries(page, offset + 1),
+    }
+
+
+def get_user_rank(period: str, user_id: int, radius: int = 5, when: datetime = None):
+    """
+    Read a player's rank and the players just above and below them
+
+    Args:
+        period (str): 'global', 'daily', 'weekly' or 'challenge'
+        user_id (int): ID of the player
+        radius (int): Number of neighbours to include on each side
+        when (datetime): Any time inside the wanted day/week (default: now)
+
+    Returns:
+        dict: 'period', 'board', 'total_players', 'rank' and 'score' (None if the
+            player is not on this board) and the surrounding 'entries'
+
+    Raises:
+        redis.exceptions.ConnectionError: If Redis is unavailable
+    """
+    key = leaderboard_key(period, when)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrank(key, str(user_id))
+    pipe.zscore(key, str(user_id))
+    pipe.zcard(key)
+    rank, score, total = redis_breaker.call(pipe.execute)
+
+    result = {
+        "period": period,
+        "board": key.rsplit(":", 1)[-1] if period != "global" else "all-time",
+        "total_players": total,
+        "rank": None,
+        "score": None,
+        "entries": [],
+    }
+    if rank is None:
+        return result
+
+    start = max(rank - radius, 0)
+    around = redis_breaker.call(redis_client.zrevrange, key, start, rank + radius, withscores=True)
+    result.update(rank=rank + 1, score=score, entries=_entries(around, start + 1))
+    return result
+
+
+def _replace_board(key: str, scores: dict, expiry):
+    """Write a board under a temporary key, then swap it in atomically"""
+    staging_key = f"{key}:rebuild"
+    items = list(scores.items())
+    redis_client.delete(staging_key)
+    for i in range(0, len(items), REBUILD_BATCH_SIZE):
+        redis_client.zadd(staging_key, dict(items[i:i + REBUILD_BATCH_SIZE]))
+
+    pipe = redis_client.pipeline(transaction=True)
+    if items:
+        pipe.rename(staging_key, key)
+        if expiry is not None:
+            pipe.expireat(key, expiry)
+    else:
+        pipe.delete(key)
+    pipe.execute()
+
+
+def rebuild_leaderboards(db: Session, now: datetime = None):
+    """
+    Recreate the leaderboards from the completed games in PostgreSQL
+
+    The global board is rebuilt in full; daily, weekly and challenge boards are
+    rebuilt for every day/week that would still be kept in Redis. Each board is
+    swapped in atomically, so readers never see a half-written board.
+
+    Args:
+        db (Session): Database session
+        now (datetime): Reference time for the retention windows (default: now)
+
+    Returns:
+        dict: Number of boards rebuilt per period
+    """
+    now = now or datetime.now()
+
+    best_ever = db.execute(
+        select(Game.user_id, func.max(Game.total_score))
+        .where(Game.completed_at.is_not(None), Game.mode == "classic")
+        .group_by(Game.user_id)
+    ).all()
+
+    # Anything older than the longest retention window has already expired from Redis
+    cutoff = min(
+        now - timedelta(days=LEADERBOARD_DAILY_KEEP_DAYS + 1),
+        now - timedelta(weeks=LEADERBOARD_WEEKLY_KEEP_WEEKS + 1),
+    )
+    boards = {"daily": {}, "weekly": {}, "challenge": {}}
+    recent_games = db.execute(
+        select(Game.user_id, Game.total_score, Game.completed_at, Game.challenge_date)
+        .where(Game.completed_at >= cutoff)
+    )
+    for user_id, score, completed_at, challenge_date in recent_games:
+        for period, when in _boards_for_game(completed_at, challenge_date):
+            if period not in boards or _bucket_expiry(period, when) <= now:
+                continue
+            bucket = boards[period].setdefault(_bucket(period, when), {"when": when, "scores": {}})
+            member = str(user_id)
+            bucket["scores"][member] = max(bucket["scores"].get(member, 0), score or 0)
+
+    ranked_users = {str(user_id) for user_id, _ in best_ever}
+    for by_bucket in boards.values():
+        for bucket in by_bucket.values():
+            ranked_users.update(bucket["scores"])
+    usernames = {
+        str(user_id): username
+        for user_id, username in db.execute(
+            select(User.id, User.username).where(User.id.in_([int(member) for member in ranked_users]))
+        )
+    }
+    for i in range(0, len(usernames), REBUILD_BATCH_SIZE):
+        batch = dict(list(usernames.items())[i:i + REBUILD_BATCH_SIZE])
+        redis_client.hset(LEADERBOARD_USERNAMES_KEY, mapping=batch)
+
+    _replace_board(leaderboard_key("global"), {str(user_id): score or 0 for user_id, score in best_ever}, None)
+    for period, by_bucket in boards.items():
+        for bucket in by_bucket.values():
+            _replace_board(leaderboard_key(period, bucket["when"]), bucket["scores"], _bucket_expiry(period, bucket["when"]))
+
+    return {"global": 1, **{period: len(by_bucket) for period, by_bucket in boards.items()}}
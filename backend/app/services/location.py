@@ -5,7 +5,10 @@ This module provides geographic location services for the GeoGuessr-WA applicati
 It handles geocoding, coordinate operations, and location-related database operations.
 
 Features:
-- Reverse geocoding (coordinates to address)
+- Reverse geocoding (coordinates to address) with an LRU/TTL cache
+- Offline geocoding from bundled OSM data, with Nominatim as a fallback
+- Persistent per-location address storage
+- Async geocoding with bounded concurrency and per-lookup timeouts
 - Location data retrieval from database
 - Distance calculation using the Haversine formula
 - Panorama ID management for Street View
@@ -13,20 +16,30 @@ Features:
 Dependencies:
 - Geopy: For geocoding operations
 - SQLAlchemy: For database queries
-- Math: For geographical calculations
+- app.services.scoring: Haversine distance (NumPy)
 - Environment variables: For API keys and database configuration
 """
 
-from sqlalchemy import func
-import math
+from sqlalchemy import func, select, update
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from geopy.geocoders import Nominatim
 from dotenv import load_dotenv
+import logging
 import os
-from app.db import get_db
+from app.db import get_db, get_async_db
 from app.models import Location
+from app.services.cache import TTLCache
+from app.services.offline_geocoder import offline_geocoder
+from app.services.location_index import location_index, IndexedLocation
+from app.services.redis_client import redis_client, async_redis_client, redis_breaker
+from app.services.scoring import haversine_distance
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 load_dotenv(verbose=True)
 
@@ -37,18 +50,69 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_HOST = os.getenv("DB_HOST")
 DB_PORT = os.getenv("DB_PORT")
 
+# Reverse geocoder backend: "offline" (bundled OSM data, Nominatim fallback) or "nominatim"
+GEOCODER_BACKEND = os.getenv("GEOCODER_BACKEND", "offline").lower()
+
 # Initialize geocoding service
 geolocator = Nominatim(user_agent="geoguessr-wa-project")
 
 # Google Maps API key for advanced features
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Reverse-geocode cache for guess coordinates
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_CACHE_TTL_SECONDS = float(os.getenv("GEOCODE_CACHE_TTL_SECONDS", "86400"))
+# Decimal places kept when rounding coordinates for the cache key (4 places is roughly 11 m)
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", "4"))
+
+address_cache = TTLCache(maxsize=GEOCODE_CACHE_SIZE, ttl=GEOCODE_CACHE_TTL_SECONDS)
+
+# Redis hash of location id -> address, shared between workers
+LOCATION_ADDRESSES_KEY = "locations:addresses"
+
+# Shown for a location whose address couldn't be resolved
+UNKNOWN_ADDRESS = "Unknown location"
+
+# Async geocoding: maximum lookups in flight per worker, and per-lookup timeout
+GEOCODER_CONCURRENCY = int(os.getenv("GEOCODER_CONCURRENCY", "5"))
+GEOCODER_TIMEOUT_SECONDS = float(os.getenv("GEOCODER_TIMEOUT_SECONDS", "3"))
+
+geocoder_executor = ThreadPoolExecutor(max_workers=GEOCODER_CONCURRENCY, thread_name_prefix="geocoder")
+
+
+def _address_cache_key(lat: float, lng: float):
+    """Round coordinates so guesses a few meters apart share a cache entry"""
+    return round(lat, GEOCODE_CACHE_PRECISION), round(lng, GEOCODE_CACHE_PRECISION)
+
+
+def geocode_with_nominatim(lat: float, lng: float):
+    """
+    Reverse geocode coordinates with the Nominatim web service
+
+    Args:
+        lat (float): Latitude coordinate
+        lng (float): Longitude coordinate
+
+    Returns:
+        str: Formatted address string, or None if geocoding fails
+    """
+    try:
+        location = geolocator.geocode(f"{lat},{lng}", exactly_one=True)
+    except Exception:
+        return None
+    return location.address if location else None
+
 
 def get_address_from_coordinates(lat: float, lng: float):
     """
     Convert latitude/longitude coordinates to a human-readable address
 
-    Uses Nominatim geocoder to perform reverse geocoding.
+    The backend is picked with GEOCODER_BACKEND: "offline" resolves the
+    nearest named road from the bundled OSM extract and only falls back to
+    Nominatim when nothing is in range; "nominatim" always uses the web
+    service. Results are kept in an in-process LRU/TTL cache keyed on the
+    rounded coordinates, so repeated lookups for (nearly) the same point
+    never geocode twice.
 
     Args:
         lat (float): Latitude coordinate
@@ -57,48 +121,338 @@ def get_address_from_coordinates(lat: float, lng: float):
     Returns:
         str: Formatted address string, or None if geocoding fails
     """
+    cache_key = _address_cache_key(lat, lng)
+    cached_address = address_cache.get(cache_key)
+    if cached_address is not None:
+        return cached_address
+
+    address = None
+    if GEOCODER_BACKEND == "offline":
+        try:
+            address = offline_geocoder.reverse(lat, lng)
+        except Exception:
+            logger.exception("Offline geocoder failed, falling back to Nominatim")
+
+    if not address:
+        address = geocode_with_nominatim(lat, lng)
+
+    if address:
+        # Only successful lookups are cached, so transient failures get retried
+        address_cache.set(cache_key, address)
+    return address
+
+
+async def get_address_from_coordinates_async(lat: float, lng: float, timeout: float = GEOCODER_TIMEOUT_SECONDS):
+    """
+    Non-blocking version of get_address_from_coordinates
+
+    The blocking geocoder call runs on a dedicated thread pool of
+    GEOCODER_CONCURRENCY workers, which also caps how many lookups are in
+    flight across the whole worker process. Cache hits return immediately
+    without touching the pool.
+
+    Args:
+        lat (float): Latitude coordinate
+        lng (float): Longitude coordinate
+        timeout (float): Seconds to wait before giving up on this lookup
+
+    Returns:
+        str: Formatted address string, or None if geocoding fails or times out
+    """
+    cached_address = address_cache.get(_address_cache_key(lat, lng))
+    if cached_address is not None:
+        return cached_address
+
+    loop = asyncio.get_running_loop()
     try:
-        location = geolocator.geocode(f"{lat},{lng}", exactly_one=True)
-        print(location)
-        return location.address if location else None
-    except Exception:
+        return await asyncio.wait_for(
+            loop.run_in_executor(geocoder_executor, get_address_from_coordinates, lat, lng),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Geocoding (%s, %s) timed out after %ss", lat, lng, timeout)
         return None
 
 
+async def get_addresses_from_coordinates_async(coordinates, timeout: float = GEOCODER_TIMEOUT_SECONDS):
+    """
+    Geocode several points concurrently
+
+    Total latency is that of the slowest single lookup rather than the sum.
+
+    Args:
+        coordinates (list[tuple[float, float]]): (lat, lng) pairs
+        timeout (float): Per-lookup timeout in seconds
+
+    Returns:
+        list[str]: Address (or None) for each pair, in the same order
+    """
+    return list(await asyncio.gather(
+        *(get_address_from_coordinates_async(lat, lng, timeout) for lat, lng in coordinates)
+    ))
+
+
+def remember_location_addresses(addresses_by_id: dict, share: bool = False):
+    """
+    Make resolved location addresses available without a database query
+
+    Addresses are recorded in this worker's location index. With `share`,
+    they are also written to the LOCATION_ADDRESSES_KEY Redis hash so other
+    workers, whose index was loaded before the address existed, can find them.
+
+    Args:
+        addresses_by_id (dict): Location id -> address string
+        share (bool): Also publish the addresses to Redis
+    """
+    for location_id, address in addresses_by_id.items():
+        location_index.set_address(location_id, address)
+
+    if share and addresses_by_id and redis_client is not None:
+        try:
+            redis_breaker.call(redis_client.hset, LOCATION_ADDRESSES_KEY, mapping=addresses_by_id)
+        except Exception as e:
+            logger.warning("Could not share location addresses: %s", e)
+
+
+def lookup_location_addresses(location_ids):
+    """
+    Resolve location ids to addresses without touching the database
+
+    Reads this worker's location index first and the shared Redis hash for
+    anything the index doesn't know yet.
+
+    Args:
+        location_ids (list[int]): Location primary keys
+
+    Returns:
+        list[str]: Address (or None if unknown) for each id, in the same order
+    """
+    addresses = [location_index.address_for(location_id) for location_id in location_ids]
+    missing = [location_id for location_id, address in zip(location_ids, addresses) if not address]
+
+    if missing and redis_client is not None:
+        try:
+            shared = dict(zip(missing, redis_breaker.call(redis_client.hmget, LOCATION_ADDRESSES_KEY, missing)))
+        except Exception as e:
+            logger.warning("Could not read shared location addresses: %s", e)
+            shared = {}
+        addresses = [address or shared.get(location_id) for location_id, address in zip(location_ids, addresses)]
+
+    return addresses
+
+
+async def remember_location_addresses_async(addresses_by_id: dict, share: bool = False):
+    """
+    Async version of remember_location_addresses; shares through the asyncio Redis client
+
+    Args:
+        addresses_by_id (dict): Location id -> address string
+        share (bool): Also publish the addresses to Redis
+    """
+    for location_id, address in addresses_by_id.items():
+        location_index.set_address(location_id, address)
+
+    if share and addresses_by_id and async_redis_client is not None:
+        try:
+            await redis_breaker.call_async(async_redis_client.hset, LOCATION_ADDRESSES_KEY, mapping=addresses_by_id)
+        except Exception as e:
+            logger.warning("Could not share location addresses: %s", e)
+
+
+async def lookup_location_addresses_async(location_ids):
+    """
+    Async version of lookup_location_addresses; reads the shared hash through the asyncio Redis client
+
+    Args:
+        location_ids (list[int]): Location primary keys
+
+    Returns:
+        list[str]: Address (or None if unknown) for each id, in the same order
+    """
+    addresses = [location_index.address_for(location_id) for location_id in location_ids]
+    missing = [location_id for location_id, address in zip(location_ids, addresses) if not address]
+
+    if missing and async_redis_client is not None:
+        try:
+            shared = dict(zip(missing, await redis_breaker.call_async(async_redis_client.hmget, LOCATION_ADDRESSES_KEY, missing)))
+        except Exception as e:
+            logger.warning("Could not read shared location addresses: %s", e)
+            shared = {}
+        addresses = [address or shared.get(location_id) for location_id, address in zip(location_ids, addresses)]
+
+    return addresses
+
+
+def _get_stored_addresses(location_ids, db: Session):
+    """Read already-geocoded addresses for the given location ids"""
+    return dict(db.query(Location.id, Location.address).filter(Location.id.in_(location_ids)).all())
+
+
+def _store_addresses(addresses_by_id: dict, db: Session):
+    """Persist newly geocoded addresses on the locations table"""
+    if not addresses_by_id:
+        return
+
+    # Bulk UPDATEs skip the ORM flush and don't invalidate the location index
+    for location_id, address in addresses_by_id.items():
+        db.query(Location).filter(Location.id == location_id).update(
+            {Location.address: address}, synchronize_session=False
+        )
+    db.commit()
+
+
+def _known_addresses(locations):
+    """Addresses this worker's location index already holds, keyed by location id"""
+    known = {}
+    for location in locations:
+        address = location_index.address_for(location.id)
+        if address:
+            known[location.id] = address
+    return known
+
+
+def get_location_addresses(locations, db: Session = Depends(get_db)):
+    """
+    Get the address string for each of the given locations
+
+    Addresses are stored on the locations table the first time a location is
+    geocoded, so every later game that draws it reads the stored value
+    instead of calling the geocoder again. Addresses already held by the
+    location index skip the database entirely.
+
+    Args:
+        locations (list[IndexedLocation]): Locations to resolve
+        db (Session): Database session dependency
+
+    Returns:
+        list[str]: Address for each location, in the same order
+    """
+    stored = _known_addresses(locations)
+    unknown_ids = [location.id for location in locations if location.id not in stored]
+    if unknown_ids:
+        stored.update(_get_stored_addresses(unknown_ids, db))
+
+    newly_geocoded = {}
+    for location in locations:
+        if not stored.get(location.id):
+            address = get_address_from_coordinates(location.lat, location.lng)
+            if address:
+                newly_geocoded[location.id] = address
+
+    _store_addresses(newly_geocoded, db)
+    stored.update(newly_geocoded)
+    remember_location_addresses({location_id: address for location_id, address in stored.items() if address})
+    remember_location_addresses(newly_geocoded, share=True)
+    return [stored.get(location.id) or UNKNOWN_ADDRESS for location in locations]
+
+
+async def get_location_addresses_async(locations, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of get_location_addresses
+
+    Stored addresses are read in one query; every missing one is geocoded
+    concurrently with get_addresses_from_coordinates_async.
+
+    Args:
+        locations (list[IndexedLocation]): Locations to resolve
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        list[str]: Address for each location, in the same order
+    """
+    stored = _known_addresses(locations)
+    unknown_ids = [location.id for location in locations if location.id not in stored]
+    if unknown_ids:
+        result = await db.execute(select(Location.id, Location.address).where(Location.id.in_(unknown_ids)))
+        stored.update(result.all())
+    missing = [location for location in locations if not stored.get(location.id)]
+
+    geocoded = await get_addresses_from_coordinates_async([(location.lat, location.lng) for location in missing])
+    newly_geocoded = {location.id: address for location, address in zip(missing, geocoded) if address}
+    if newly_geocoded:
+        for location_id, address in newly_geocoded.items():
+            await db.execute(update(Location).where(Location.id == location_id).values(address=address))
+        await db.commit()
+
+    stored.update(newly_geocoded)
+    remember_location_addresses({location_id: address for location_id, address in stored.items() if address})
+    await remember_location_addresses_async(newly_geocoded, share=True)
+    return [stored.get(location.id) or UNKNOWN_ADDRESS for location in locations]
+
+
 def get_random_pano_id(random_id: int, db: Session = Depends(get_db)):
     """
-    Retrieve a panorama ID from the database by location ID
+    Retrieve a random panorama ID
 
-    Gets the Street View panorama ID for a specific location,
-    used to display the location in Street View for the game.
+    Picks a random playable location from the in-memory location index,
+    used to display the location in Street View for the game. The database
+    is only touched when the index needs to be (re)loaded.
 
     Args:
-        random_id (int): Database ID of the location
+        random_id (int): Unused, kept for backwards compatibility
         db (Session): Database session dependency
 
     Returns:
         str: Panorama ID string, or error dict if not found
     """
+    location_index.ensure_fresh(db)
+
+    if not location_index.is_loaded:
+        return {"error": "No valid locations found"}
+
+    return location_index.random_pano_id()
+
+
+def sample_locations(n: int, db: Session = Depends(get_db)):
+    """
+    Draw `n` distinct random locations for a game
+
+    Served from the in-memory location index, so no duplicates can show up in
+    a single game and no database round trip is needed once the index is
+    loaded. If the index cannot hold enough locations, a single
+    `ORDER BY random() LIMIT n` query is used instead.
+
+    Args:
+        n (int): Number of locations to draw
+        db (Session): Database session dependency
+
+    Returns:
+        list[IndexedLocation]: Distinct locations with id, pano_id, lat and lng
+
+    Raises:
+        ValueError: If fewer than `n` playable locations exist
+    """
+    location_index.ensure_fresh(db)
 
-    while True:
-        # Get a random location that has a pano_id
-        location = db.query(Location).filter(
-            Location.pano_id.isnot(None),
-            Location.pano_id != ''
-        ).order_by(func.random() * 3642).first()
+    if len(location_index) >= n:
+        return location_index.sample(n)
 
-        if location and location.pano_id:
-            return location.pano_id
+    rows = db.query(Location.id, Location.pano_id, Location.latitude, Location.longitude).filter(
+        Location.pano_id.isnot(None),
+        Location.pano_id != ''
+    ).order_by(func.random()).limit(n).all()
 
-        # If no locations found at all, break to avoid infinite loop
+    if len(rows) < n:
+        raise ValueError(f"Not enough locations to sample {n}")
 
-        total_locations = db.query(Location).filter(
-            Location.pano_id.isnot(None),
-            Location.pano_id != ''
-        ).count()
+    return [IndexedLocation(row.id, row.pano_id, float(row.latitude), float(row.longitude)) for row in rows]
 
-        if total_locations == 0:
-            return {"error": "No valid locations found"}
+
+async def sample_locations_async(n: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Async version of sample_locations
+
+    Once the location index is loaded this never touches the database; the
+    (rare) index reload or fallback query runs through the async session.
+
+    Args:
+        n (int): Number of locations to draw
+        db (AsyncSession): Async database session dependency
+
+    Returns:
+        list[IndexedLocation]: Distinct locations with id, pano_id, lat and lng
+    """
+    return await db.run_sync(lambda session: sample_locations(n, session))
 
 
 def get_coords_from_pano_id(pano_id: str, db: Session = Depends(get_db)):
@@ -115,9 +469,9 @@ def get_coords_from_pano_id(pano_id: str, db: Session = Depends(get_db)):
     Returns:
         dict: Dictionary containing 'lat' and 'lng' keys with coordinate values
     """
-    lat = db.query(Location.latitude).filter(Location.pano_id == pano_id).scalar()
-    lng = db.query(Location.longitude).filter(Location.pano_id == pano_id).scalar()
-    
+    row = db.query(Location.latitude, Location.longitude).filter(Location.pano_id == pano_id).first()
+    lat, lng = row if row else (None, None)
+
     if lat is None or lng is None:
         raise ValueError("Location not found")
 
@@ -140,27 +494,8 @@ def haversine_formula(lat1, lng1, lat2, lng2):
     Returns:
         float: Distance between points in kilometers
     """
-    # Earth's radius in kilometers
-    r = 6371
-
-    # Convert latitude and longitude from degrees to radians
-    lat1_radians = math.radians(lat1)
-    lat2_radians = math.radians(lat2)
-    lng1_radians = math.radians(lng1)
-    lng2_radians = math.radians(lng2)
-
-
-    # Calculate differences
-    difference_in_lat = lat2_radians - lat1_radians
-    difference_in_lng = lng2_radians - lng1_radians
-
-    # Haversine formula calculation
-    a = (pow(math.sin(difference_in_lat/2), 2)) + \
-        (math.cos(lat1_radians)) * (math.cos(lat2_radians)) * \
-        (pow(math.sin(difference_in_lng/2), 2))
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    d = r * c
-    return d
+    # Plain-math twin of the batch scoring engine's haversine_distances
+    return haversine_distance(lat1, lng1, lat2, lng2)
 
 
 
@@ -0,0 +1,301 @@
+"""
+Location Index Module
+
+This module keeps an in-memory index of every playable location so that random
+location selection never has to touch the database.
+
+Instead of asking Postgres for `ORDER BY random() LIMIT 1` (which sorts the whole
+locations table on every call), the index loads the table once into compact
+parallel arrays and picks a random slot in O(1).
+
+Features:
+- Compact storage: ids, latitudes and longitudes live in typed `array` buffers
+- O(1) random selection with no database round trip
+- Loaded once at application startup
+- Refreshed when the locations table changes, either through ORM events in
+  this process or a periodic row-count/max-id check for out-of-process writers
+  (e.g. generate_locations.py)
+
+Configuration (environment variables):
+- LOCATION_INDEX_REFRESH_SECONDS: How often to re-check the table for
+  out-of-process changes (default 300)
+
+Dependencies:
+- SQLAlchemy: For loading the locations table
+- app.models: Location model definition
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import NamedTuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.models import Location
+
+logger = logging.getLogger(__name__)
+
+# How long the index is trusted before checking the table for outside changes
+LOCATION_INDEX_REFRESH_SECONDS = float(os.getenv("LOCATION_INDEX_REFRESH_SECONDS", "300"))
+
+
+class IndexedLocation(NamedTuple):
+    """
+    Lightweight, read-only view of one playable location
+
+    Attributes:
+        id (int): Location primary key
+        pano_id (str): Street View panorama ID
+        lat (float): Latitude
+        lng (float): Longitude
+    """
+    id: int
+    pano_id: str
+    lat: float
+    lng: float
+
+
+class LocationIndex:
+    """
+    In-memory index of playable locations
+
+    Stores the locations table as parallel arrays, where slot `i` of every
+    array describes the same location. Only locations with a non-empty
+    pano_id are indexed, since those are the only ones that can be played.
+
+    Attributes:
+        ids (array): Location primary keys
+        lats (array): Location latitudes
+        lngs (array): Location longitudes
+        pano_ids (list): Street View panorama IDs
+        addresses (list): Stored address strings (None until geocoded)
+    """
+
+    def __init__(self, refresh_seconds: float = LOCATION_INDEX_REFRESH_SECONDS):
+        self.ids = array("i")
+        self.lats = array("d")
+        self.lngs = array("d")
+        self.pano_ids = []
+        self.addresses = []
+        self.refresh_seconds = refresh_seconds
+        self._signature = None
+        self._checked_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the index currently holds any locations"""
+        return len(self.ids) > 0
+
+    def mark_dirty(self):
+        """Flag the index for a reload on its next use"""
+        self._dirty = True
+
+    @staticmethod
+    def _playable(query):
+        return query.filter(Location.pano_id.isnot(None), Location.pano_id != '')
+
+    def _table_signature(self, db: Session):
+        """
+        Cheap fingerprint of the locations table
+
+        A change in row count or highest id means locations were added or removed.
+
+        Args:
+            db (Session): Database session
+
+        Returns:
+            tuple: (row_count, max_id)
+        """
+        count, max_id = self._playable(db.query(func.count(Location.id), func.max(Location.id))).one()
+        return int(count or 0), int(max_id or 0)
+
+    def load(self, db: Session):
+        """
+        (Re)load every playable location from the database
+
+        The new arrays are built off to the side and swapped in at the end, so
+        readers never see a half-built index.
+
+        Args:
+            db (Session): Database session
+        """
+        ids = array("i")
+        lats = array("d")
+        lngs = array("d")
+        pano_ids = []
+        addresses = []
+
+        rows = self._playable(
+            db.query(Location.id, Location.latitude, Location.longitude, Location.pano_id, Location.address)
+        ).order_by(Location.id)
+
+        for location_id, lat, lng, pano_id, address in rows.yield_per(1000):
+            ids.append(location_id)
+            lats.append(lat)
+            lngs.append(lng)
+            pano_ids.append(pano_id)
+            addresses.append(address)
+
+        with self._lock:
+            self.ids, self.lats, self.lngs, self.pano_ids, self.addresses = ids, lats, lngs, pano_ids, addresses
+            self._signature = (len(ids), ids[-1] if ids else 0)
+            self._checked_at = time.monotonic()
+            self._dirty = False
+
+        logger.info("Location index loaded with %d locations", len(ids))
+
+    def ensure_fresh(self, db: Session):
+        """
+        Reload the index if it is empty, dirty or possibly stale
+
+        The staleness check only runs once every `refresh_seconds`, so the
+        common path costs nothing.
+
+        Args:
+            db (Session): Database session used if a check or reload is needed
+        """
+        if self._dirty or not self.is_loaded:
+            self.load(db)
+            return
+
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+
+        self._checked_at = time.monotonic()
+        if self._table_signature(db) != self._signature:
+            self.load(db)
+
+    async def ensure_fresh_async(self, db):
+        """
+        Async version of ensure_fresh for use with an AsyncSession
+
+        Args:
+            db (AsyncSession): Async database session used if a check or reload is needed
+        """
+        await db.run_sync(self.ensure_fresh)
+
+    def _slot_for(self, location_id: int):
+        """Find a location's slot by binary search (ids are stored in ascending order)"""
+        ids = self.ids
+        slot = bisect_left(ids, location_id)
+        if slot < len(ids) and ids[slot] == location_id:
+            return slot
+        return None
+
+    def address_for(self, location_id: int):
+        """
+        Look up a location's stored address
+
+        Args:
+            location_id (int): Location primary key
+
+        Returns:
+            str: Address string, or None if unknown to this index
+        """
+        with self._lock:
+            slot = self._slot_for(location_id)
+            return self.addresses[slot] if slot is not None else None
+
+    def set_address(self, location_id: int, address: str):
+        """
+        Record a newly resolved address without reloading the index
+
+        Args:
+            location_id (int): Location primary key
+            address (str): Address string
+        """
+        with self._lock:
+            slot = self._slot_for(location_id)
+            if slot is not None:
+                self.addresses[slot] = address
+
+    def random_slot(self) -> int:
+        """
+        Pick a random slot in the index
+
+        Returns:
+            int: Index into the parallel arrays
+
+        Raises:
+            LookupError: If the index holds no locations
+        """
+        if not self.is_loaded:
+            raise LookupError("Location index is empty")
+        return random.randrange(len(self.ids))
+
+    def random_pano_id(self) -> str:
+        """
+        Pick a random panorama ID in O(1)
+
+        Returns:
+            str: Street View panorama ID
+        """
+        # Read a single snapshot so a concurrent reload can't shrink the list under us
+        pano_ids = self.pano_ids
+        if not pano_ids:
+            raise LookupError("Location index is empty")
+        return pano_ids[random.randrange(len(pano_ids))]
+
+    def sample(self, n: int, rng: random.Random = None):
+        """
+        Pick `n` distinct random locations
+
+        Args:
+            n (int): Number of locations to draw
+            rng (random.Random): Seeded generator for a reproducible draw (the
+                index is ordered by id, so the same seed and locations give the
+                same result in every process)
+
+        Returns:
+            list[IndexedLocation]: Distinct locations in random order
+
+        Raises:
+            ValueError: If the index holds fewer than `n` locations
+        """
+        with self._lock:
+            ids, lats, lngs, pano_ids = self.ids, self.lats, self.lngs, self.pano_ids
+
+        slots = (rng or random).sample(range(len(ids)), n)
+        return [IndexedLocation(ids[i], pano_ids[i], lats[i], lngs[i]) for i in slots]
+
+
+# Shared index used by the location services
+location_index = LocationIndex()
+
+
+def _mark_location_index_dirty(mapper, connection, target):
+    location_index.mark_dirty()
+
+
+def warm_location_index():
+    """
+    Load the shared location index at application startup
+
+    Failures are logged rather than raised so the API can still boot; the
+    index will then load lazily on first use.
+    """
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        location_index.load(db)
+    except Exception:
+        logger.exception("Could not load location index at startup")
+    finally:
+        db_gen.close()
+
+
+# Any insert/update/delete of a Location through the ORM in this process invalidates the index
+for _event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Location, _event_name, _mark_location_index_dirty)
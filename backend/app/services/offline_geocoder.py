@@ -0,0 +1,281 @@
+"""
+Offline Geocoder Module
+
+This module provides a local reverse geocoder for Washington State so guess
+scoring does not depend on an external geocoding service.
+
+It builds a uniform lat/lng grid over the named road features in the bundled
+OSM extract (`geoguessr-wa-locations.geojson`) and answers "what is the nearest
+named feature to this point" by scanning the grid cells around the query,
+which takes microseconds once the index is built.
+
+Features:
+- Grid spatial index over named OSM features
+- Nominatim-style address strings (road, county, state, zip)
+- State read from each feature's TIGER county tag, state route ref or ZIP code; other features
+  take the state of the nearest one that has it, so roads across the
+  Oregon/Idaho borders are not labelled Washington
+- Lazy, thread-safe loading on first use
+- Maximum search distance, so callers can fall back to another geocoder
+
+Configuration (environment variables):
+- OFFLINE_GEOCODER_DATA: Path to the GeoJSON feature file
+- OFFLINE_GEOCODER_MAX_DISTANCE_KM: Furthest a feature may be from the query point (default 25)
+
+Dependencies:
+- app.services.geojson_reader: Streaming GeoJSON parsing
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+
+from app.services.geojson_reader import iter_geojson_points
+
+logger = logging.getLogger(__name__)
+
+OFFLINE_GEOCODER_DATA = os.getenv(
+    "OFFLINE_GEOCODER_DATA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "geoguessr-wa-locations.geojson"),
+)
+OFFLINE_GEOCODER_MAX_DISTANCE_KM = float(os.getenv("OFFLINE_GEOCODER_MAX_DISTANCE_KM", "25"))
+
+# Grid cell size in degrees (about 5.5 km north-south)
+GRID_CELL_DEGREES = 0.05
+
+# Kilometers per degree of latitude
+KM_PER_DEGREE = 111.195
+
+# States the bundled extract reaches into, by the postal code TIGER uses in its county tags
+STATE_NAMES = {
+    "WA": "Washington",
+    "OR": "Oregon",
+    "ID": "Idaho",
+    "MT": "Montana",
+    "CA": "California",
+}
+
+
+# TIGER separates the counties of roads that span several with ";" (and occasionally ":")
+_COUNTY_SEPARATOR = re.compile(r"[;:]")
+
+# First three ZIP digits of those states (USPS ranges), for features without a county tag
+ZIP_PREFIX_STATES = (
+    (range(980, 995), "Washington"),
+    (range(970, 980), "Oregon"),
+    (range(832, 839), "Idaho"),
+    (range(590, 600), "Montana"),
+    (range(900, 962), "California"),
+)
+
+
+def feature_state(properties: dict):
+    """
+    State an OSM feature lies in, from its TIGER county tag, state route ref or ZIP code
+
+    Args:
+        properties (dict): GeoJSON feature properties
+
+    Returns:
+        str: State name, e.g. "Oregon" for "Umatilla, OR", or None if the feature carries none of them
+    """
+    county = properties.get("tiger:county")
+    if county:
+        _, _, code = _COUNTY_SEPARATOR.split(county)[0].partition(",")
+        code = code.strip().upper()
+        if code:
+            return STATE_NAMES.get(code, code)
+
+    # State routes are signed with the state's code, e.g. "WA 14" or "OR 11;US 395"
+    ref_code = (properties.get("ref") or "").split(" ")[0].upper()
+    if ref_code in STATE_NAMES:
+        return STATE_NAMES[ref_code]
+
+    zip_code = (properties.get("zip_left") or properties.get("zip_right") or "").split(";")[0].strip()
+    if len(zip_code) >= 3 and zip_code[:3].isdigit():
+        prefix = int(zip_code[:3])
+        for prefixes, state in ZIP_PREFIX_STATES:
+            if prefix in prefixes:
+                return state
+    return None
+
+
+def format_feature_address(properties: dict, state: str = None):
+    """
+    Build an address string from an OSM feature's properties
+
+    Mirrors the shape of Nominatim results, e.g.
+    "Lundy Lane, San Juan County, Washington, 98261, United States".
+
+    Args:
+        properties (dict): GeoJSON feature properties
+        state (str): State to use when the feature's own tags don't give one (left out if None)
+
+    Returns:
+        str: Address string, or None if the feature has no usable name
+    """
+    name = properties.get("name") or properties.get("tiger:name_base")
+    ref = properties.get("ref")
+    if name and ref and ref not in name:
+        label = f"{name} ({ref})"
+    else:
+        label = name or ref
+    if not label:
+        return None
+
+    parts = [label]
+    county = properties.get("tiger:county")
+    if county:
+        # TIGER stores counties as "King, WA"; several roads span more than one ("King, WA;Pierce, WA")
+        parts.append(f"{_COUNTY_SEPARATOR.split(county)[0].split(',')[0].strip()} County")
+    state = feature_state(properties) or state
+    if state:
+        parts.append(state)
+    zip_code = properties.get("zip_left") or properties.get("zip_right")
+    if zip_code:
+        parts.append(zip_code.split(";")[0].strip())
+    parts.append("United States")
+    return ", ".join(parts)
+
+
+class OfflineGeocoder:
+    """
+    Nearest-named-feature reverse geocoder backed by a uniform grid
+
+    Attributes:
+        path (str): GeoJSON file the index is built from
+        max_distance_km (float): Features further than this are not returned
+    """
+
+    def __init__(self, path: str = OFFLINE_GEOCODER_DATA, max_distance_km: float = OFFLINE_GEOCODER_MAX_DISTANCE_KM):
+        self.path = path
+        self.max_distance_km = max_distance_km
+        self._lats = []
+        self._lngs = []
+        self._addresses = []
+        self._grid = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cell(lat: float, lng: float):
+        return int(math.floor(lat / GRID_CELL_DEGREES)), int(math.floor(lng / GRID_CELL_DEGREES))
+
+    def load(self):
+        """
+        Build the grid index from the GeoJSON file
+
+        Only point features with a usable name are indexed. Features whose own
+        tags don't give their state are given the state of the nearest feature
+        whose tags do.
+        """
+        lats, lngs, features, grid = [], [], [], {}
+        # Streamed, so only the index is held in memory, not the whole document
+        for lat, lng, properties in iter_geojson_points(self.path):
+            if not format_feature_address(properties):
+                continue
+
+            grid.setdefault(self._cell(lat, lng), []).append(len(lats))
+            lats.append(lat)
+            lngs.append(lng)
+            features.append(properties)
+
+        states = [feature_state(properties) for properties in features]
+        stated_grid = {}
+        for slot, state in enumerate(states):
+            if state:
+                stated_grid.setdefault(self._cell(lats[slot], lngs[slot]), []).append(slot)
+
+        addresses = []
+        for slot, properties in enumerate(features):
+            state = states[slot]
+            if state is None:
+                nearest_slot, _ = self._nearest_slot(lats[slot], lngs[slot], stated_grid, lats, lngs)
+                state = states[nearest_slot] if nearest_slot is not None else None
+            addresses.append(format_feature_address(properties, state))
+
+        self._lats, self._lngs, self._addresses = lats, lngs, addresses
+        self._grid = grid
+        logger.info("Offline geocoder indexed %d named features from %s", len(lats), self.path)
+
+    def ensure_loaded(self):
+        """Build the index if it hasn't been built yet"""
+        if self._grid is None:
+            with self._lock:
+                if self._grid is None:
+                    self.load()
+
+    def _nearest_slot(self, lat: float, lng: float, grid: dict, lats: list, lngs: list):
+        """
+        Find the closest indexed point in `grid` within max_distance_km
+
+        Scans rings of grid cells outward from the query cell and stops once
+        no unscanned cell can hold anything closer than the best match.
+
+        Returns:
+            tuple: (slot, distance_km), or (None, None) if nothing is within range
+        """
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        # Distance covered by one cell in the narrower (east-west) direction
+        cell_km = GRID_CELL_DEGREES * KM_PER_DEGREE * cos_lat
+        max_ring = int(math.ceil(self.max_distance_km / cell_km)) + 1
+
+        center_x, center_y = self._cell(lat, lng)
+        best_slot, best_km = None, self.max_distance_km
+
+        for ring in range(max_ring + 1):
+            # Every cell in this ring is at least (ring - 1) cells away from the query point
+            if best_slot is not None and (ring - 1) * cell_km > best_km:
+                break
+
+            for x in range(center_x - ring, center_x + ring + 1):
+                for y in range(center_y - ring, center_y + ring + 1):
+                    if max(abs(x - center_x), abs(y - center_y)) != ring:
+                        continue
+                    for slot in grid.get((x, y), ()):
+                        # Equirectangular approximation is accurate to well under 1% at these ranges
+                        d_lat = (lats[slot] - lat) * KM_PER_DEGREE
+                        d_lng = (lngs[slot] - lng) * KM_PER_DEGREE * cos_lat
+                        distance_km = math.hypot(d_lat, d_lng)
+                        if distance_km <= best_km:
+                            best_slot, best_km = slot, distance_km
+
+        if best_slot is None:
+            return None, None
+        return best_slot, best_km
+
+    def nearest(self, lat: float, lng: float):
+        """
+        Find the nearest named feature to a point
+
+        Args:
+            lat (float): Latitude coordinate
+            lng (float): Longitude coordinate
+
+        Returns:
+            tuple: (address, distance_km), or (None, None) if nothing is within range
+        """
+        self.ensure_loaded()
+        slot, distance_km = self._nearest_slot(lat, lng, self._grid, self._lats, self._lngs)
+        if slot is None:
+            return None, None
+        return self._addresses[slot], distance_km
+
+    def reverse(self, lat: float, lng: float):
+        """
+        Reverse geocode a point to the nearest named feature's address
+
+        Args:
+            lat (float): Latitude coordinate
+            lng (float): Longitude coordinate
+
+        Returns:
+            str: Address string, or None if no feature is within range
+        """
+        address, _ = self.nearest(lat, lng)
+        return address
+
+
+# Shared geocoder instance, loaded on first use
+offline_geocoder = OfflineGeocoder()
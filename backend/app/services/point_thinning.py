@@ -0,0 +1,80 @@
+"""
+Point Thinning Module
+
+This module reduces a stream of candidate points to a set where no two points
+are closer than a minimum spacing. OSM road data has many features within a
+few meters of each other, and these would all resolve to the same Street View
+panorama. Thinning them out before any lookup saves API calls, avoids duplicate
+inserts, and spreads the location pool evenly across the map.
+
+Points are binned into a uniform grid of square cells (in degrees, one cell per
+`min_spacing` of latitude). A point is kept only if no previously kept point
+within `min_spacing` sits in its cell or the neighbouring ones. The first point
+seen in an area wins, so the output is deterministic for a given input order.
+
+Features:
+- Streaming: points are yielded as soon as they are accepted
+- Memory proportional to the number of kept points
+- Exact duplicate removal when the spacing is 0
+
+Dependencies:
+- Standard library only
+"""
+
+import math
+
+# Meters per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320
+
+
+def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance in meters, accurate at thinning distances"""
+    x = math.radians(lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return math.hypot(x, y) * 6371000
+
+
+def thin_points(points, min_spacing_m: float):
+    """
+    Drop points that are within `min_spacing_m` of a point already kept
+
+    Args:
+        points: Iterable of dicts with 'lat' and 'lng' keys
+        min_spacing_m (float): Minimum distance between kept points, in meters
+            (0 only removes exact duplicates)
+
+    Yields:
+        dict: The kept points, in input order
+    """
+    if min_spacing_m <= 0:
+        seen = set()
+        for point in points:
+            key = (point["lat"], point["lng"])
+            if key not in seen:
+                seen.add(key)
+                yield point
+        return
+
+    cell_degrees = min_spacing_m / METERS_PER_DEGREE
+    grid = {}
+
+    for point in points:
+        lat, lng = point["lat"], point["lng"]
+        row = math.floor(lat / cell_degrees)
+        col = math.floor(lng / cell_degrees)
+
+        # A degree of longitude is shorter than a degree of latitude away from the
+        # equator, so the search has to reach further across columns than rows
+        col_reach = math.ceil(1 / max(math.cos(math.radians(lat)), 1e-6))
+
+        too_close = any(
+            _distance_m(lat, lng, kept_lat, kept_lng) < min_spacing_m
+            for r in range(row - 1, row + 2)
+            for c in range(col - col_reach, col + col_reach + 1)
+            for kept_lat, kept_lng in grid.get((r, c), ())
+        )
+        if too_close:
+            continue
+
+        grid.setdefault((row, col), []).append((lat, lng))
+        yield point
@@ -6,16 +6,183 @@ in the GeoGuessr-WA application.
 
 This version is configured to securely connect to cloud providers like Upstash
 by modifying the URL scheme to 'rediss' for older library compatibility.
+
+Both clients share one set of connection settings: a bounded connection pool,
+short socket timeouts, retries with exponential backoff and periodic health
+checks, so a slow Redis makes requests fail quickly instead of hanging. A
+circuit breaker (`redis_breaker`) lets callers stop calling Redis altogether
+for a while after repeated failures and use a local fallback instead.
+
+Short-lived locks (`acquire_redis_lock` / `release_redis_lock`) hold a random
+token per owner and are released with a compare-and-delete script, so a holder
+whose lock already expired can never delete a lock taken over by someone else.
+
+`async_redis_client` / `async_redis_binary_client` are redis.asyncio clients
+for the async route handlers, built with the same settings so that waiting on
+Redis never blocks the event loop. They share the circuit breaker with the
+sync clients.
+
+Configuration (environment variables):
+- REDIS_MAX_CONNECTIONS: Connections per client pool (default 50)
+- REDIS_SOCKET_TIMEOUT: Seconds to wait on a command (default 0.5)
+- REDIS_CONNECT_TIMEOUT: Seconds to wait for a new connection (default 1)
+- REDIS_RETRIES: Retries after a connection error or timeout (default 2)
+- REDIS_RETRY_BACKOFF_BASE / REDIS_RETRY_BACKOFF_CAP: Backoff bounds in seconds (default 0.05 / 0.5)
+- REDIS_HEALTH_CHECK_INTERVAL: Seconds an idle connection may sit before it is pinged on reuse (default 30)
+- REDIS_BREAKER_FAILURES: Consecutive failures that open the circuit (default 5)
+- REDIS_BREAKER_RESET_SECONDS: Seconds the circuit stays open before a trial call (default 10)
 """
 
-import redis
+import logging
 import os
+import secrets
+import threading
+import time
+
+import redis
+import redis.asyncio
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 # Get the Redis connection URL from the environment variables.
 REDIS_URL = os.getenv("REDIS_URL")
 
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))
+REDIS_RETRIES = int(os.getenv("REDIS_RETRIES", "2"))
+REDIS_RETRY_BACKOFF_BASE = float(os.getenv("REDIS_RETRY_BACKOFF_BASE", "0.05"))
+REDIS_RETRY_BACKOFF_CAP = float(os.getenv("REDIS_RETRY_BACKOFF_CAP", "0.5"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", "5"))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", "10"))
+
+# Errors that mean "Redis is unreachable or too slow", as opposed to a bad command
+REDIS_UNAVAILABLE_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+
+class RedisCircuitOpen(redis.exceptions.ConnectionError):
+    """Raised instead of calling Redis while the circuit breaker is open"""
+
+
+class RedisCircuitBreaker:
+    """
+    Fails Redis calls fast after repeated connection errors
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    raise RedisCircuitOpen immediately. Once `reset_seconds` have passed one
+    trial call is let through; success closes the circuit, failure re-opens it.
+
+    Attributes:
+        failure_threshold (int): Consecutive failures that open the circuit
+        reset_seconds (float): Seconds to stay open before a trial call
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 10):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being short-circuited"""
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_seconds
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run a Redis call through the breaker
+
+        Args:
+            func: Callable issuing the Redis command(s)
+            *args, **kwargs: Passed through to `func`
+
+        Returns:
+            Whatever `func` returns
+
+        Raises:
+            RedisCircuitOpen: If the circuit is open
+            redis.exceptions.ConnectionError / TimeoutError: If the call itself fails
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except REDIS_UNAVAILABLE_ERRORS:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        """
+        Await an async Redis call through the breaker
+
+        Same as `call`, for coroutine functions of the redis.asyncio clients.
+        """
+        self._before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except REDIS_UNAVAILABLE_ERRORS:
+            self._record_failure()
+            raise
+        self._record_success()
+        return result
+
+    def _before_call(self):
+        with self._lock:
+            if self._opened_at is not None:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    raise RedisCircuitOpen("Redis circuit breaker is open")
+                # Let this call through as the trial; others keep failing fast until it finishes
+                self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Redis reachable again, closing circuit breaker")
+            self._failures = 0
+            self._opened_at = None
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Redis failed %d times in a row, opening circuit breaker", self._failures)
+                self._opened_at = time.monotonic()
+
+
+redis_breaker = RedisCircuitBreaker(REDIS_BREAKER_FAILURES, REDIS_BREAKER_RESET_SECONDS)
+
+
+def _client_options(decode_responses: bool, asyncio: bool = False) -> dict:
+    """Connection settings shared by every Redis client (sync and asyncio)"""
+    retry_class = AsyncRetry if asyncio else Retry
+    return {
+        "decode_responses": decode_responses,
+        "max_connections": REDIS_MAX_CONNECTIONS,
+        "socket_timeout": REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": REDIS_CONNECT_TIMEOUT,
+        "retry": retry_class(ExponentialBackoff(cap=REDIS_RETRY_BACKOFF_CAP, base=REDIS_RETRY_BACKOFF_BASE), REDIS_RETRIES),
+        "retry_on_error": list(REDIS_UNAVAILABLE_ERRORS),
+        "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+
 redis_client = None
 
+# Same server, but returns raw bytes; used for binary payloads such as msgpack game sessions
+redis_binary_client = None
+
+# asyncio counterparts of the two clients above, for async route handlers
+async_redis_client = None
+async_redis_binary_client = None
+
 # Only proceed if the REDIS_URL is actually set in the environment.
 if REDIS_URL:
     try:
@@ -32,7 +199,22 @@ if REDIS_URL:
         # Initialize the client from the modified URL.
         redis_client = redis.from_url(
             secure_redis_url,
-            decode_responses=True
+            **_client_options(decode_responses=True)
+        )
+
+        redis_binary_client = redis.from_url(
+            secure_redis_url,
+            **_client_options(decode_responses=False)
+        )
+
+        async_redis_client = redis.asyncio.from_url(
+            secure_redis_url,
+            **_client_options(decode_responses=True, asyncio=True)
+        )
+
+        async_redis_binary_client = redis.asyncio.from_url(
+            secure_redis_url,
+            **_client_options(decode_responses=False, asyncio=True)
         )
 
         # Ping the server to confirm the connection is live.
@@ -42,12 +224,79 @@ if REDIS_URL:
     except redis.exceptions.ConnectionError as e:
         print(f"CRITICAL: Could not connect to Redis. Error: {e}")
         redis_client = None
+        redis_binary_client = None
+        async_redis_client = None
+        async_redis_binary_client = None
     except Exception as e:
         # Catch other potential errors during startup
         print(f"An unexpected error occurred during Redis initialization: {e}")
         redis_client = None
+        redis_binary_client = None
+        async_redis_client = None
+        async_redis_binary_client = None
 else:
     # This will run if the REDIS_URL is missing in the environment.
     print("CRITICAL: REDIS_URL environment variable not found. Using local fallback.")
-    redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+    redis_client = redis.Redis(host='localhost', port=6379, db=0, **_client_options(decode_responses=True))
+    redis_binary_client = redis.Redis(host='localhost', port=6379, db=0, **_client_options(decode_responses=False))
+    async_redis_client = redis.asyncio.Redis(host='localhost', port=6379, db=0, **_client_options(decode_responses=True, asyncio=True))
+    async_redis_binary_client = redis.asyncio.Redis(host='localhost', port=6379, db=0, **_client_options(decode_responses=False, asyncio=True))
+
+
+async def close_async_redis_clients():
+    """Close the asyncio clients' connection pools (called on application shutdown)"""
+    for client in (async_redis_client, async_redis_binary_client):
+        if client is not None:
+            await client.aclose()
+
+
+# Deletes the lock only if it still holds the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_release_lock_script = redis_client.register_script(RELEASE_LOCK_SCRIPT) if redis_client is not None else None
+
+
+def new_lock_token() -> str:
+    """Random value identifying one holder of a lock"""
+    return secrets.token_hex(16)
+
+
+def acquire_redis_lock(key: str, ttl_seconds: int):
+    """
+    Take a short-lived Redis lock (SET NX EX) with a fresh random token
+
+    Args:
+        key (str): Lock key
+        ttl_seconds (int): Seconds until the lock expires on its own
+
+    Returns:
+        str: The token to release the lock with, or None if it is held by someone else
+
+    Raises:
+        redis.exceptions.ConnectionError: If Redis is unavailable
+    """
+    token = new_lock_token()
+    if redis_breaker.call(redis_client.set, key, token, nx=True, ex=ttl_seconds):
+        return token
+    return None
+
+
+def release_redis_lock(key: str, token: str) -> bool:
+    """
+    Release a lock taken with acquire_redis_lock, only if the caller still holds it
+
+    Args:
+        key (str): Lock key
+        token (str): Token returned by acquire_redis_lock
+
+    Returns:
+        bool: True if the lock was deleted, False if it had expired or changed hands
 
+    Raises:
+        redis.exceptions.ConnectionError: If Redis is unavailable
+    """
+    return bool(redis_breaker.call(_release_lock_script, keys=[key], args=[token]))
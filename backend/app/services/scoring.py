@@ -0,0 +1,150 @@
+"""
+Scoring Engine Module
+
+This module computes guess distances and round scores for whole arrays of
+guesses at once, for work that scores many guesses together (leaderboard
+recomputation, replay analysis, bots and load tests).
+
+The single-guess helpers used by the game routes (`haversine_formula` and
+`get_score`) wrap the plain-math `haversine_distance` and `score_distance`,
+which apply the same operations in the same order without building arrays.
+Scores for a given distance are identical either way. Distances agree to about
+1e-12 km: NumPy's SIMD arctan2 can differ from the C library's in the last bit.
+
+Features:
+- Vectorized haversine distance between arrays of points
+- Vectorized linear score falloff, rounded exactly like the per-guess score
+- Broadcasting, so one target can be scored against many guesses (or vice versa)
+- Plain-math single-guess versions for the per-request path
+
+Dependencies:
+- NumPy: Array math
+"""
+
+import math
+
+import numpy as np
+
+# Earth's radius in kilometers
+EARTH_RADIUS_KM = 6371
+
+# Score for a perfect guess, and the distance (km) at which the score reaches zero
+MAX_SCORE = 5000
+MAX_SCORE_DISTANCE_KM = 500
+
+
+def haversine_distances(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distances between two sets of points
+
+    Inputs can be scalars or array-likes of matching (or broadcastable) shape.
+
+    Args:
+        lat1: Latitude(s) of the first points, in degrees
+        lng1: Longitude(s) of the first points, in degrees
+        lat2: Latitude(s) of the second points, in degrees
+        lng2: Longitude(s) of the second points, in degrees
+
+    Returns:
+        numpy.ndarray: Distances in kilometers (float64)
+    """
+    lat1_radians = np.radians(np.asarray(lat1, dtype=np.float64))
+    lat2_radians = np.radians(np.asarray(lat2, dtype=np.float64))
+    lng1_radians = np.radians(np.asarray(lng1, dtype=np.float64))
+    lng2_radians = np.radians(np.asarray(lng2, dtype=np.float64))
+
+    difference_in_lat = lat2_radians - lat1_radians
+    difference_in_lng = lng2_radians - lng1_radians
+
+    a = np.square(np.sin(difference_in_lat / 2)) + \
+        np.cos(lat1_radians) * np.cos(lat2_radians) * \
+        np.square(np.sin(difference_in_lng / 2))
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def score_distances(distances_km, max_score: int = MAX_SCORE, max_distance: int = MAX_SCORE_DISTANCE_KM):
+    """
+    Round scores for a set of distances
+
+    The score falls off linearly from `max_score` at 0 km to 0 at `max_distance`
+    and is rounded half-to-even, matching Python's round().
+
+    Args:
+        distances_km: Distance(s) off in kilometers (scalar or array-like)
+        max_score (int): Score for a perfect guess
+        max_distance (int): Distance at which the score reaches zero
+
+    Returns:
+        numpy.ndarray: Scores (int64)
+    """
+    distances_km = np.asarray(distances_km, dtype=np.float64)
+    scores = np.maximum(0, max_score * (1 - distances_km / max_distance))
+    return np.round(scores).astype(np.int64)
+
+
+def haversine_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two points, without NumPy
+
+    Same steps as haversine_distances, for scoring a single guess.
+
+    Args:
+        lat1 (float): Latitude of the first point, in degrees
+        lng1 (float): Longitude of the first point, in degrees
+        lat2 (float): Latitude of the second point, in degrees
+        lng2 (float): Longitude of the second point, in degrees
+
+    Returns:
+        float: Distance in kilometers
+    """
+    lat1_radians = math.radians(lat1)
+    lat2_radians = math.radians(lat2)
+    lng1_radians = math.radians(lng1)
+    lng2_radians = math.radians(lng2)
+
+    difference_in_lat = lat2_radians - lat1_radians
+    difference_in_lng = lng2_radians - lng1_radians
+
+    a = math.sin(difference_in_lat / 2) ** 2 + \
+        math.cos(lat1_radians) * math.cos(lat2_radians) * \
+        math.sin(difference_in_lng / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def score_distance(distance_km: float, max_score: int = MAX_SCORE, max_distance: int = MAX_SCORE_DISTANCE_KM) -> int:
+    """
+    Round score for a single distance, without NumPy
+
+    Same falloff and half-to-even rounding as score_distances.
+
+    Args:
+        distance_km (float): Distance off in kilometers
+        max_score (int): Score for a perfect guess
+        max_distance (int): Distance at which the score reaches zero
+
+    Returns:
+        int: Score
+    """
+    return round(max(0, max_score * (1 - distance_km / max_distance)))
+
+
+def score_guesses(guess_lats, guess_lngs, target_lats, target_lngs,
+                  max_score: int = MAX_SCORE, max_distance: int = MAX_SCORE_DISTANCE_KM):
+    """
+    Distances and scores for a batch of guesses against their targets
+
+    Args:
+        guess_lats: Latitudes of the guesses
+        guess_lngs: Longitudes of the guesses
+        target_lats: Latitudes of the actual locations
+        target_lngs: Longitudes of the actual locations
+        max_score (int): Score for a perfect guess
+        max_distance (int): Distance at which the score reaches zero
+
+    Returns:
+        tuple: (distances in km as float64 array, scores as int64 array)
+    """
+    distances = haversine_distances(guess_lats, guess_lngs, target_lats, target_lngs)
+    return distances, score_distances(distances, max_score, max_distance)
@@ -0,0 +1,218 @@
+"""
+Game Session Codec Module
+
+This module converts the game session dictionary used by the game routes to and
+from the compact binary form stored in Redis.
+
+Format history:
+- v1: JSON document with every field inlined, including five address strings
+- v2: msgpack array with fixed field positions; round addresses are referenced
+  by location id and resolved from the location index (or the shared Redis
+  address hash) when the session is read. No longer written; only decoded to
+  migrate sessions to v3
+- v3: the session is a Redis hash (see game_session). Only the part that never
+  changes during a game (the "layout": ids, pano ids, coordinates, address
+  references) is msgpack-encoded into one field; scores and counters are plain
+  hash fields so they can be updated in place
+
+Features:
+- Versioned encoding, so the format can evolve without breaking live sessions
+- Transparent reading of v1 JSON and v2 msgpack sessions during migration
+- Addresses stored by reference, with inline fallback for anything that can't be referenced
+
+The codec is pure: it never looks addresses up itself. Encoding takes the
+addresses the caller can already resolve from the location ids. Decoding leaves
+the inline overrides on the session ('inline_addresses'); the caller looks up
+the referenced addresses however suits it (sync or async) and passes them to
+resolve_session_addresses.
+
+Dependencies:
+- msgpack: Binary serialization
+"""
+
+import json
+
+import msgpack
+
+SESSION_FORMAT_VERSION = 3
+
+# Position of every field in a v2 session array (index 0 is the version)
+_V2_FIELDS = (
+    "game_id",
+    "round_id",
+    "user_id",
+    "current_round",
+    "number_of_locations",
+    "total_score",
+    "total_distance",
+    "rounds_completed",
+    "location_ids",
+    "all_pano_ids",
+    "game_lats",
+    "game_lngs",
+    "all_round_scores",
+    "all_round_distances",
+)
+
+# Defaults for fields a session may not have yet (e.g. before the first guess)
+_V2_DEFAULTS = {
+    "total_score": 0,
+    "total_distance": 0,
+    "rounds_completed": 0,
+    "location_ids": [],
+    "all_round_scores": [],
+    "all_round_distances": [],
+}
+
+
+def _inline_addresses(game_data: dict, referenced_addresses: list) -> dict:
+    """
+    Pick the round addresses that can't be stored by reference
+
+    An address only needs to be inlined when looking up its location id won't
+    give it back (legacy sessions without ids, or ids whose address isn't known).
+
+    Args:
+        game_data (dict): Game session
+        referenced_addresses (list): What a lookup by location id returns for each round
+
+    Returns:
+        dict: Inline addresses by round index
+    """
+    addresses = game_data.get("all_actual_string_locations", [])
+    return {
+        index: address
+        for index, address in enumerate(addresses)
+        if index >= len(referenced_addresses) or referenced_addresses[index] != address
+    }
+
+
+def resolve_session_addresses(game_data: dict, referenced_addresses: list) -> dict:
+    """
+    Finish decoding a session by filling in its round addresses
+
+    Args:
+        game_data (dict): Session from decode_session_layout or decode_game_session
+        referenced_addresses (list): Address (or None) looked up for each of the
+            session's 'location_ids', in the same order
+
+    Returns:
+        dict: The same session, with 'all_actual_string_locations' set (and
+            'current_string_location' for v2 sessions)
+    """
+    # v1 sessions carry their addresses already
+    if "inline_addresses" not in game_data:
+        return game_data
+
+    inline_addresses = game_data.pop("inline_addresses")
+    if game_data.get("location_ids"):
+        addresses = list(referenced_addresses)
+    else:
+        addresses = [None] * len(game_data["all_pano_ids"])
+    for index, address in inline_addresses.items():
+        addresses[index] = address
+    addresses = [address or "Unknown location" for address in addresses]
+    game_data["all_actual_string_locations"] = addresses
+
+    if "current_location_ref" in game_data:
+        current_location = game_data.pop("current_location_ref")
+        game_data["current_string_location"] = (
+            addresses[current_location] if isinstance(current_location, int) else current_location
+        )
+    return game_data
+
+
+def _decode_v2(packed: list) -> dict:
+    game_data = dict(zip(_V2_FIELDS, packed[1:1 + len(_V2_FIELDS)]))
+    game_data["inline_addresses"], game_data["current_location_ref"] = packed[1 + len(_V2_FIELDS):]
+    return game_data
+
+
+def decode_game_session(raw) -> dict:
+    """
+    Decode a stored game session, whatever format it was written in
+
+    Args:
+        raw (bytes | str): Value read from Redis
+
+    Returns:
+        dict: Game session dictionary; pass it to resolve_session_addresses to fill in its addresses
+
+    Raises:
+        ValueError: If the value is not a valid session in any known format
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+
+    # v1 sessions are JSON objects
+    if raw[:1] == b"{":
+        return json.loads(raw)
+
+    try:
+        packed = msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    except Exception as e:
+        raise ValueError(f"Invalid game session data: {e}") from e
+
+    if not isinstance(packed, list) or not packed:
+        raise ValueError("Invalid game session data")
+    if packed[0] == 2:
+        return _decode_v2(packed)
+    raise ValueError(f"Unknown game session format version {packed[0]}")
+
+
+# Position of every field in a v3 layout array (index 0 is the version)
+_LAYOUT_FIELDS = (
+    "game_id",
+    "user_id",
+    "number_of_locations",
+    "location_ids",
+    "all_pano_ids",
+    "game_lats",
+    "game_lngs",
+)
+
+
+def encode_session_layout(game_data: dict, referenced_addresses: list) -> bytes:
+    """
+    Encode the fixed part of a game session (v3)
+
+    Args:
+        game_data (dict): Game session as built by the game routes
+        referenced_addresses (list): What a lookup of the session's 'location_ids'
+            returns; rounds whose address matches are stored by reference only
+
+    Returns:
+        bytes: msgpack-encoded layout
+    """
+    inline_addresses = _inline_addresses(game_data, referenced_addresses)
+    packed = [SESSION_FORMAT_VERSION]
+    packed.extend(game_data.get(field, _V2_DEFAULTS.get(field)) for field in _LAYOUT_FIELDS)
+    packed.append(inline_addresses)
+    return msgpack.packb(packed, use_bin_type=True)
+
+
+def decode_session_layout(raw: bytes) -> dict:
+    """
+    Decode the fixed part of a game session (v3)
+
+    Args:
+        raw (bytes): Value of the session hash's layout field
+
+    Returns:
+        dict: Layout fields plus 'inline_addresses'; pass it to resolve_session_addresses
+            to fill in 'all_actual_string_locations'
+
+    Raises:
+        ValueError: If the value is not a valid v3 layout
+    """
+    try:
+        packed = msgpack.unpackb(raw, raw=False, strict_map_key=False)
+    except Exception as e:
+        raise ValueError(f"Invalid game session layout: {e}") from e
+
+    if not isinstance(packed, list) or not packed or packed[0] != SESSION_FORMAT_VERSION:
+        raise ValueError("Invalid game session layout")
+
+    layout = dict(zip(_LAYOUT_FIELDS, packed[1:1 + len(_LAYOUT_FIELDS)]))
+    layout["inline_addresses"] = packed[1 + len(_LAYOUT_FIELDS)]
+    return layout
@@ -0,0 +1,153 @@
+"""
+User Stats Service Module
+
+This module maintains the user_stats table: one row of lifetime totals per
+player (games played, total and best score, distance, last played). The row is
+updated incrementally, in the same transaction that finalizes a game, so
+reading a player's stats is a single primary key lookup no matter how many
+games they have played.
+
+Features:
+- Incremental upsert of a finished game's totals (INSERT ... ON CONFLICT DO UPDATE)
+- O(1) stats lookup for the profile endpoint
+- Full rebuild from games/user_rounds for existing data
+
+Dependencies:
+- SQLAlchemy: Dialect-specific upserts (PostgreSQL and SQLite)
+- app.models: UserStats, Game and UserRound models
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import Game, UserRound, UserStats
+
+_UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def record_finished_game(user_id: int, game_id: int, finished_at: datetime, db: Session):
+    """
+    Add a finished game to the user's stats row, creating it if needed
+
+    Does not commit: it is meant to run inside the transaction that finalizes
+    the game, so the stats and the game's completion are written together.
+    Must be called exactly once per game (finalize_game only calls it when its
+    UPDATE actually completed the game).
+
+    Args:
+        user_id (int): ID of the user who played the game
+        game_id (int): ID of the finished game
+        finished_at (datetime): When the game was finalized
+        db (Session): Database session
+    """
+    dialect = _UPSERT_DIALECTS[db.get_bind().dialect.name]
+
+    game_totals = select(
+        literal(user_id).label("user_id"),
+        literal(1).label("games_played"),
+        func.coalesce(func.sum(UserRound.round_score), 0).label("total_score"),
+        func.coalesce(func.sum(UserRound.round_score), 0).label("best_score"),
+        func.coalesce(func.sum(UserRound.distance_off), 0).label("total_distance"),
+        func.count(UserRound.distance_off).label("rounds_played"),
+        literal(finished_at).label("last_played_at"),
+    ).where(UserRound.game_id == game_id)
+
+    columns = ["user_id", "games_played", "total_score", "best_score", "total_distance", "rounds_played", "last_played_at"]
+    upsert = dialect.insert(UserStats).from_select(columns, game_totals)
+    excluded = upsert.excluded
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "games_played": UserStats.games_played + excluded.games_played,
+            "total_score": UserStats.total_score + excluded.total_score,
+            "best_score": case((UserStats.best_score >= excluded.best_score, UserStats.best_score),
+                               else_=excluded.best_score),
+            "total_distance": UserStats.total_distance + excluded.total_distance,
+            "rounds_played": UserStats.rounds_played + excluded.rounds_played,
+            "last_played_at": excluded.last_played_at,
+        },
+    )
+    db.execute(upsert)
+
+
+def get_user_stats(user_id: int, db: Session):
+    """
+    Read a user's lifetime stats
+
+    Args:
+        user_id (int): ID of the user
+        db (Session): Database session
+
+    Returns:
+        dict: 'games_played', 'total_score', 'best_score', 'average_score',
+            'average_distance' (km per round) and 'last_played_at'
+            (all zero / None for a user who hasn't finished a game)
+    """
+    stats = db.get(UserStats, user_id)
+    if stats is None:
+        return {
+            "games_played": 0,
+            "total_score": 0,
+            "best_score": 0,
+            "average_score": 0,
+            "average_distance": 0,
+            "last_played_at": None
+        }
+
+    return {
+        "games_played": stats.games_played,
+        "total_score": stats.total_score,
+        "best_score": stats.best_score,
+        "average_score": round(stats.total_score / stats.games_played, 2) if stats.games_played else 0,
+        "average_distance": round(stats.total_distance / stats.rounds_played, 2) if stats.rounds_played else 0,
+        "last_played_at": stats.last_played_at
+    }
+
+
+def backfill_user_stats(db: Session) -> int:
+    """
+    Rebuild the whole user_stats table from completed games
+
+    Replaces every row, so it is safe to run again (e.g. after a bug fix).
+    Commits when done.
+
+    Args:
+        db (Session): Database session
+
+    Returns:
+        int: Number of users with stats
+    """
+    per_game = (
+        select(
+            Game.user_id,
+            Game.completed_at,
+            func.coalesce(func.sum(UserRound.round_score), 0).label("score"),
+            func.coalesce(func.sum(UserRound.distance_off), 0).label("distance"),
+            func.count(UserRound.distance_off).label("rounds"),
+        )
+        .select_from(Game)
+        .outerjoin(UserRound, UserRound.game_id == Game.id)
+        .where(Game.completed_at.is_not(None))
+        .group_by(Game.id, Game.user_id, Game.completed_at)
+        .subquery()
+    )
+    per_user = select(
+        per_game.c.user_id,
+        func.count(),
+        func.sum(per_game.c.score),
+        func.max(per_game.c.score),
+        func.sum(per_game.c.distance),
+        func.sum(per_game.c.rounds),
+        func.max(per_game.c.completed_at),
+    ).group_by(per_game.c.user_id)
+
+    db.execute(delete(UserStats))
+    db.execute(insert(UserStats).from_select(
+        ["user_id", "games_played", "total_score", "best_score", "total_distance", "rounds_played", "last_played_at"],
+        per_user,
+    ))
+    db.commit()
+    return db.scalar(select(func.count()).select_from(UserStats))
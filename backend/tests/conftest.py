@@ -0,0 +1,104 @@
+"""
+Shared test setup
+
+The app is imported against a throwaway SQLite database and an in-process
+fakeredis server, so the suite runs without PostgreSQL or Redis. Both Redis
+client flavours (sync and asyncio) talk to the same fake server, like the
+real clients share one Redis.
+
+Dependencies:
+- pytest
+- fakeredis
+- aiosqlite: Async driver for the SQLite test database
+"""
+
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+import fakeredis
+import pytest
+import redis
+import redis.asyncio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The DB_URL the suite was started with (tests that need a real PostgreSQL use it)
+ORIGINAL_DB_URL = os.getenv("DB_URL")
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="geoguessr-wa-tests-"), "test.db")
+os.environ["DB_URL"] = f"sqlite:///{_db_path}"
+os.environ["ASYNC_DB_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["GAME_DECK_DEPTH"] = "0"
+os.environ["GEOCODER_BACKEND"] = "offline"
+os.environ.pop("REDIS_URL", None)
+
+# Without REDIS_URL the app builds localhost clients; point them at one fake server instead
+REDIS_SERVER = fakeredis.FakeServer()
+
+
+def _fake_options(options):
+    return {key: value for key, value in options.items() if key == "decode_responses"}
+
+
+redis.Redis = lambda *args, **options: fakeredis.FakeRedis(server=REDIS_SERVER, **_fake_options(options))
+redis.asyncio.Redis = lambda *args, **options: fakeredis.FakeAsyncRedis(server=REDIS_SERVER, **_fake_options(options))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.db import Base, engine  # noqa: E402
+from app.models import Location  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.game_session import local_sessions, _local_guess_locks  # noqa: E402
+from app.services.limiter import limiter  # noqa: E402
+from app.services.redis_client import redis_breaker, redis_client  # noqa: E402
+
+# Number of bundled locations loaded into the test database
+TEST_LOCATION_COUNT = 60
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema and load a few real locations once per run"""
+    Base.metadata.create_all(engine)
+    with open(os.path.join(BACKEND_DIR, "app", "geoguessr-wa-locations.geojson")) as geojson:
+        features = json.load(geojson)["features"][:TEST_LOCATION_COUNT]
+    with Session(engine) as db:
+        for number, feature in enumerate(features):
+            lng, lat = feature["geometry"]["coordinates"]
+            db.add(Location(latitude=lat, longitude=lng, pano_id=f"test-pano-{number}"))
+        db.commit()
+    # Guesses are submitted back to back in tests
+    limiter.enabled = False
+    yield engine
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Every test starts with an empty Redis, no local fallback sessions and a closed breaker"""
+    redis_client.flushall()
+    local_sessions.clear()
+    _local_guess_locks.clear()
+    redis_breaker._failures = 0
+    redis_breaker._opened_at = None
+    yield
+
+
+@pytest.fixture
+def client():
+    """TestClient logged in as a new user; the user's id is on `client.user_id`"""
+    number = next(_user_numbers)
+    with TestClient(app, base_url="https://testserver") as test_client:
+        credentials = {"email": f"player{number}@example.com", "password": "password"}
+        test_client.post("/auth/register", json={"username": f"player{number}", **credentials})
+        test_client.post("/auth/login", json=credentials)
+        test_client.user_id = test_client.get("/auth/me").json()["user_id"]
+        yield test_client
+
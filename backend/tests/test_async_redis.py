@@ -0,0 +1,218 @@
+"""Tests for the asyncio Redis paths: game sessions, shared addresses, breaker fallback and lock release"""
+
+import asyncio
+
+import pytest
+import redis
+
+from app.services import game_session, location
+from app.services.game_session import (
+    acquire_guess_lock, game_session_key, guess_lock_key, load_game_session, load_game_session_async,
+    local_sessions, release_guess_lock, save_game_session, save_game_session_async,
+)
+from app.services.location import (
+    LOCATION_ADDRESSES_KEY, lookup_location_addresses_async, remember_location_addresses_async,
+)
+from app.services.location_index import location_index
+from app.services.redis_client import (
+    acquire_redis_lock, redis_binary_client, redis_breaker, redis_client, release_redis_lock,
+)
+
+
+def _game_data(user_id: int) -> dict:
+    # Location ids outside the test database, so every address is stored inline
+    return {
+        "game_id": 7,
+        "round_id": 70,
+        "user_id": user_id,
+        "current_round": 2,
+        "round_number": 2,
+        "number_of_locations": 60,
+        "total_score": 4800.0,
+        "total_distance": 12.5,
+        "rounds_completed": 1,
+        "location_ids": [90001, 90002, 90003, 90004, 90005],
+        "all_pano_ids": ["p1", "p2", "p3", "p4", "p5"],
+        "game_lats": [47.1, 47.2, 47.3, 47.4, 47.5],
+        "game_lngs": [-122.1, -122.2, -122.3, -122.4, -122.5],
+        "all_round_scores": [4800.0],
+        "all_round_distances": [12.5],
+        "all_actual_string_locations": ["First", "Second", "Third", "Fourth", "Fifth"],
+        "mode": "classic",
+        "challenge_date": None,
+    }
+
+
+class UnreachableRedis:
+    """Stands in for a client whose server can't be reached; counts the calls that got through"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _fail(self):
+        self.calls += 1
+        raise redis.exceptions.ConnectionError("Connection refused")
+
+    def pipeline(self, *args, **kwargs):
+        self._fail()
+
+    def __getattr__(self, name):
+        async def command(*args, **kwargs):
+            self._fail()
+        return command
+
+
+class UnreachableSyncRedis(UnreachableRedis):
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self._fail()
+        return command
+
+
+def test_async_save_and_load_round_trip():
+    asyncio.run(save_game_session_async(101, _game_data(101)))
+
+    assert redis_binary_client.type(game_session_key(101)) == b"hash"
+    game_data = asyncio.run(load_game_session_async(101))
+    assert game_data["all_actual_string_locations"] == ["First", "Second", "Third", "Fourth", "Fifth"]
+    assert game_data["current_string_location"] == "Second"
+    assert game_data["all_round_scores"] == [4800.0]
+    assert game_data["total_distance"] == 12.5
+
+
+def test_async_and_sync_paths_share_sessions():
+    save_game_session(102, _game_data(102))
+    assert asyncio.run(load_game_session_async(102)) == load_game_session(102)
+
+    asyncio.run(save_game_session_async(103, _game_data(103)))
+    assert load_game_session(103) == asyncio.run(load_game_session_async(103))
+
+
+def test_async_load_of_missing_session_is_none():
+    assert asyncio.run(load_game_session_async(104)) is None
+
+
+def test_addresses_are_shared_through_the_async_client(monkeypatch):
+    asyncio.run(remember_location_addresses_async({90011: "Shared Road"}, share=True))
+    assert redis_client.hget(LOCATION_ADDRESSES_KEY, "90011") == "Shared Road"
+
+    # Another worker's index doesn't know the address yet
+    monkeypatch.setattr(location_index, "address_for", lambda location_id: None)
+    assert asyncio.run(lookup_location_addresses_async([90011, 90012])) == ["Shared Road", None]
+
+
+def test_async_address_lookup_survives_redis_outage(monkeypatch):
+    monkeypatch.setattr(location, "async_redis_client", UnreachableRedis())
+    monkeypatch.setattr(location_index, "address_for", lambda location_id: None)
+
+    assert asyncio.run(lookup_location_addresses_async([90021])) == [None]
+
+
+def test_async_session_falls_back_to_local_store_when_redis_is_down(monkeypatch):
+    monkeypatch.setattr(game_session, "async_redis_binary_client", UnreachableRedis())
+
+    asyncio.run(save_game_session_async(105, _game_data(105)))
+
+    assert local_sessions.get(105) is not None
+    assert not redis_binary_client.exists(game_session_key(105))
+    # Once the session lives locally it is read from there, without asking Redis again
+    assert asyncio.run(load_game_session_async(105))["game_id"] == 7
+
+
+def test_breaker_opens_after_repeated_async_failures(monkeypatch):
+    unreachable = UnreachableRedis()
+    monkeypatch.setattr(game_session, "async_redis_binary_client", unreachable)
+
+    for user_id in range(200, 200 + redis_breaker.failure_threshold):
+        assert asyncio.run(load_game_session_async(user_id)) is None
+    assert redis_breaker.is_open
+    calls_before = unreachable.calls
+
+    # While open, calls fail fast to the local store without touching the client
+    assert asyncio.run(load_game_session_async(299)) is None
+    assert unreachable.calls == calls_before
+
+
+def test_guess_lock_release_needs_the_holders_token():
+    token = acquire_guess_lock(106)
+    assert token is not None
+    assert acquire_guess_lock(106) is None
+
+    release_guess_lock(106, "someone-else")
+    assert redis_binary_client.get(guess_lock_key(106)) == token.encode()
+
+    release_guess_lock(106, token)
+    assert not redis_binary_client.exists(guess_lock_key(106))
+
+
+def test_guess_lock_taken_over_after_expiry_is_left_alone():
+    stale_token = acquire_guess_lock(107)
+    # The lock expired and the next submit took it
+    redis_binary_client.set(guess_lock_key(107), "next-request")
+
+    release_guess_lock(107, stale_token)
+
+    assert redis_binary_client.get(guess_lock_key(107)) == b"next-request"
+
+
+def _take_redis_down(monkeypatch):
+    unreachable = UnreachableSyncRedis()
+    monkeypatch.setattr(game_session, "redis_binary_client", unreachable)
+    monkeypatch.setattr(game_session, "_release_lock_script", getattr(unreachable, "evalsha"))
+
+
+def test_local_guess_lock_release_needs_the_holders_token(monkeypatch):
+    _take_redis_down(monkeypatch)
+
+    token = acquire_guess_lock(108)
+    assert token is not None
+    assert acquire_guess_lock(108) is None
+
+    release_guess_lock(108, "someone-else")
+    assert acquire_guess_lock(108) is None
+
+    release_guess_lock(108, token)
+    assert acquire_guess_lock(108) is not None
+
+
+def test_redis_lock_release_needs_the_holders_token():
+    token = acquire_redis_lock("test:lock", 30)
+    assert token is not None
+    assert acquire_redis_lock("test:lock", 30) is None
+
+    assert not release_redis_lock("test:lock", "someone-else")
+    assert release_redis_lock("test:lock", token)
+    assert acquire_redis_lock("test:lock", 30) is not None
+
+
+@pytest.fixture
+def sync_calls_on_loop(monkeypatch):
+    """Names of sync Redis commands issued while an event loop was running in that thread"""
+    calls = []
+    for client in (redis_client, redis_binary_client):
+        for name in ("get", "set", "hget", "hmget", "hset", "hgetall", "delete", "lpop", "evalsha"):
+            original = getattr(client, name)
+
+            def command(*args, _original=original, _name=name, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    calls.append(_name)
+                except RuntimeError:
+                    pass
+                return _original(*args, **kwargs)
+
+            monkeypatch.setattr(client, name, command)
+    return calls
+
+
+def test_async_routes_make_no_blocking_redis_calls(client, sync_calls_on_loop, monkeypatch):
+    # A worker whose index doesn't have the addresses has to look them up in Redis
+    monkeypatch.setattr(location_index, "address_for", lambda location_id: None)
+
+    assert client.post("/game/start-game").status_code == 200
+    assert client.get("/game/get-round-results", params={"lat": 47.6, "lng": -122.3}).status_code == 200
+    assert client.post("/game/next-round").status_code == 200
+    assert client.post("/game/reset-game").status_code == 200
+    assert client.post("/game/start-game", params={"mode": "daily"}).status_code == 200
+
+    assert sync_calls_on_loop == []
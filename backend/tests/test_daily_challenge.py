@@ -0,0 +1,107 @@
+"""Tests for starting daily challenge games and sharing the day's deck"""
+
+import asyncio
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.api.routes import game as game_routes
+from app.db.db import AsyncSessionLocal, async_engine
+from app.services import daily_challenge
+from app.services.daily_challenge import daily_challenge_key, get_daily_challenge_async
+from app.services.game_session import delete_game_session
+from app.services.location import UNKNOWN_ADDRESS
+from app.services.redis_client import redis_client
+
+CHALLENGE_DAY = date(2030, 1, 1)
+
+
+@pytest.fixture
+def fresh_challenges():
+    daily_challenge._local_challenges.clear()
+    daily_challenge._address_retry_at.clear()
+    yield
+    daily_challenge._local_challenges.clear()
+    daily_challenge._address_retry_at.clear()
+
+
+async def _get_challenges(times: int):
+    """The day's deck, fetched `times` times in a row"""
+    decks = []
+    try:
+        async with AsyncSessionLocal() as db:
+            for _ in range(times):
+                decks.append(await get_daily_challenge_async(db, CHALLENGE_DAY))
+    finally:
+        await async_engine.dispose()
+    return decks
+
+
+def test_daily_challenge_replay_is_rejected(client):
+    assert client.post("/game/start-game", params={"mode": "daily"}).status_code == 200
+    delete_game_session(client.user_id)
+
+    replay = client.post("/game/start-game", params={"mode": "daily"})
+
+    assert replay.status_code == 409
+    assert replay.json()["detail"] == "You have already played today's daily challenge"
+
+
+@pytest.mark.parametrize("mode", ["classic", "daily"])
+def test_other_integrity_errors_are_not_reported_as_replays(client, monkeypatch, mode):
+    async def failing_create(*args, **kwargs):
+        raise IntegrityError("INSERT INTO games ...", {}, Exception("NOT NULL constraint failed: games.user_id"))
+
+    monkeypatch.setattr(game_routes, "create_game_with_first_round_async", failing_create)
+
+    with pytest.raises(IntegrityError):
+        client.post("/game/start-game", params={"mode": mode})
+
+
+def test_deck_with_unresolved_addresses_is_not_shared(fresh_challenges, monkeypatch):
+    async def failed_geocoding(locations, db):
+        return [UNKNOWN_ADDRESS] * len(locations)
+
+    monkeypatch.setattr(daily_challenge, "get_location_addresses_async", failed_geocoding)
+
+    deck, = asyncio.run(_get_challenges(1))
+
+    assert deck["addresses"] == [UNKNOWN_ADDRESS] * len(deck["location_ids"])
+    assert redis_client.get(daily_challenge_key(CHALLENGE_DAY)) is None
+
+
+def test_missing_addresses_are_resolved_before_sharing(fresh_challenges, monkeypatch):
+    async def failed_geocoding(locations, db):
+        return [UNKNOWN_ADDRESS] * len(locations)
+
+    resolve = daily_challenge.get_location_addresses_async
+    monkeypatch.setattr(daily_challenge, "get_location_addresses_async", failed_geocoding)
+    unresolved, = asyncio.run(_get_challenges(1))
+
+    # Geocoding works again and the retry is due
+    monkeypatch.setattr(daily_challenge, "get_location_addresses_async", resolve)
+    monkeypatch.setattr(daily_challenge, "DAILY_CHALLENGE_ADDRESS_RETRY_SECONDS", 0)
+    daily_challenge._address_retry_at.clear()
+    resolved, again = asyncio.run(_get_challenges(2))
+
+    assert resolved["location_ids"] == unresolved["location_ids"]
+    assert UNKNOWN_ADDRESS not in resolved["addresses"]
+    assert again is resolved
+    assert json.loads(redis_client.get(daily_challenge_key(CHALLENGE_DAY))) == resolved
+
+
+def test_missing_addresses_wait_for_the_retry_interval(fresh_challenges, monkeypatch):
+    calls = []
+
+    async def failed_geocoding(locations, db):
+        calls.append(len(locations))
+        return [UNKNOWN_ADDRESS] * len(locations)
+
+    monkeypatch.setattr(daily_challenge, "get_location_addresses_async", failed_geocoding)
+
+    first, second = asyncio.run(_get_challenges(2))
+
+    assert second is first
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+"""Tests for finishing a game: stats and leaderboard scores are only recorded once every round is played"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Game
+
+GUESS = {"lat": 47.6, "lng": -122.3}
+ROUNDS = 5
+
+
+def _play_rounds(client, rounds: int):
+    for round_number in range(1, rounds + 1):
+        if round_number > 1:
+            assert client.post("/game/next-round").status_code == 200
+        assert client.get("/game/get-round-results", params=GUESS).status_code == 200
+
+
+def _completed_at(database, user_id: int):
+    with Session(database) as db:
+        return db.execute(select(Game.completed_at).where(Game.user_id == user_id)).scalar_one()
+
+
+def _global_board(client):
+    return client.get("/leaderboard/global").json()["entries"]
+
+
+def test_unfinished_game_is_not_finalized(client, database):
+    client.post("/game/start-game")
+    _play_rounds(client, 1)
+
+    response = client.get("/game/get-game-results")
+
+    assert response.status_code == 409
+    assert _completed_at(database, client.user_id) is None
+    assert client.get("/auth/me/stats").json()["games_played"] == 0
+
+
+def test_finished_game_is_finalized_once(client, database):
+    client.post("/game/start-game")
+    _play_rounds(client, ROUNDS)
+
+    first = client.get("/game/get-game-results")
+    repeat = client.get("/game/get-game-results")
+
+    assert first.status_code == 200
+    assert repeat.json()["total_score"] == first.json()["total_score"]
+    assert _completed_at(database, client.user_id) is not None
+    stats = client.get("/auth/me/stats").json()
+    assert stats["games_played"] == 1
+    assert stats["total_score"] == first.json()["total_score"]
+
+
+def test_unfinished_game_stays_off_the_leaderboards(client):
+    client.post("/game/start-game")
+    _play_rounds(client, ROUNDS - 1)
+
+    assert client.get("/game/get-game-results").status_code == 409
+
+    assert _global_board(client) == []
+    assert client.get("/leaderboard/daily").json()["entries"] == []
+
+
+def test_finished_game_is_scored_on_the_leaderboards_once(client):
+    client.post("/game/start-game")
+    _play_rounds(client, ROUNDS)
+
+    total_score = client.get("/game/get-game-results").json()["total_score"]
+    client.get("/game/get-game-results")
+
+    assert [(entry["user_id"], entry["score"]) for entry in _global_board(client)] == [(client.user_id, total_score)]
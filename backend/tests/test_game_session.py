@@ -0,0 +1,74 @@
+"""Tests for the Redis hash game session and its migration from single-value sessions"""
+
+import json
+
+from app.services.game_session import game_session_key, load_game_session
+from app.services.redis_client import redis_binary_client
+
+GUESS = {"lat": 47.6, "lng": -122.3}
+
+# Fields a v1 (single JSON value) session carried
+LEGACY_FIELDS = (
+    "game_id", "round_id", "user_id", "current_round", "current_string_location", "number_of_locations",
+    "total_score", "total_distance", "rounds_completed", "location_ids", "all_pano_ids", "game_lats",
+    "game_lngs", "all_round_scores", "all_round_distances", "all_actual_string_locations",
+)
+
+
+def _store_as_legacy_session(user_id: int):
+    """Rewrite the user's current session in the old single-value JSON format"""
+    game_data = load_game_session(user_id)
+    legacy = {field: game_data[field] for field in LEGACY_FIELDS}
+    redis_binary_client.delete(game_session_key(user_id))
+    redis_binary_client.set(game_session_key(user_id), json.dumps(legacy))
+    return legacy
+
+
+def test_guess_is_recorded_in_the_session(client):
+    client.post("/game/start-game")
+
+    response = client.get("/game/get-round-results", params=GUESS)
+
+    assert response.status_code == 200
+    game_data = load_game_session(client.user_id)
+    assert game_data["current_round"] == 2
+    assert game_data["all_round_scores"] == [response.json()["round_score"]]
+    assert game_data["round_results"][1] == response.json()
+
+
+def test_repeat_submit_returns_the_stored_result(client):
+    client.post("/game/start-game")
+    first = client.get("/game/get-round-results", params=GUESS)
+
+    repeat = client.get("/game/get-round-results", params={"lat": 46.0, "lng": -120.0})
+
+    assert repeat.status_code == 200
+    assert repeat.json() == first.json()
+
+
+def test_legacy_session_repeat_submit_is_rejected_not_an_error(client):
+    client.post("/game/start-game")
+    assert client.get("/game/get-round-results", params=GUESS).status_code == 200
+    legacy = _store_as_legacy_session(client.user_id)
+    assert legacy["current_round"] == 2
+
+    # The scored round's response wasn't kept by the old format, so there is nothing to replay
+    repeat = client.get("/game/get-round-results", params=GUESS)
+
+    assert repeat.status_code == 409
+    assert redis_binary_client.type(game_session_key(client.user_id)) == b"hash"
+    migrated = load_game_session(client.user_id)
+    assert migrated["round_results"] == {}
+    assert migrated["all_round_scores"] == legacy["all_round_scores"]
+
+
+def test_legacy_session_continues_after_migration(client):
+    client.post("/game/start-game")
+    client.get("/game/get-round-results", params=GUESS)
+    assert client.post("/game/next-round").status_code == 200
+    _store_as_legacy_session(client.user_id)
+
+    response = client.get("/game/get-round-results", params=GUESS)
+
+    assert response.status_code == 200
+    assert load_game_session(client.user_id)["current_round"] == 3
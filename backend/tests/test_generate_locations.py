@@ -0,0 +1,93 @@
+"""Tests for the location ingestion pipeline's checkpoints"""
+
+import json
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.generate_locations import MetadataLookupError, load_checkpoint, run
+from app.models import Location
+
+POINTS = [(46.0 + i * 0.1, -120.0 - i * 0.1) for i in range(7)]
+
+
+class FlakySource:
+    """Finds a panorama at every point, except that lookups of `failing` points fail"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.looked_up = []
+
+    def get_pano(self, lat: float, lng: float):
+        self.looked_up.append((lat, lng))
+        if (lat, lng) in self.failing:
+            raise MetadataLookupError(f"({lat}, {lng}): HTTP 503")
+        return {"lat": lat, "lng": lng, "pano_id": f"ingest-{lat:.1f},{lng:.1f}"}
+
+
+@pytest.fixture
+def geojson_path(tmp_path):
+    path = tmp_path / "points.geojson"
+    path.write_text(json.dumps({
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [lng, lat]}}
+            for lat, lng in POINTS
+        ],
+    }))
+    return str(path)
+
+
+@pytest.fixture
+def ingested_pano_ids(database):
+    """pano ids stored by the pipeline; removed again afterwards so other tests keep their locations"""
+    def read():
+        with Session(database) as db:
+            return set(db.scalars(select(Location.pano_id).where(Location.pano_id.like("ingest-%"))))
+    yield read
+    with Session(database) as db:
+        db.execute(delete(Location).where(Location.pano_id.like("ingest-%")))
+        db.commit()
+
+
+def test_failed_lookups_are_kept_in_the_checkpoint_and_retried(geojson_path, tmp_path, ingested_pano_ids):
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    first = run(FlakySource(failing=[POINTS[1], POINTS[4]]), geojson_path, checkpoint,
+                workers=2, batch_size=3, min_spacing_m=0)
+
+    assert first == {"processed": 7, "found": 5, "inserted": 5, "failed": 2}
+    assert load_checkpoint(checkpoint, geojson_path, 0) == (7, [1, 4])
+    assert len(ingested_pano_ids()) == 5
+
+    retry_source = FlakySource()
+    second = run(retry_source, geojson_path, checkpoint, workers=2, batch_size=3, min_spacing_m=0)
+
+    assert sorted(retry_source.looked_up) == sorted([POINTS[1], POINTS[4]])
+    assert second == {"processed": 2, "found": 2, "inserted": 2, "failed": 0}
+    assert load_checkpoint(checkpoint, geojson_path, 0) == (7, [])
+    assert len(ingested_pano_ids()) == 7
+
+
+def test_interrupted_run_resumes_after_the_last_batch(geojson_path, tmp_path, ingested_pano_ids):
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    class Interrupted(Exception):
+        pass
+
+    class InterruptingSource(FlakySource):
+        def get_pano(self, lat, lng):
+            if (lat, lng) == POINTS[4]:
+                raise Interrupted()
+            return super().get_pano(lat, lng)
+
+    with pytest.raises(Interrupted):
+        run(InterruptingSource(failing=[POINTS[0]]), geojson_path, checkpoint, workers=1, batch_size=3, min_spacing_m=0)
+    assert load_checkpoint(checkpoint, geojson_path, 0) == (3, [0])
+
+    resumed_source = FlakySource()
+    run(resumed_source, geojson_path, checkpoint, workers=1, batch_size=3, min_spacing_m=0)
+
+    assert resumed_source.looked_up == [POINTS[0]] + POINTS[3:]
+    assert len(ingested_pano_ids()) == 7
@@ -0,0 +1,37 @@
+"""Runs the hot-path query plan check against PostgreSQL when DB_URL points at one"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import check_query_plans
+from tests.conftest import ORIGINAL_DB_URL
+
+pytestmark = pytest.mark.skipif(
+    not (ORIGINAL_DB_URL or "").startswith("postgresql"),
+    reason="query plans are only checked on PostgreSQL (set DB_URL to a migrated database)",
+)
+
+
+@pytest.fixture
+def postgres_engine(monkeypatch):
+    pg_engine = create_engine(ORIGINAL_DB_URL)
+    monkeypatch.setattr(check_query_plans, "engine", pg_engine)
+    yield pg_engine
+    pg_engine.dispose()
+
+
+def test_hot_path_queries_use_their_indexes(postgres_engine):
+    assert check_query_plans.run(users=300, games_per_user=10, locations=3000)
+
+
+def test_recent_games_needs_started_at_index(postgres_engine):
+    """uq_games_user_id_challenge_date is also led by user_id but must not satisfy the check"""
+    with postgres_engine.connect() as conn:
+        exists = conn.execute(text("SELECT to_regclass('ix_games_user_id_started_at') IS NOT NULL")).scalar()
+    if not exists:
+        pytest.skip("ix_games_user_id_started_at is not in this database")
+
+    with postgres_engine.connect() as conn:
+        indexes = check_query_plans._indexes_led_by(conn, "games", ("user_id", "started_at"))
+        assert indexes == {"ix_games_user_id_started_at"}
+        assert "uq_games_user_id_challenge_date" in check_query_plans._indexes_led_by(conn, "games", ("user_id",))
@@ -0,0 +1,81 @@
+"""Tests that the vectorized scoring engine agrees with the per-guess helpers"""
+
+import numpy as np
+import pytest
+
+from app.services.game import get_score
+from app.services.location import haversine_formula
+from app.services.scoring import (
+    MAX_SCORE, MAX_SCORE_DISTANCE_KM, haversine_distance, haversine_distances, score_distance, score_distances,
+    score_guesses,
+)
+
+# numpy's SIMD arctan2 may differ from the C library's in the last bit (~1e-12 km)
+DISTANCE_TOLERANCE_KM = 1e-9
+
+
+@pytest.fixture(scope="module")
+def random_pairs():
+    """Guess/target pairs: nearby Washington points, far-apart points worldwide and exact hits"""
+    rng = np.random.default_rng(2024)
+    size = 20000
+    target_lats = rng.uniform(45.5, 49.0, size)
+    target_lngs = rng.uniform(-124.8, -116.9, size)
+    guess_lats = target_lats + rng.normal(0, 1.5, size)
+    guess_lngs = target_lngs + rng.normal(0, 2.0, size)
+
+    world_lats, world_lngs = rng.uniform(-90, 90, (2, size)), rng.uniform(-180, 180, (2, size))
+    return (
+        np.concatenate([guess_lats, world_lats[0], target_lats]),
+        np.concatenate([guess_lngs, world_lngs[0], target_lngs]),
+        np.concatenate([target_lats, world_lats[1], target_lats]),
+        np.concatenate([target_lngs, world_lngs[1], target_lngs]),
+    )
+
+
+def test_batch_distances_match_scalar(random_pairs):
+    batch = haversine_distances(*random_pairs)
+    scalar = np.array([haversine_distance(*pair) for pair in zip(*random_pairs)])
+
+    np.testing.assert_allclose(batch, scalar, rtol=0, atol=DISTANCE_TOLERANCE_KM)
+    # The inputs cover exact hits, nearby guesses and the far side of the score cutoff
+    assert (scalar == 0).any()
+    assert (scalar > MAX_SCORE_DISTANCE_KM).any()
+
+
+def test_batch_scores_match_scalar(random_pairs):
+    distances, scores = score_guesses(*random_pairs)
+    scalar_scores = [get_score(haversine_formula(*pair)) for pair in zip(*random_pairs)]
+
+    assert scores.tolist() == scalar_scores
+    assert MAX_SCORE in scalar_scores
+    assert 0 in scalar_scores
+
+
+def test_scores_for_the_same_distances_are_identical():
+    rng = np.random.default_rng(7)
+    # Random distances, exact round-number distances and the half-point ties between scores
+    distances = np.concatenate([
+        rng.uniform(0, 800, 50000),
+        np.arange(0, 800, 0.1),
+        MAX_SCORE_DISTANCE_KM * (1 - (np.arange(MAX_SCORE) + 0.5) / MAX_SCORE),
+        [0.0, MAX_SCORE_DISTANCE_KM, 10_000.0],
+    ])
+
+    assert score_distances(distances).tolist() == [score_distance(distance) for distance in distances]
+
+
+@pytest.mark.parametrize("distance_km, score", [(0, 5000), (0.05, 5000), (250, 2500), (500, 0), (650, 0)])
+def test_score_falloff(distance_km, score):
+    assert get_score(distance_km) == score
+    assert int(score_distances(distance_km)) == score
+
+
+def test_scalar_helpers_do_not_return_numpy_types():
+    assert type(haversine_formula(47.6, -122.3, 46.0, -120.0)) is float
+    assert type(get_score(12.5)) is int
+
+
+def test_same_point_is_zero_km():
+    assert haversine_formula(47.6062, -122.3321, 47.6062, -122.3321) == 0
+    assert float(haversine_distances(47.6062, -122.3321, 47.6062, -122.3321)) == 0